@@ -0,0 +1,335 @@
+"""
+Capa asíncrona (asyncio) sobre los proveedores de LLM.
+
+`AsyncLLMGateway` envía prompts a Ollama, OpenAI, Anthropic o Google con:
+- un límite de peticiones simultáneas por proveedor,
+- reintentos con espera exponencial que respetan la cabecera `Retry-After` (429 y 5xx),
+- un plazo máximo por petición (incluidos los reintentos), y
+- cadenas de respaldo, p. ej. "Ollama y, si no responde en 60 s, gpt-4o-mini".
+
+Las URL de los proveedores se pueden redirigir a servidores locales de prueba con
+OLLAMA_HOST, OPENAI_BASE_URL, ANTHROPIC_BASE_URL y GOOGLE_API_ENDPOINT.
+
+Para usarla desde código síncrono (hilos de la GUI o del modo por lotes), `GatewayThread`
+mantiene un bucle de eventos propio en segundo plano compartido por todas las llamadas.
+"""
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from client_registry import get_google_model
+from config import (
+    OLLAMA_HOST,
+    OLLAMA_KEEP_ALIVE,
+    PROVIDER_BASE_DELAY_SECONDS,
+    PROVIDER_CONCURRENCY,
+    PROVIDER_DEADLINE_SECONDS,
+    PROVIDER_MAX_DELAY_SECONDS,
+    PROVIDER_MAX_RETRIES,
+)
+from llm_clients import ANTHROPIC_SYSTEM_PROMPT, OPENAI_SYSTEM_PROMPT
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Códigos HTTP que indican un fallo transitorio y justifican reintentar.
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+
+class ProviderError(RuntimeError):
+    """Error de un proveedor, con la información necesaria para decidir si reintentar."""
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None, retryable: bool = False):
+        super().__init__(f"Error con la API de {provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+@dataclass
+class ProviderPolicy:
+    """Límites y reintentos aplicados a un proveedor."""
+    max_concurrency: int = 4
+    max_retries: int = PROVIDER_MAX_RETRIES
+    base_delay: float = PROVIDER_BASE_DELAY_SECONDS
+    max_delay: float = PROVIDER_MAX_DELAY_SECONDS
+    deadline: Optional[float] = PROVIDER_DEADLINE_SECONDS
+
+
+@dataclass
+class FallbackStep:
+    """Un eslabón de la cadena de respaldo: se espera como máximo `timeout` segundos."""
+    provider: str
+    model: str
+    timeout: Optional[float] = None
+
+
+def parse_fallback_chain(spec: str) -> List[FallbackStep]:
+    """
+    Convierte "Ollama:mistral:60,OpenAI:gpt-4o-mini" en una lista de `FallbackStep`.
+    El tercer campo (opcional) es el tiempo de espera en segundos de ese eslabón.
+    """
+    steps = []
+    for item in spec.split(","):
+        parts = item.strip().split(":")
+        if len(parts) < 2:
+            raise ValueError(f"Eslabón de respaldo no válido: '{item}'. Formato: Proveedor:modelo[:segundos]")
+        timeout = float(parts[2]) if len(parts) > 2 and parts[2] else None
+        steps.append(FallbackStep(provider=parts[0], model=parts[1], timeout=timeout))
+    return steps
+
+
+def _parse_retry_after(headers) -> Optional[float]:
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # También puede venir como fecha HTTP.
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _classify(provider: str, exc: Exception) -> ProviderError:
+    """Traduce la excepción de cualquier SDK a un `ProviderError` uniforme."""
+    if isinstance(exc, ProviderError):
+        return exc
+
+    status = getattr(exc, "status_code", None)
+    if not isinstance(status, int):
+        # Los errores de google.api_core exponen el código HTTP en `code`.
+        status = getattr(exc, "code", None)
+    if not isinstance(status, int) or status < 0:
+        status = None
+
+    response = getattr(exc, "response", None)
+    retry_after = _parse_retry_after(getattr(response, "headers", None))
+
+    if status is not None:
+        retryable = status in RETRYABLE_STATUS
+    else:
+        # Sin código HTTP: solo se reintentan los fallos de conexión y de tiempo de espera.
+        name = type(exc).__name__
+        retryable = isinstance(exc, (ConnectionError, TimeoutError)) or "Connect" in name or "Timeout" in name
+
+    return ProviderError(provider, str(exc), status_code=status, retry_after=retry_after, retryable=retryable)
+
+
+class AsyncLLMGateway:
+    """
+    Punto de entrada asíncrono a los proveedores. Debe usarse desde un único bucle de
+    eventos; los clientes HTTP asíncronos se crean al primer uso y se cierran con `aclose()`.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, ProviderPolicy]] = None):
+        self.policies = {provider: ProviderPolicy(max_concurrency=limit) for provider, limit in PROVIDER_CONCURRENCY.items()}
+        if policies:
+            self.policies.update(policies)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._clients: Dict[str, object] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        for client in self._clients.values():
+            close = getattr(client, "close", None) or getattr(client, "aclose", None)
+            if close is not None:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+        self._clients.clear()
+
+    def _policy(self, provider: str) -> ProviderPolicy:
+        if provider not in self.policies:
+            raise ValueError(f"Proveedor de LLM no reconocido: {provider}")
+        return self.policies[provider]
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        if provider not in self._semaphores:
+            self._semaphores[provider] = asyncio.Semaphore(self._policy(provider).max_concurrency)
+        return self._semaphores[provider]
+
+    # --- Llamadas a cada proveedor (un único intento, sin reintentos del SDK) ---
+
+    async def _call_ollama(self, model: str, prompt: str, params: dict) -> str:
+        if "Ollama" not in self._clients:
+            import ollama
+            self._clients["Ollama"] = ollama.AsyncClient(host=OLLAMA_HOST)
+        response = await self._clients["Ollama"].generate(
+            model=model,
+            prompt=prompt,
+            options={
+                "temperature": params.get("temperature"),
+                "num_predict": params.get("num_predict"),
+                "num_ctx": params.get("num_ctx")
+            },
+            keep_alive=OLLAMA_KEEP_ALIVE
+        )
+        return response.get('response', '')
+
+    async def _call_openai(self, model: str, prompt: str, params: dict) -> str:
+        if "OpenAI" not in self._clients:
+            import openai
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("La clave OPENAI_API_KEY no se encontró en el archivo .env")
+            # Los reintentos los gestiona el gateway, no el SDK.
+            self._clients["OpenAI"] = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+        response = await self._clients["OpenAI"].chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return response.choices[0].message.content or ""
+
+    async def _call_anthropic(self, model: str, prompt: str, params: dict) -> str:
+        if "Anthropic" not in self._clients:
+            import anthropic
+            api_key = os.getenv("ANTHROPIC_API_KEY")
+            if not api_key:
+                raise ValueError("La clave ANTHROPIC_API_KEY no se encontró en el archivo .env")
+            self._clients["Anthropic"] = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+        response = await self._clients["Anthropic"].messages.create(
+            model=model,
+            max_tokens=params.get("max_tokens", 4096),
+            system=ANTHROPIC_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.content[0].text or ""
+
+    async def _call_google(self, model: str, prompt: str, params: dict) -> str:
+        # El SDK de Gemini no ofrece un cliente asíncrono por REST; la llamada síncrona se
+        # ejecuta en un hilo para no bloquear el bucle de eventos.
+        gemini_model = get_google_model(model)
+        response = await asyncio.to_thread(gemini_model.generate_content, prompt)
+        return response.text or ""
+
+    async def _call_once(self, provider: str, model: str, prompt: str, params: dict) -> str:
+        calls = {
+            "Ollama": self._call_ollama,
+            "OpenAI": self._call_openai,
+            "Anthropic": self._call_anthropic,
+            "Google": self._call_google,
+        }
+        return await calls[provider](model, prompt, params)
+
+    async def _generate_with_retries(self, provider: str, model: str, prompt: str, params: dict) -> str:
+        policy = self._policy(provider)
+        for attempt in range(policy.max_retries + 1):
+            try:
+                # El semáforo solo se retiene durante la petición, no durante la espera entre reintentos.
+                async with self._semaphore(provider):
+                    return await self._call_once(provider, model, prompt, params)
+            except asyncio.CancelledError:
+                raise
+            except ValueError:
+                raise
+            except Exception as e:
+                error = _classify(provider, e)
+                if not error.retryable or attempt == policy.max_retries:
+                    raise error from e
+                delay = error.retry_after
+                if delay is None:
+                    delay = min(policy.max_delay, policy.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                delay = min(delay, policy.max_delay)
+                logger.warning(f"{provider} respondió {error.status_code or 'sin código'}; reintento {attempt + 1}/{policy.max_retries} en {delay:.1f}s.")
+                await asyncio.sleep(delay)
+        raise AssertionError("inalcanzable")
+
+    async def generate(self, provider: str, model: str, prompt: str, params: Optional[dict] = None,
+                       deadline: Optional[float] = None) -> str:
+        """
+        Genera una respuesta con reintentos. `deadline` (o el de la política del proveedor)
+        limita el tiempo total, incluidas las esperas; al agotarse se lanza TimeoutError.
+        """
+        params = params or {}
+        deadline = deadline if deadline is not None else self._policy(provider).deadline
+        if deadline is None:
+            return await self._generate_with_retries(provider, model, prompt, params)
+        try:
+            return await asyncio.wait_for(self._generate_with_retries(provider, model, prompt, params), timeout=deadline)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{provider} no respondió en {deadline:g}s")
+
+    async def generate_with_fallback(self, chain: List[FallbackStep], prompt: str,
+                                     params: Optional[dict] = None) -> Tuple[str, FallbackStep]:
+        """
+        Prueba cada eslabón de `chain` en orden y devuelve la primera respuesta junto con el
+        eslabón que la produjo. Un eslabón se abandona si falla o si no responde en su `timeout`.
+        """
+        if not chain:
+            raise ValueError("La cadena de respaldo está vacía.")
+        last_error: Optional[Exception] = None
+        for step in chain:
+            try:
+                return await self.generate(step.provider, step.model, prompt, params, deadline=step.timeout), step
+            except (ProviderError, TimeoutError, ValueError) as e:
+                logger.warning(f"{step.provider}/{step.model} no disponible ({e}); probando el siguiente proveedor.")
+                last_error = e
+        raise last_error
+
+    async def generate_many(self, provider: str, model: str, prompts: List[str],
+                            params: Optional[dict] = None) -> List[str]:
+        """Genera varias respuestas a la vez, respetando el límite de concurrencia del proveedor."""
+        return await asyncio.gather(*(self.generate(provider, model, prompt, params) for prompt in prompts))
+
+
+class GatewayThread:
+    """
+    Fachada síncrona: ejecuta un `AsyncLLMGateway` en un bucle de eventos propio en un hilo
+    en segundo plano, de modo que varios hilos comparten los límites de concurrencia.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, ProviderPolicy]] = None):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self.gateway = self._run(self._create(policies))
+
+    async def _create(self, policies):
+        return AsyncLLMGateway(policies)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def generate(self, provider: str, model: str, prompt: str, params: Optional[dict] = None,
+                 deadline: Optional[float] = None) -> str:
+        return self._run(self.gateway.generate(provider, model, prompt, params, deadline))
+
+    def generate_with_fallback(self, chain: List[FallbackStep], prompt: str,
+                               params: Optional[dict] = None) -> Tuple[str, FallbackStep]:
+        return self._run(self.gateway.generate_with_fallback(chain, prompt, params))
+
+    def close(self):
+        self._run(self.gateway.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
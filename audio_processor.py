@@ -1,53 +1,331 @@
+import hashlib
+import json
+import logging
 import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, BinaryIO, Callable, Optional
+
 from dotenv import load_dotenv
-from deepgram import DeepgramClient, PrerecordedOptions, FileSource
+
+from config import (
+    AUDIO_EXTRACTION_BITRATE,
+    AUDIO_EXTRACTION_ENABLED,
+    AUDIO_EXTRACTION_SAMPLE_RATE,
+    CACHE_DIR,
+    DEEPGRAM_TIMEOUT,
+    TRANSCRIPTION_CACHE_ENABLED,
+    TRANSCRIPTION_CACHE_MAX_BYTES,
+    UPLOAD_CHUNK_SIZE,
+)
+from client_registry import get_deepgram_client
+from disk_cache import DiskCache
+from instrumentation import record_span, span
+from transcript import Transcript
+from transcription_backends import ProgressCallback, TranscriptionCancelled, check_cancelled, get_backend
+from utils import hash_file, iter_file_chunks
+
+if TYPE_CHECKING:
+    from deepgram import PrerecordedOptions
 
 # Cargar las variables de entorno para obtener la API Key
 load_dotenv()
 
-def transcribe_audio(file_path: str) -> str:
+logger = logging.getLogger(__name__)
+
+_transcription_cache: Optional[DiskCache] = None
+_transcription_cache_lock = threading.Lock()
+
+def _run_ffmpeg(command: list, cancel: Optional[threading.Event]):
+    """Ejecuta ffmpeg; si se activa `cancel`, lo detiene y lanza TranscriptionCancelled."""
+    if cancel is None:
+        subprocess.run(command, capture_output=True, text=True, check=True)
+        return
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    while True:
+        try:
+            _, stderr = process.communicate(timeout=0.2)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel.is_set():
+                process.kill()
+                process.communicate()
+                raise TranscriptionCancelled("Transcripción cancelada durante la extracción del audio.")
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, stderr=stderr)
+
+def extract_audio_track(
+    file_path: str,
+    output_path: str = None,
+    start: float = None,
+    duration: float = None,
+    cancel: Optional[threading.Event] = None,
+) -> str:
+    """
+    Extrae solo la pista de audio de un archivo de audio/video con ffmpeg y la recodifica
+    a Opus mono a baja frecuencia de muestreo, suficiente para reconocimiento de voz.
+    ffmpeg procesa el archivo en streaming, así que la memoria usada no depende de su tamaño.
+    `start` y `duration` (en segundos) permiten extraer solo un fragmento. Si se activa
+    `cancel`, ffmpeg se detiene y se lanza TranscriptionCancelled.
+    Devuelve la ruta del archivo .ogg generado.
+    """
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("ffmpeg no está instalado o no se encuentra en el PATH.")
+
+    if output_path is None:
+        fd, output_path = tempfile.mkstemp(suffix=".ogg", prefix="audio_")
+        os.close(fd)
+
+    command = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y"]
+    if start is not None:
+        command += ["-ss", f"{start:.3f}"]
+    if duration is not None:
+        command += ["-t", f"{duration:.3f}"]
+    command += [
+        "-i", file_path,
+        "-vn", "-sn", "-dn",          # Descartar vídeo, subtítulos y datos
+        "-ac", "1",                   # Mono
+        "-ar", str(AUDIO_EXTRACTION_SAMPLE_RATE),
+        "-c:a", "libopus",
+        "-b:a", AUDIO_EXTRACTION_BITRATE,
+        "-application", "voip",
+        output_path,
+    ]
+    with span("audio_extraction") as s:
+        try:
+            _run_ffmpeg(command, cancel)
+        except subprocess.CalledProcessError as e:
+            os.remove(output_path)
+            raise RuntimeError(f"ffmpeg no pudo extraer el audio de {file_path}: {e.stderr.strip()}")
+        except TranscriptionCancelled:
+            os.remove(output_path)
+            raise
+        if s.recording:
+            s.set(input_bytes=os.path.getsize(file_path), output_bytes=os.path.getsize(output_path))
+
+    return output_path
+
+# --- ¡CONFIGURACIÓN CORREGIDA! ---
+# Usamos el modelo que Deepgram recomienda para español.
+# Se guardan como diccionario para poder calcular claves de caché sin importar el SDK.
+DEEPGRAM_OPTIONS = dict(
+    model="nova-2-general", # Usando nova-2 que tiene un excelente soporte para español
+    language="es",
+    smart_format=True,
+    punctuate=True,
+    diarize=True,
+    detect_topics=True,
+    paragraphs=True
+)
+
+def _build_options() -> "PrerecordedOptions":
+    # El SDK de Deepgram (y httpx) se importan al primer uso para no retrasar el arranque.
+    from deepgram import PrerecordedOptions
+
+    return PrerecordedOptions(**DEEPGRAM_OPTIONS)
+
+def request_transcription(
+    source: BinaryIO,
+    cancel: Optional[threading.Event] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    total_bytes: Optional[int] = None,
+) -> dict:
+    """
+    Envía a Deepgram el audio leído de un objeto tipo archivo abierto en modo binario y
+    devuelve la respuesta completa como diccionario (incluye palabras, tiempos y hablantes).
+    El contenido se envía en bloques de tamaño fijo (UPLOAD_CHUNK_SIZE), de modo que la
+    memoria usada es constante sea cual sea el tamaño del audio. Antes de cada bloque se
+    comprueba `cancel` (la subida se corta con TranscriptionCancelled) y, si se conoce
+    `total_bytes`, se llama a `on_progress(bytes_enviados, total_bytes)`.
+    """
+    import httpx
+    from deepgram import FileSource
+
+    deepgram = get_deepgram_client()
+
+    # La subida y la transcripción van en la misma petición: la subida termina cuando httpx
+    # consume el último bloque, y lo que queda hasta la respuesta es el trabajo de Deepgram.
+    upload = {"bytes": 0, "done": None}
+
+    def chunks():
+        for chunk in iter_file_chunks(source, UPLOAD_CHUNK_SIZE):
+            check_cancelled(cancel)
+            upload["bytes"] += len(chunk)
+            yield chunk
+            if on_progress is not None and total_bytes:
+                on_progress(upload["bytes"], total_bytes)
+        upload["done"] = time.perf_counter()
+
+    payload: FileSource = {
+        "stream": chunks(),
+    }
+
+    started_at = time.time()
+    start = time.perf_counter()
+    response = deepgram.listen.prerecorded.v("1").transcribe_file(
+        payload, _build_options(), timeout=httpx.Timeout(DEEPGRAM_TIMEOUT, connect=10.0)
+    ).to_dict()
+    end = time.perf_counter()
+
+    upload_done = upload["done"] or end
+    record_span("upload", upload_done - start, started_at=started_at, input_bytes=upload["bytes"])
+    record_span("transcription", end - upload_done, started_at=started_at + (upload_done - start), audio_seconds=response.get("metadata", {}).get("duration", 0.0))
+    return response
+
+def get_transcription_cache() -> DiskCache:
+    """Devuelve la caché de transcripciones del proceso, creándola la primera vez."""
+    global _transcription_cache
+    with _transcription_cache_lock:
+        if _transcription_cache is None:
+            _transcription_cache = DiskCache(os.path.join(CACHE_DIR, "transcriptions.sqlite3"), TRANSCRIPTION_CACHE_MAX_BYTES)
+        return _transcription_cache
+
+def _extraction_settings(extract_audio: bool) -> Optional[list]:
+    if extract_audio and shutil.which("ffmpeg"):
+        return [AUDIO_EXTRACTION_SAMPLE_RATE, AUDIO_EXTRACTION_BITRATE]
+    return None
+
+def transcription_cache_key(audio_hash: str, backend: Optional[str] = None, **extra) -> str:
+    """
+    Construye la clave de caché a partir del hash del audio, las opciones del motor de
+    transcripción (modelo, idioma, diarización, párrafos...) y cualquier parámetro adicional
+    que afecte al resultado (extracción de audio, tramo del segmento, etc.).
+    """
+    material = {"audio": audio_hash, "options": get_backend(backend).cache_options(), **extra}
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+def cached_transcription(key: str, compute: Callable[[], dict], use_cache: bool = TRANSCRIPTION_CACHE_ENABLED) -> dict:
     """
-    Transcribe un archivo de audio/video a texto usando la API de Deepgram.
+    Devuelve la respuesta completa de la transcripción guardada bajo `key` o, si no existe,
+    la obtiene con `compute()` y la guarda comprimida en la caché.
+    """
+    if not use_cache:
+        return compute()
+
+    cache = get_transcription_cache()
+    blob = cache.get(key)
+    if blob is not None:
+        logger.info("Transcripción recuperada de la caché.")
+        return json.loads(zlib.decompress(blob))
+
+    response = compute()
+    cache.put(key, zlib.compress(json.dumps(response).encode('utf-8')))
+    return response
+
+def _transcript_from_response(response: dict) -> str:
+    transcript = response["results"]["channels"][0]["alternatives"][0]["transcript"]
+
+    if len(transcript) < 50:
+         logger.warning(f"La transcripción generada es muy corta. Contenido: '{transcript}'")
+
+    return transcript
+
+def transcribe_stream(source: BinaryIO) -> str:
+    """
+    Transcribe el audio leído de un objeto tipo archivo abierto en modo binario.
+    """
+    try:
+        logger.info("Enviando archivo a Deepgram para transcripción...")
+        response = request_transcription(source)
+        logger.info("Transcripción con Deepgram finalizada.")
+
+        return _transcript_from_response(response)
+
+    except Exception as e:
+        raise RuntimeError(f"Error durante la transcripción con Deepgram: {e}")
+
+def transcribe_file_response(
+    file_path: str,
+    extract_audio: bool = AUDIO_EXTRACTION_ENABLED,
+    use_cache: bool = TRANSCRIPTION_CACHE_ENABLED,
+    backend: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> dict:
+    """
+    Devuelve la respuesta completa del motor de transcripción `backend` (por defecto,
+    TRANSCRIPTION_BACKEND; ver `transcription_backends`) para un archivo de audio/video.
+    La caché se consulta con el hash del archivo original, de modo que un acierto evita
+    tanto la extracción con ffmpeg como la transcripción. Con `cancel` se puede detener la
+    extracción, la subida o la decodificación (TranscriptionCancelled); `on_progress`
+    informa del avance de la subida (Deepgram) o de la decodificación (Whisper).
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"El archivo no existe: {file_path}")
 
-    try:
-        api_key = os.getenv("DEEPGRAM_API_KEY")
-        if not api_key:
-            raise ValueError("No se encontró la DEEPGRAM_API_KEY en el archivo .env")
-
-        deepgram = DeepgramClient(api_key)
-
-        with open(file_path, 'rb') as file:
-            buffer_data = file.read()
-
-        payload: FileSource = {
-            "buffer": buffer_data,
-        }
-
-        # --- ¡CONFIGURACIÓN CORREGIDA! ---
-        # Usamos el modelo que Deepgram recomienda para español.
-        options = PrerecordedOptions(
-            model="nova-2-general", # Usando nova-2 que tiene un excelente soporte para español
-            language="es",
-            smart_format=True,
-            punctuate=True,
-            diarize=True,
-            detect_topics=True,
-            paragraphs=True
-        )
-
-        print("DEBUG: Enviando archivo a Deepgram para transcripción...")
-        response = deepgram.listen.prerecorded.v("1").transcribe_file(payload, options)
-        print("DEBUG: Transcripción con Deepgram finalizada.")
-
-        transcript = response.results.channels[0].alternatives[0].transcript
-        
-        if len(transcript) < 50:
-             print(f"ADVERTENCIA: La transcripción generada es muy corta. Contenido: '{transcript}'")
-
-        return transcript
+    engine = get_backend(backend)
+    extract_audio = extract_audio and engine.extracts_audio
+
+    def compute() -> dict:
+        upload_path = file_path
+        if _extraction_settings(extract_audio):
+            try:
+                upload_path = extract_audio_track(file_path, cancel=cancel)
+                logger.info("Audio extraído: %d -> %d bytes.", os.path.getsize(file_path), os.path.getsize(upload_path))
+            except RuntimeError as e:
+                logger.warning(f"{e}. Se subirá el archivo original.")
+
+        try:
+            logger.info("Transcribiendo con %s...", engine.label)
+            response = engine.transcribe(upload_path, cancel=cancel, on_progress=on_progress)
+            logger.info("Transcripción con %s finalizada.", engine.label)
+            return response
+        finally:
+            if upload_path != file_path:
+                os.remove(upload_path)
+
+    if not use_cache:
+        return compute()
+    with span("file_read", input_bytes=os.path.getsize(file_path)):
+        audio_hash = hash_file(file_path)
+    key = transcription_cache_key(audio_hash, engine.name, extraction=_extraction_settings(extract_audio))
+    return cached_transcription(key, compute)
+
+def transcribe_transcript(
+    file_path: str,
+    extract_audio: bool = AUDIO_EXTRACTION_ENABLED,
+    use_cache: bool = TRANSCRIPTION_CACHE_ENABLED,
+    backend: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Transcript:
+    """
+    Como `transcribe_audio`, pero devuelve un `Transcript` con los tiempos, la confianza y
+    el hablante de cada palabra, además de los párrafos y temas detectados.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo no existe: {file_path}")
 
+    engine = get_backend(backend)
+    try:
+        response = transcribe_file_response(file_path, extract_audio, use_cache, engine.name, cancel, on_progress)
+    except TranscriptionCancelled:
+        raise
     except Exception as e:
-        raise RuntimeError(f"Error durante la transcripción con Deepgram: {e}")
\ No newline at end of file
+        raise RuntimeError(f"Error durante la transcripción con {engine.label}: {e}")
+    _transcript_from_response(response)
+    return Transcript.from_deepgram(response)
+
+def transcribe_audio(
+    file_path: str,
+    extract_audio: bool = AUDIO_EXTRACTION_ENABLED,
+    use_cache: bool = TRANSCRIPTION_CACHE_ENABLED,
+    backend: Optional[str] = None,
+    cancel: Optional[threading.Event] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> str:
+    """
+    Transcribe un archivo de audio/video a texto con la API de Deepgram o, si `backend`
+    (o TRANSCRIPTION_BACKEND) es "whisper", con Whisper en local y sin red.
+    Si `extract_audio` es True y ffmpeg está disponible, solo se sube la pista de audio
+    recodificada; si la extracción falla, se sube el archivo original. Con `use_cache`
+    los archivos ya transcritos con las mismas opciones se sirven desde la caché en disco.
+    El texto tiene un párrafo por turno con el formato "Hablante N: ..." (Whisper no
+    distingue hablantes: sus párrafos van sin etiqueta).
+    `cancel` y `on_progress` se describen en `transcribe_file_response`.
+    """
+    return transcribe_transcript(file_path, extract_audio, use_cache, backend, cancel, on_progress).render()
@@ -0,0 +1,370 @@
+"""
+Procesamiento por lotes sin interfaz gráfica.
+
+Ejecuta el flujo completo (transcripción -> acta en Markdown -> PDF) sobre un
+directorio de grabaciones o un manifiesto. Cada etapa tiene su propio grupo de
+trabajadores, de modo que mientras un archivo se resume, el siguiente ya se
+está transcribiendo.
+
+Uso:
+    python batch_processor.py audios/ --output-dir pdfs --provider Ollama --model mistral
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from dotenv import load_dotenv
+
+from audio_processor import get_transcription_cache, transcribe_transcript
+from chunked_transcription import transcribe_transcript_chunked
+from client_registry import warm_up_ollama_model
+from config import (
+    AUDIO_EXTENSIONS,
+    BATCH_GENERATE_WORKERS,
+    BATCH_RENDER_WORKERS,
+    BATCH_TRANSCRIBE_WORKERS,
+    DEFAULT_GENERATION_PARAMS,
+    LLM_FALLBACK_CHAIN,
+    TRANSCRIPTION_CACHE_ENABLED,
+)
+from instrumentation import setup_logging
+from llm_processor import GenerationStats, generate_minutes_with_fallback, stream_minutes
+from pdf_generator import render_pdf_file
+from transcript import Transcript
+from transcription_backends import BACKENDS, get_backend
+from utils import probe_duration
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchJob:
+    """Estado de un archivo a lo largo del pipeline."""
+    audio_path: str
+    output_pdf: str
+    audio_seconds: float = 0.0
+    transcript: str = ""
+    transcript_data: Optional[Transcript] = None
+    minutes: str = ""
+    error: Optional[str] = None
+    timings: dict = field(default_factory=dict)
+    generation_stats: Optional[GenerationStats] = None
+    generated_by: str = ""
+
+
+@dataclass
+class BatchReport:
+    """Resumen de una ejecución por lotes."""
+    jobs: List[BatchJob]
+    elapsed_seconds: float
+
+    @property
+    def succeeded(self) -> List[BatchJob]:
+        return [job for job in self.jobs if job.error is None]
+
+    @property
+    def failed(self) -> List[BatchJob]:
+        return [job for job in self.jobs if job.error is not None]
+
+    @property
+    def files_per_minute(self) -> float:
+        minutes = self.elapsed_seconds / 60
+        return len(self.succeeded) / minutes if minutes > 0 else 0.0
+
+    @property
+    def audio_hours_per_minute(self) -> float:
+        minutes = self.elapsed_seconds / 60
+        audio_hours = sum(job.audio_seconds for job in self.succeeded) / 3600
+        return audio_hours / minutes if minutes > 0 else 0.0
+
+
+def discover_inputs(source: str) -> List[str]:
+    """
+    Devuelve la lista de archivos a procesar.
+
+    `source` puede ser un directorio (se toman los archivos con extensión de audio/video)
+    o un manifiesto: un `.json` con una lista de rutas o un archivo de texto con una ruta
+    por línea (las líneas vacías y las que empiezan por '#' se ignoran). Las rutas
+    relativas del manifiesto se resuelven respecto a su propio directorio.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(AUDIO_EXTENSIONS)
+        )
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"El directorio o manifiesto no existe: {source}")
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, 'r', encoding='utf-8') as f:
+        if source.lower().endswith(".json"):
+            entries = json.load(f)
+            if not isinstance(entries, list):
+                raise ValueError("El manifiesto JSON debe contener una lista de rutas.")
+        else:
+            entries = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+    return [os.path.join(base_dir, str(entry)) for entry in entries]
+
+
+def _output_stems(audio_paths: List[str]) -> List[str]:
+    """
+    Nombre de salida (sin extensión) de cada grabación. Si dos entradas comparten nombre
+    (`a/reunion.wav` y `b/reunion.wav`), se antepone el directorio que las contiene y, si
+    aun así coinciden, un contador, para que sus .pdf, .txt y .md no se sobrescriban.
+    """
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in audio_paths]
+    # Sin distinguir mayúsculas: en Windows y macOS `Reunion.pdf` y `reunion.pdf` son el mismo archivo.
+    counts = {}
+    for stem in stems:
+        counts[stem.lower()] = counts.get(stem.lower(), 0) + 1
+
+    taken = {stem.lower() for stem in stems if counts[stem.lower()] == 1}
+    result = []
+    for path, stem in zip(audio_paths, stems):
+        if counts[stem.lower()] > 1:
+            parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+            candidate = f"{parent}_{stem}" if parent else stem
+            unique, number = candidate, 2
+            while unique.lower() in taken:
+                unique, number = f"{candidate}_{number}", number + 1
+            stem = unique
+            taken.add(stem.lower())
+        result.append(stem)
+    return result
+
+
+def run_batch(
+    audio_paths: List[str],
+    output_dir: str,
+    provider: str,
+    model_name: str,
+    params: Optional[dict] = None,
+    user_context: str = "",
+    transcribe_workers: int = BATCH_TRANSCRIBE_WORKERS,
+    generate_workers: int = BATCH_GENERATE_WORKERS,
+    render_workers: int = BATCH_RENDER_WORKERS,
+    keep_text: bool = False,
+    chunked: bool = False,
+    bypass_llm_cache: bool = False,
+    fallback_chain: Optional[list] = None,
+    compaction_level: Optional[int] = None,
+    backend: Optional[str] = None,
+    on_job_done: Optional[Callable[[BatchJob], None]] = None,
+) -> BatchReport:
+    """
+    Procesa `audio_paths` a través de las tres etapas en paralelo y devuelve un `BatchReport`.
+
+    Un fallo en un archivo no detiene el lote: se registra en `BatchJob.error` y el resto
+    continúa. Con `chunked=True` cada archivo se transcribe por segmentos en paralelo
+    (ver `chunked_transcription`); con `bypass_llm_cache=True` las actas se regeneran
+    aunque estén en la caché. Con `fallback_chain` (lista de `async_providers.FallbackStep`)
+    las actas se piden a través de la capa asíncrona con reintentos y proveedores de respaldo,
+    y `provider`/`model_name` se ignoran. `compaction_level` sustituye a PROMPT_COMPACTION_LEVEL
+    (ver `prompt_compaction`) y `backend` a TRANSCRIPTION_BACKEND (ver `transcription_backends`).
+    `on_job_done` se invoca desde el hilo que llama a `run_batch` cada vez que
+    un archivo termina, con éxito o con error.
+    """
+    params = params if params is not None else dict(DEFAULT_GENERATION_PARAMS)
+    os.makedirs(output_dir, exist_ok=True)
+    engine = get_backend(backend)
+    if engine.max_concurrency:
+        transcribe_workers = min(transcribe_workers, engine.max_concurrency)
+
+    jobs = [
+        BatchJob(audio_path=audio_path, output_pdf=os.path.join(output_dir, f"{stem}.pdf"))
+        for audio_path, stem in zip(audio_paths, _output_stems(audio_paths))
+    ]
+
+    if not jobs:
+        return BatchReport(jobs=[], elapsed_seconds=0.0)
+
+    finished: "queue.Queue[BatchJob]" = queue.Queue()
+
+    transcribe_pool = ThreadPoolExecutor(max_workers=transcribe_workers, thread_name_prefix="transcribe")
+    generate_pool = ThreadPoolExecutor(max_workers=generate_workers, thread_name_prefix="generate")
+    render_pool = ThreadPoolExecutor(max_workers=render_workers, thread_name_prefix="render")
+    # La maquetación del PDF ocupa la CPU: se hace en procesos aparte para no competir por el GIL
+    # con las etapas de transcripción y generación.
+    render_processes = ProcessPoolExecutor(max_workers=render_workers)
+
+    def run_stage(job: BatchJob, name: str, stage: Callable[[BatchJob], None], next_step: Optional[Callable[[BatchJob], None]]):
+        start = time.perf_counter()
+        try:
+            stage(job)
+        except Exception as e:
+            job.error = f"{name}: {e}"
+            logger.exception("Error en la etapa %s de %s", name, job.audio_path)
+        finally:
+            job.timings[name] = time.perf_counter() - start
+
+        if job.error is None and next_step is not None:
+            next_step(job)
+        else:
+            finished.put(job)
+
+    def transcribe_stage(job: BatchJob):
+        job.audio_seconds = probe_duration(job.audio_path)
+        if chunked:
+            job.transcript_data = transcribe_transcript_chunked(job.audio_path, backend=engine.name)
+        else:
+            job.transcript_data = transcribe_transcript(job.audio_path, backend=engine.name)
+        job.transcript = job.transcript_data.render()
+
+    def generate_stage(job: BatchJob):
+        if fallback_chain:
+            job.minutes, job.generated_by = generate_minutes_with_fallback(
+                fallback_chain, job.transcript, user_context, params,
+                bypass_cache=bypass_llm_cache, compaction_level=compaction_level,
+            )
+            return
+        job.generation_stats = GenerationStats(provider, model_name)
+        job.minutes = "".join(stream_minutes(
+            provider, model_name, job.transcript, user_context, params,
+            bypass_cache=bypass_llm_cache, stats=job.generation_stats, compaction_level=compaction_level,
+        ))
+
+    def render_stage(job: BatchJob):
+        result = render_processes.submit(render_pdf_file, job.minutes, job.output_pdf).result()
+        if result.error:
+            raise RuntimeError(result.error)
+        if keep_text:
+            stem = os.path.splitext(job.output_pdf)[0]
+            with open(f"{stem}.txt", 'w', encoding='utf-8') as f:
+                f.write(job.transcript)
+            if job.transcript_data is not None:
+                job.transcript_data.save(f"{stem}.transcript")
+            with open(f"{stem}.md", 'w', encoding='utf-8') as f:
+                f.write(job.minutes)
+
+    def submit_render(job: BatchJob):
+        render_pool.submit(run_stage, job, "render", render_stage, None)
+
+    def submit_generate(job: BatchJob):
+        generate_pool.submit(run_stage, job, "generate", generate_stage, submit_render)
+
+    start = time.perf_counter()
+    try:
+        for job in jobs:
+            transcribe_pool.submit(run_stage, job, "transcribe", transcribe_stage, submit_generate)
+
+        for _ in jobs:
+            job = finished.get()
+            if on_job_done is not None:
+                on_job_done(job)
+    finally:
+        transcribe_pool.shutdown(wait=True)
+        generate_pool.shutdown(wait=True)
+        render_pool.shutdown(wait=True)
+        render_processes.shutdown(wait=True)
+
+    return BatchReport(jobs=jobs, elapsed_seconds=time.perf_counter() - start)
+
+
+def _print_job(job: BatchJob):
+    name = os.path.basename(job.audio_path)
+    timings = ", ".join(f"{stage}={seconds:.1f}s" for stage, seconds in job.timings.items())
+    if job.error:
+        print(f"[ERROR] {name}: {job.error} ({timings})")
+    else:
+        generation = f"; LLM: {job.generation_stats.summary()}" if job.generation_stats else ""
+        if job.generated_by:
+            generation = f"; LLM: {job.generated_by}"
+        print(f"[OK] {name} -> {job.output_pdf} ({timings}{generation})")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Genera actas en PDF para un directorio o manifiesto de grabaciones.")
+    parser.add_argument("source", help="Directorio con grabaciones o manifiesto (.txt con una ruta por línea, o .json con una lista).")
+    parser.add_argument("--output-dir", default="pdfs", help="Directorio de salida de los PDF (por defecto: pdfs).")
+    parser.add_argument("--provider", default="Ollama", choices=["Ollama", "OpenAI", "Anthropic", "Google"])
+    parser.add_argument("--model", help="Nombre del modelo del proveedor elegido.")
+    parser.add_argument("--context", default="", help="Contexto adicional para el prompt.")
+    parser.add_argument("--transcribe-workers", type=int, default=BATCH_TRANSCRIBE_WORKERS)
+    parser.add_argument("--generate-workers", type=int, default=BATCH_GENERATE_WORKERS)
+    parser.add_argument("--render-workers", type=int, default=BATCH_RENDER_WORKERS)
+    parser.add_argument("--keep-text", action="store_true", help="Guarda también la transcripción (.txt y .transcript con tiempos y hablantes) y el acta (.md) junto al PDF.")
+    parser.add_argument("--chunked", action="store_true", help="Transcribe cada archivo por segmentos en paralelo (grabaciones largas).")
+    parser.add_argument("--refresh", action="store_true", help="Regenera las actas aunque estén en la caché del LLM.")
+    parser.add_argument(
+        "--fallback", default=LLM_FALLBACK_CHAIN,
+        help="Cadena de proveedores de respaldo, p. ej. 'Ollama:mistral:60,OpenAI:gpt-4o-mini' (sustituye a --provider/--model).",
+    )
+    parser.add_argument(
+        "--compaction", type=int, choices=range(0, 4), default=None,
+        help="Nivel de compactación de la transcripción antes del LLM (0-3; por defecto PROMPT_COMPACTION_LEVEL).",
+    )
+    parser.add_argument(
+        "--backend", choices=sorted(BACKENDS), default=None,
+        help="Motor de transcripción (por defecto TRANSCRIPTION_BACKEND); 'whisper' transcribe en local, sin red.",
+    )
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    fallback_chain = None
+    if args.fallback:
+        from async_providers import parse_fallback_chain
+        fallback_chain = parse_fallback_chain(args.fallback)
+        args.provider, args.model = fallback_chain[0].provider, fallback_chain[0].model
+    elif not args.model:
+        parser.error("Se necesita --model (o --fallback).")
+
+    audio_paths = discover_inputs(args.source)
+    if not audio_paths:
+        print(f"No se encontraron archivos para procesar en: {args.source}")
+        return 1
+
+    if args.provider == "Ollama":
+        # Se carga el modelo mientras arranca la transcripción del primer archivo.
+        def warm_up():
+            try:
+                warm_up_ollama_model(args.model)
+            except Exception as e:
+                logger.warning("No se pudo precargar el modelo %s: %s", args.model, e)
+        threading.Thread(target=warm_up, daemon=True).start()
+
+    print(f"Procesando {len(audio_paths)} archivo(s) con {args.provider}/{args.model}...")
+    report = run_batch(
+        audio_paths,
+        output_dir=args.output_dir,
+        provider=args.provider,
+        model_name=args.model,
+        user_context=args.context,
+        transcribe_workers=args.transcribe_workers,
+        generate_workers=args.generate_workers,
+        render_workers=args.render_workers,
+        keep_text=args.keep_text,
+        chunked=args.chunked,
+        bypass_llm_cache=args.refresh,
+        fallback_chain=fallback_chain,
+        compaction_level=args.compaction,
+        backend=args.backend,
+        on_job_done=_print_job,
+    )
+
+    print(
+        f"\nCompletados: {len(report.succeeded)}/{len(report.jobs)} en {report.elapsed_seconds:.1f}s | "
+        f"{report.files_per_minute:.2f} archivos/min | "
+        f"{report.audio_hours_per_minute:.3f} horas de audio/min"
+    )
+    if TRANSCRIPTION_CACHE_ENABLED:
+        stats = get_transcription_cache().stats()
+        print(
+            f"Caché de transcripciones: {stats['hits']} aciertos, {stats['misses']} fallos, "
+            f"{stats['entries']} entradas ({stats['bytes'] / 1024 / 1024:.1f} MB)"
+        )
+    return 0 if not report.failed else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
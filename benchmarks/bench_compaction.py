@@ -0,0 +1,182 @@
+"""
+Benchmark de la compactación del prompt: tokens y latencia de generación por nivel.
+
+Genera transcripciones sintéticas en español con el ruido típico del reconocimiento de voz
+(vacilaciones, muletillas, palabras y frases repetidas, asentimientos que interrumpen) y,
+para cada tamaño y cada nivel de `PROMPT_COMPACTION_LEVEL`, mide:
+- el tiempo de la compactación;
+- los tokens de la transcripción antes y después, con el tokenizador del modelo
+  (`prompt_compaction.count_tokens`);
+- la latencia de `generate_minutes` (mediana y p90) con la caché desactivada.
+
+Por defecto la generación va al servidor Ollama simulado de `fake_servers.py`, que tarda en
+procesar el prompt según --prefill-tokens-per-second, como un modelo local. Con --ollama-host
+se mide contra un Ollama real (indicar también --model).
+
+Uso:
+    python benchmarks/bench_compaction.py [--runs 3] [--levels 0,1,2,3]
+    python benchmarks/bench_compaction.py --ollama-host http://localhost:11434 --model mistral --runs 1
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, REPO_DIR)
+from bench_pipeline import percentile  # noqa: E402
+from fake_servers import FakeOllamaServer  # noqa: E402
+
+# Tamaños (tokens estimados) de las transcripciones; todos caben en una llamada con num_ctx=16384.
+TRANSCRIPT_TOKENS = (1000, 4000, 7000)
+LEVELS = (0, 1, 2, 3)
+
+_SENTENCES = (
+    "vamos a revisar el presupuesto del proyecto para el próximo trimestre",
+    "el cliente pidió adelantar la entrega del informe a la semana que viene",
+    "hay un riesgo con los datos de la migración que tenemos que cerrar antes del viernes",
+    "la propuesta de diseño ya está validada por el equipo de producto",
+    "necesitamos un responsable para la revisión de los contratos",
+    "los resultados de las pruebas de rendimiento mejoraron un veinte por ciento",
+    "propongo que hagamos una reunión de seguimiento el martes a las diez",
+    "falta confirmar el plazo con el proveedor de infraestructura",
+)
+_FILLERS = ("eh,", "bueno,", "o sea,", "mmm", "pues,", "a ver,")
+_BACKCHANNELS = ("Sí, sí, vale.", "Ajá.", "Vale, vale.", "Claro.", "Sí.", "Mhm, de acuerdo.")
+
+
+def noisy_transcript(tokens: int, seed: int = 0) -> str:
+    """Transcripción de unos `tokens` tokens (~4 caracteres por token) con ruido de ASR."""
+    rng = random.Random(seed)
+    turns = []
+    chars = 0
+    speaker = 0
+    while chars < tokens * 4:
+        first_new = len(turns)
+        sentences = []
+        for _ in range(rng.randint(2, 4)):
+            words = rng.choice(_SENTENCES).split()
+            if rng.random() < 0.5:
+                words.insert(0, rng.choice(_FILLERS))
+            if rng.random() < 0.3:
+                i = rng.randrange(len(words))
+                words.insert(i, words[i])
+            if rng.random() < 0.2:
+                i = rng.randrange(len(words) - 2)
+                words[i:i] = words[i:i + 3]
+            sentence = " ".join(words)
+            sentences.append(sentence[0].upper() + sentence[1:] + ".")
+            if rng.random() < 0.15:
+                sentences.append(sentences[-1])
+        turns.append(f"Hablante {speaker}: {' '.join(sentences)}")
+        if rng.random() < 0.4:
+            turns.append(f"Hablante {(speaker + 1) % 3}: {rng.choice(_BACKCHANNELS)}")
+            turns.append(f"Hablante {speaker}: {rng.choice(_SENTENCES).capitalize()}.")
+        else:
+            speaker = (speaker + rng.randint(1, 2)) % 3
+        chars += sum(len(turn) + 2 for turn in turns[first_new:])
+    return "\n\n".join(turns)
+
+
+def bench_level(transcript: str, level: int, runs: int, model: str, server: Optional[FakeOllamaServer]) -> dict:
+    from config import DEFAULT_GENERATION_PARAMS
+    from llm_processor import generate_minutes
+    from prompt_compaction import compact_for_model
+
+    compacted, report = compact_for_model(transcript, "Ollama", model, level)
+
+    def generate():
+        generate_minutes("Ollama", model, compacted, "", dict(DEFAULT_GENERATION_PARAMS), bypass_cache=True, compaction_level=0)
+
+    generate()  # calentamiento
+    if server is not None:
+        server.reset_counters()
+    latencies = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        generate()
+        latencies.append(time.perf_counter() - t0)
+
+    return {
+        "level": level,
+        "compaction_seconds": report.seconds,
+        "tokens_before": report.tokens_before.tokens,
+        "tokens_after": report.tokens_after.tokens,
+        "tokenizer": report.tokens_after.tokenizer,
+        "exact": report.tokens_after.exact,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "bytes_sent": server.bytes_received // runs if server is not None else 0,
+    }
+
+
+def _print_row(size: int, r: dict, reference: Optional[dict]):
+    saved = 1 - r["tokens_after"] / r["tokens_before"] if r["tokens_before"] else 0.0
+    speedup = reference["p50"] / r["p50"] if reference and r["p50"] else 1.0
+    print(
+        f"{size:>7} tok  nivel {r['level']}  {r['tokens_before']:>6} -> {r['tokens_after']:>6} tokens ({saved:6.1%})  "
+        f"compactación {r['compaction_seconds'] * 1000:7.1f} ms  "
+        f"generación p50 {r['p50']:6.2f} s  p90 {r['p90']:6.2f} s  x{speedup:.2f}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tokens y latencia de generación según el nivel de compactación del prompt.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--levels", default=",".join(map(str, LEVELS)), help="Niveles a medir, separados por comas.")
+    parser.add_argument("--sizes", default=",".join(map(str, TRANSCRIPT_TOKENS)), help="Tamaños de transcripción (tokens).")
+    parser.add_argument("--ollama-host", help="Mide contra este servidor Ollama en lugar del simulado.")
+    parser.add_argument("--model", default="fake-model", help="Modelo de Ollama (y de su tokenizador, ver OLLAMA_TOKENIZERS).")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=4000.0, help="Velocidad de lectura del prompt del Ollama simulado.")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0, help="Velocidad de generación del Ollama simulado.")
+    parser.add_argument("--response-tokens", type=int, default=300, help="Tokens de cada respuesta del Ollama simulado.")
+    parser.add_argument("--output", help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    server = None
+    if not args.ollama_host:
+        server = FakeOllamaServer(
+            latency=0.0, tokens_per_second=args.tokens_per_second, response_tokens=args.response_tokens,
+            prefill_tokens_per_second=args.prefill_tokens_per_second, models=(args.model,),
+        ).start()
+    workdir = tempfile.mkdtemp(prefix="meeting-analyzer-bench-")
+    try:
+        # config.py lee el entorno al importarse: hay que fijarlo antes de importar el pipeline.
+        os.environ.update({
+            "OLLAMA_HOST": args.ollama_host or server.url,
+            "CACHE_DIR": os.path.join(workdir, "cache"),
+            "LLM_CACHE_ENABLED": "0",
+        })
+
+        results: Dict[str, dict] = {}
+        for size in sizes:
+            transcript = noisy_transcript(size)
+            reference = None
+            for level in levels:
+                result = bench_level(transcript, level, args.runs, args.model, server)
+                results[f"compaction/{size}tok/level{level}"] = result
+                _print_row(size, result, reference)
+                reference = reference or result
+    finally:
+        if server is not None:
+            server.stop()
+
+    if results:
+        first = next(iter(results.values()))
+        print(f"Tokenizador: {first['tokenizer']} ({'exacto' if first['exact'] else 'aproximado'})")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+"""
+Benchmark del índice del archivo de actas (`minutes_index.py`).
+
+Genera un archivo sintético de actas en Markdown (participantes, decisiones y tareas con
+responsable y fecha límite, con la forma que producen las plantillas del LLM) y mide:
+- la indexación completa y la reindexación incremental (sin cambios y con un 1 % de
+  actas modificadas);
+- la latencia (mediana y p90) de las consultas por palabra clave, por persona (tareas y
+  reuniones), por decisión y por rango de fechas.
+
+Uso:
+    python benchmarks/bench_index.py [--documents 5000] [--runs 50]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, REPO_DIR)
+from bench_pipeline import percentile  # noqa: E402
+
+_PEOPLE = (
+    "Ana García", "Luis Pérez", "Marta Ruiz", "Carlos Gómez", "Elena Díaz", "Javier Martín",
+    "Lucía Fernández", "Pablo Sánchez", "Sofía López", "Diego Romero", "Laura Navarro", "Andrés Torres",
+)
+_ROLES = ("Producto", "Finanzas", "Ingeniería", "Legal", "Operaciones", "Ventas")
+_TOPICS = ("presupuesto", "migración", "contratos", "infraestructura", "auditoría", "lanzamiento", "contratación", "seguridad")
+_DECISIONS = (
+    "Se aprueba el {topic} del próximo trimestre",
+    "Se pospone la revisión de {topic} a la siguiente reunión",
+    "Se elige un nuevo proveedor para {topic}",
+    "Se amplía el equipo dedicado a {topic}",
+)
+_TASKS = (
+    "Preparar el informe de {topic}",
+    "Revisar los riesgos de {topic}",
+    "Enviar la propuesta de {topic} al cliente",
+    "Actualizar el calendario de {topic}",
+)
+
+
+def synthetic_minutes(index: int, rng: random.Random) -> str:
+    date = datetime.date(2021, 1, 1) + datetime.timedelta(days=rng.randrange(4 * 365))
+    topic = rng.choice(_TOPICS)
+    people = rng.sample(_PEOPLE, rng.randint(3, 6))
+    lines = [
+        f"# Acta de Reunión: Seguimiento de {topic} #{index}", "",
+        f"**Fecha:** {date.isoformat()}", "",
+        "## Participantes",
+    ]
+    lines += [f"* **{person}** - {rng.choice(_ROLES)}" for person in people]
+    lines += ["", "## Temas Discutidos", ""]
+    for _ in range(rng.randint(3, 6)):
+        other = rng.choice(_TOPICS)
+        lines.append(f"* Se revisó el estado de {other} y los riesgos asociados con {rng.choice(people)}.")
+    lines += ["", "## Decisiones Clave"]
+    for _ in range(rng.randint(1, 4)):
+        decision = rng.choice(_DECISIONS).format(topic=rng.choice(_TOPICS))
+        lines.append(f"* {decision}. Acordada por: **{rng.choice(people)}**")
+    lines += ["", "## Tareas Pendientes"]
+    for _ in range(rng.randint(2, 6)):
+        task = rng.choice(_TASKS).format(topic=rng.choice(_TOPICS))
+        due = date + datetime.timedelta(days=rng.randint(3, 30))
+        lines.append(f"* **{task}** - Responsable: **{rng.choice(people)}** - Fecha límite: {due.isoformat()}")
+    return "\n".join(lines) + "\n"
+
+
+def _measure(function: Callable[[], List[dict]], runs: int) -> dict:
+    function()  # calentamiento
+    latencies = []
+    results = 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        results = len(function())
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return {"p50_ms": percentile(latencies, 50), "p90_ms": percentile(latencies, 90), "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Indexación y latencia de consultas del índice de actas.")
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--output", help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="meeting-analyzer-bench-")
+    try:
+        from minutes_index import MinutesIndex
+
+        archive = os.path.join(workdir, "actas")
+        os.makedirs(archive)
+        rng = random.Random(0)
+        for i in range(args.documents):
+            with open(os.path.join(archive, f"acta_{i:05d}.md"), 'w', encoding='utf-8') as f:
+                f.write(synthetic_minutes(i, rng))
+
+        index = MinutesIndex(os.path.join(workdir, "index.sqlite3"))
+        results = {}
+        full = index.index_directory(archive)
+        unchanged = index.index_directory(archive)
+        for i in range(0, args.documents, 100):
+            path = os.path.join(archive, f"acta_{i:05d}.md")
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write("\n* Nota añadida tras la reunión.\n")
+        changed = index.index_directory(archive)
+        results["index/full"] = full
+        results["index/unchanged"] = unchanged
+        results["index/changed_1pct"] = changed
+        print(f"Indexación completa:      {full['indexed']} actas en {full['seconds']:.2f}s ({full['indexed'] / full['seconds']:.0f} actas/s)")
+        print(f"Reindexación sin cambios: {unchanged['unchanged']} actas en {unchanged['seconds'] * 1000:.0f} ms")
+        print(f"Reindexación con 1 %:     {changed['indexed']} actas en {changed['seconds'] * 1000:.0f} ms")
+        print(f"Contenido: {json.dumps(index.stats())}")
+
+        queries = {
+            "search/keyword": lambda: index.search("riesgos migración"),
+            "search/keyword+dates": lambda: index.search("presupuesto", date_from="2023-01-01", date_to="2023-06-30"),
+            "tasks/person": lambda: index.tasks(person="ana garcia"),
+            "tasks/person+due": lambda: index.tasks(person="Pérez", due_from="2022-01-01", due_to="2022-12-31"),
+            "decisions/keyword": lambda: index.decisions("proveedor"),
+            "meetings/person": lambda: index.meetings("Lucía"),
+        }
+        for name, query in queries.items():
+            result = _measure(query, args.runs)
+            results[name] = result
+            print(f"{name:<24} p50 {result['p50_ms']:7.2f} ms  p90 {result['p90_ms']:7.2f} ms  ({result['results']} resultados)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
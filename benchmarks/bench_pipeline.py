@@ -0,0 +1,294 @@
+"""
+Benchmark de extremo a extremo del pipeline sin depender de servicios externos.
+
+Levanta los servidores de `fake_servers.py` en lugar de Deepgram y Ollama y ejecuta, sobre
+grabaciones y transcripciones sintéticas de distintos tamaños, las tres etapas del flujo:
+`transcribe_audio`, `generate_minutes` y `create_meeting_minutes_pdf`. Para cada caso
+muestra los percentiles de latencia, el rendimiento, el pico de memoria residente (RSS)
+y los bytes enviados al servidor. Las cachés se desactivan para medir siempre el trabajo real.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--runs 5] [--stages transcribe,generate,render]
+    python benchmarks/bench_pipeline.py --update-baseline
+
+Si existe `benchmarks/pipeline_baseline.json` (creado con --update-baseline en la misma
+máquina), el benchmark termina con código 1 cuando la latencia mediana, el pico de RSS o
+los bytes enviados de algún caso superan la línea base multiplicada por --tolerance.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import wave
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_FILE = os.path.join(BENCH_DIR, "pipeline_baseline.json")
+
+sys.path.insert(0, REPO_DIR)
+from fake_servers import FakeDeepgramServer, FakeOllamaServer, synthetic_text  # noqa: E402
+
+# Duraciones (s) de las grabaciones sintéticas y tamaños (tokens) de transcripciones y actas.
+RECORDING_SECONDS = (60, 600, 1800)
+TRANSCRIPT_TOKENS = (1000, 8000, 40000)
+MINUTES_TOKENS = (500, 2000, 8000)
+
+SAMPLE_RATE = 16000
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Percentil `q` (0-100) por el método del rango más cercano."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _current_rss() -> int:
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Fuera de Linux solo se dispone del pico del proceso completo (kB en Linux, bytes en macOS).
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RSSSampler:
+    """Muestrea la memoria residente del proceso en un hilo y guarda el máximo observado."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = _current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+
+def write_recording(path: str, seconds: float):
+    """Escribe un WAV PCM mono de 16 bits con ruido, en bloques para no ocupar memoria."""
+    frames_per_block = SAMPLE_RATE
+    block = os.urandom(frames_per_block * 2)
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        remaining = int(seconds * SAMPLE_RATE)
+        while remaining > 0:
+            count = min(remaining, frames_per_block)
+            w.writeframes(block[:count * 2])
+            remaining -= count
+
+
+def synthetic_transcript(tokens: int) -> str:
+    """Transcripción de unos `tokens` tokens con turnos de hablante de ~60 tokens."""
+    words = synthetic_text(tokens).split()
+    turns = [" ".join(words[i:i + 50]) for i in range(0, len(words), 50)]
+    return "\n\n".join(f"Hablante {i % 3}: {turn}" for i, turn in enumerate(turns))
+
+
+def synthetic_minutes(tokens: int) -> str:
+    """Acta en Markdown con encabezados, listas y negritas de unos `tokens` tokens."""
+    sections = []
+    words = synthetic_text(tokens).split()
+    for i in range(0, len(words), 120):
+        chunk = words[i:i + 120]
+        bullets = "\n".join(f"- **Punto {j + 1}:** {' '.join(chunk[j * 20:(j + 1) * 20])}" for j in range(len(chunk) // 20))
+        sections.append(f"## Sección {i // 120 + 1}\n\n{' '.join(chunk[:40])}\n\n{bullets}")
+    return "# Acta de la reunión\n\n" + "\n\n".join(sections)
+
+
+def _format_bytes(size: float) -> str:
+    return f"{size / 1024 / 1024:.2f} MB" if size >= 1024 * 1024 else f"{size / 1024:.1f} kB"
+
+
+def run_case(name: str, runs: int, action: Callable[[], None], server=None, units: float = 0.0, unit_name: str = "", warmup: int = 1) -> dict:
+    """
+    Ejecuta `action` `warmup` veces sin medir y después `runs` veces, y devuelve latencias,
+    rendimiento, pico de RSS y bytes enviados por ejecución.
+    """
+    for _ in range(warmup):
+        action()
+    if server is not None:
+        server.reset_counters()
+    latencies = []
+    with RSSSampler() as sampler:
+        start = time.perf_counter()
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            action()
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+
+    result = {
+        "runs": runs,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "throughput": runs / elapsed,
+        "peak_rss": sampler.peak,
+        "bytes_sent": server.bytes_received // runs if server is not None else 0,
+        "requests": server.requests / runs if server is not None else 0,
+    }
+    if units:
+        result["units_per_second"] = units * runs / elapsed
+        result["unit"] = unit_name
+    _print_case(name, result)
+    return result
+
+
+def _print_case(name: str, r: dict):
+    line = (
+        f"{name:<28} p50 {r['p50'] * 1000:8.1f} ms  p90 {r['p90'] * 1000:8.1f} ms  p99 {r['p99'] * 1000:8.1f} ms  "
+        f"{r['throughput']:6.2f} ops/s  RSS {r['peak_rss'] / 1024 / 1024:7.1f} MB"
+    )
+    if r["bytes_sent"]:
+        line += f"  enviados {_format_bytes(r['bytes_sent'])} ({r['requests']:.0f} pet.)"
+    if r.get("unit"):
+        line += f"  {r['units_per_second']:.1f} {r['unit']}/s"
+    print(line)
+
+
+def bench_transcribe(runs: int, deepgram: FakeDeepgramServer, workdir: str, extract_audio: bool) -> Dict[str, dict]:
+    from audio_processor import transcribe_audio
+
+    results = {}
+    for seconds in RECORDING_SECONDS:
+        path = os.path.join(workdir, f"recording_{seconds}s.wav")
+        write_recording(path, seconds)
+        results[f"transcribe/{seconds}s"] = run_case(
+            f"transcribe {seconds}s", runs,
+            lambda: transcribe_audio(path, extract_audio=extract_audio, use_cache=False),
+            server=deepgram, units=seconds / 60, unit_name="min audio",
+        )
+        os.remove(path)
+    return results
+
+
+def bench_generate(runs: int, ollama: FakeOllamaServer, model: str) -> Dict[str, dict]:
+    from config import DEFAULT_GENERATION_PARAMS
+    from llm_processor import generate_minutes
+
+    results = {}
+    for tokens in TRANSCRIPT_TOKENS:
+        transcript = synthetic_transcript(tokens)
+        results[f"generate/{tokens}tok"] = run_case(
+            f"generate {tokens} tokens", runs,
+            lambda: generate_minutes("Ollama", model, transcript, "", dict(DEFAULT_GENERATION_PARAMS), bypass_cache=True),
+            server=ollama, units=tokens / 1000, unit_name="k tokens",
+        )
+    return results
+
+
+def bench_render(runs: int, workdir: str) -> Dict[str, dict]:
+    from pdf_generator import create_meeting_minutes_pdf
+
+    results = {}
+    for tokens in MINUTES_TOKENS:
+        minutes = synthetic_minutes(tokens)
+        output = os.path.join(workdir, f"minutes_{tokens}.pdf")
+        results[f"render/{tokens}tok"] = run_case(
+            f"render {tokens} tokens", runs,
+            lambda: create_meeting_minutes_pdf(minutes, output),
+        )
+    return results
+
+
+def compare_with_baseline(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for metric in ("p50", "peak_rss", "bytes_sent"):
+            if reference.get(metric) and result[metric] > reference[metric] * tolerance:
+                regressions.append(f"{name}: {metric} {result[metric]:.4g} > {reference[metric]:.4g} x {tolerance}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline con servidores locales de Deepgram y Ollama.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--stages", default="transcribe,generate,render", help="Etapas a medir, separadas por comas.")
+    parser.add_argument("--extract-audio", action="store_true", help="Extrae la pista de audio con ffmpeg antes de subirla.")
+    parser.add_argument("--deepgram-latency", type=float, default=0.05, help="Latencia (s) de cada petición a Deepgram.")
+    parser.add_argument("--ollama-latency", type=float, default=0.02, help="Latencia (s) de cada petición a Ollama.")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0, help="Velocidad de generación del Ollama simulado.")
+    parser.add_argument("--response-tokens", type=int, default=300, help="Tokens de cada respuesta del Ollama simulado.")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Margen sobre la línea base guardada.")
+    parser.add_argument("--update-baseline", action="store_true", help="Guarda la medición actual como línea base.")
+    parser.add_argument("--output", help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+    stages = {s.strip() for s in args.stages.split(",") if s.strip()}
+
+    workdir = tempfile.mkdtemp(prefix="meeting-analyzer-bench-")
+    deepgram = FakeDeepgramServer(latency=args.deepgram_latency).start()
+    ollama = FakeOllamaServer(latency=args.ollama_latency, tokens_per_second=args.tokens_per_second,
+                              response_tokens=args.response_tokens).start()
+    try:
+        # config.py lee el entorno al importarse: hay que fijarlo antes de importar el pipeline.
+        os.environ.update({
+            "DEEPGRAM_URL": deepgram.url,
+            "DEEPGRAM_API_KEY": os.environ.get("DEEPGRAM_API_KEY", "benchmark"),
+            "OLLAMA_HOST": ollama.url,
+            "CACHE_DIR": os.path.join(workdir, "cache"),
+            "TRANSCRIPTION_CACHE_ENABLED": "0",
+            "LLM_CACHE_ENABLED": "0",
+        })
+
+        results: Dict[str, dict] = {}
+        if "transcribe" in stages:
+            results.update(bench_transcribe(args.runs, deepgram, workdir, args.extract_audio))
+        if "generate" in stages:
+            results.update(bench_generate(args.runs, ollama, ollama.models[0]))
+        if "render" in stages:
+            results.update(bench_render(args.runs, workdir))
+    finally:
+        deepgram.stop()
+        ollama.stop()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Línea base guardada en {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("Sin línea base (créela con --update-baseline); no se comprueban regresiones.")
+        return 0
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+    for regression in regressions:
+        print(f"FALLO: {regression}")
+    if not regressions:
+        print(f"OK: sin regresiones respecto a la línea base (tolerancia x{args.tolerance}).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark de arranque en frío.
+
+Mide, en intérpretes nuevos, cuánto tarda `import main` (todo lo que ocurre antes de crear
+la ventana) y comprueba que ningún SDK de proveedor se importa durante el arranque.
+Termina con código 1 si se supera el presupuesto de tiempo o si algún SDK se carga antes
+de usarse, de modo que puede ejecutarse en CI para detectar regresiones.
+
+Uso:
+    python benchmarks/bench_startup.py [--runs 7] [--budget 1.0] [--update-baseline]
+
+Si existe `benchmarks/startup_baseline.json` (creado con --update-baseline en la misma
+máquina), el presupuesto por defecto es la línea base multiplicada por --tolerance.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+# Módulos que solo deben cargarse cuando se usa su proveedor.
+LAZY_MODULES = ("openai", "anthropic", "google.generativeai", "deepgram", "ollama", "fpdf", "httpx", "tiktoken", "tokenizers", "faster_whisper", "ctranslate2", "sounddevice", "numpy")
+
+DEFAULT_BUDGET_SECONDS = 1.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def measure_import(runs: int) -> dict:
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", _PROBE],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True
+        )
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        samples.append(data["seconds"])
+        loaded.update(data["loaded"])
+    return {"median": statistics.median(samples), "max": max(samples), "loaded": sorted(loaded)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque en frío de la aplicación.")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget", type=float, default=None, help="Tiempo máximo (s) para la mediana de `import main`.")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Margen sobre la línea base guardada.")
+    parser.add_argument("--update-baseline", action="store_true", help="Guarda la medición actual como línea base.")
+    args = parser.parse_args()
+
+    result = measure_import(args.runs)
+    print(f"import main: mediana {result['median'] * 1000:.0f} ms, máximo {result['max'] * 1000:.0f} ms ({args.runs} ejecuciones)")
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"import_main_seconds": result["median"]}, f, indent=2)
+        print(f"Línea base guardada en {BASELINE_FILE}")
+        return 0
+
+    budget = args.budget
+    if budget is None and os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            budget = json.load(f)["import_main_seconds"] * args.tolerance
+    if budget is None:
+        budget = DEFAULT_BUDGET_SECONDS
+
+    failed = False
+    if result["loaded"]:
+        print(f"FALLO: se importaron SDK durante el arranque: {', '.join(result['loaded'])}")
+        failed = True
+    if result["median"] > budget:
+        print(f"FALLO: el arranque ({result['median'] * 1000:.0f} ms) supera el presupuesto de {budget * 1000:.0f} ms")
+        failed = True
+    if not failed:
+        print(f"OK: dentro del presupuesto de {budget * 1000:.0f} ms y sin SDK cargados.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+"""
+Comprobación de `async_providers.AsyncLLMGateway` contra los servidores locales de
+`fake_servers.py`, sin red ni claves.
+
+Cada escenario programa fallos o latencias en el Ollama y el OpenAI simulados y comprueba
+el comportamiento del gateway:
+- reintentos con espera exponencial ante 503 y sin reintentos ante 400;
+- respeto de `Retry-After` en un 429;
+- plazo total por petición (TimeoutError aunque el servidor siga respondiendo);
+- cadenas de respaldo por plazo agotado y por errores persistentes;
+- límite de peticiones simultáneas por proveedor.
+
+Muestra la duración de cada escenario y termina con código 1 si alguno falla.
+
+Uso:
+    python benchmarks/check_gateway.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Callable, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, REPO_DIR)
+from fake_servers import FakeOllamaServer, FakeOpenAIServer  # noqa: E402
+
+MODEL = "fake-model"
+PROMPT = "Resume la reunión."
+
+
+async def _scenarios(ollama: FakeOllamaServer, openai: FakeOpenAIServer) -> List[tuple]:
+    from async_providers import AsyncLLMGateway, FallbackStep, ProviderError, ProviderPolicy
+
+    # Esperas cortas para que la comprobación dure unos segundos; el plazo por defecto se desactiva.
+    fast = dict(max_retries=3, base_delay=0.05, max_delay=2.0, deadline=None)
+    policies = {"Ollama": ProviderPolicy(max_concurrency=2, **fast), "OpenAI": ProviderPolicy(max_concurrency=4, **fast)}
+    results = []
+
+    async def run(name: str, prepare: Callable[[], None], call, check: Callable[[object, float], Optional[str]]):
+        # Las peticiones abandonadas por un escenario anterior siguen ocupando el servidor hasta responder.
+        while ollama.in_flight or openai.in_flight:
+            await asyncio.sleep(0.05)
+        ollama.reset_counters()
+        openai.reset_counters()
+        ollama.latency = openai.latency = 0.01
+        prepare()
+        start = time.perf_counter()
+        try:
+            outcome = await call()
+        except Exception as e:
+            outcome = e
+        elapsed = time.perf_counter() - start
+        results.append((name, elapsed, check(outcome, elapsed)))
+
+    def expect(condition: bool, message: str) -> Optional[str]:
+        return None if condition else message
+
+    async with AsyncLLMGateway(policies) as gateway:
+        await run(
+            "reintento/503",
+            lambda: ollama.fail_next(2, status=503),
+            lambda: gateway.generate("Ollama", MODEL, PROMPT),
+            lambda out, t: expect(isinstance(out, str) and ollama.requests == 3,
+                                  f"se esperaba respuesta tras 3 peticiones: {out!r}, {ollama.requests} peticiones"),
+        )
+        await run(
+            "agotados/503",
+            lambda: ollama.fail_next(10, status=503),
+            lambda: gateway.generate("Ollama", MODEL, PROMPT),
+            lambda out, t: expect(isinstance(out, ProviderError) and out.status_code == 503 and ollama.requests == 4,
+                                  f"se esperaba ProviderError 503 tras 4 peticiones: {out!r}, {ollama.requests} peticiones"),
+        )
+        await run(
+            "sin reintento/400",
+            lambda: openai.fail_next(1, status=400),
+            lambda: gateway.generate("OpenAI", MODEL, PROMPT),
+            lambda out, t: expect(isinstance(out, ProviderError) and not out.retryable and openai.requests == 1,
+                                  f"se esperaba un único intento: {out!r}, {openai.requests} peticiones"),
+        )
+        await run(
+            "retry-after/429",
+            lambda: openai.fail_next(1, status=429, retry_after=1),
+            lambda: gateway.generate("OpenAI", MODEL, PROMPT),
+            lambda out, t: expect(isinstance(out, str) and openai.requests == 2 and 1.0 <= t < 1.8,
+                                  f"se esperaba esperar ~1 s (Retry-After): {out!r} en {t:.2f}s"),
+        )
+        await run(
+            "plazo",
+            lambda: setattr(ollama, "latency", 2.0),
+            lambda: gateway.generate("Ollama", MODEL, PROMPT, deadline=0.3),
+            lambda out, t: expect(isinstance(out, TimeoutError) and t < 0.6,
+                                  f"se esperaba TimeoutError a los 0.3 s: {out!r} en {t:.2f}s"),
+        )
+        await run(
+            "respaldo/plazo",
+            lambda: setattr(ollama, "latency", 2.0),
+            lambda: gateway.generate_with_fallback([FallbackStep("Ollama", MODEL, 0.3), FallbackStep("OpenAI", MODEL)], PROMPT),
+            lambda out, t: expect(isinstance(out, tuple) and out[1].provider == "OpenAI" and t < 0.8,
+                                  f"se esperaba la respuesta de OpenAI antes de 0.8 s: {out!r} en {t:.2f}s"),
+        )
+        await run(
+            "respaldo/errores",
+            lambda: ollama.fail_next(10, status=503),
+            lambda: gateway.generate_with_fallback([FallbackStep("Ollama", MODEL), FallbackStep("OpenAI", MODEL)], PROMPT),
+            lambda out, t: expect(isinstance(out, tuple) and out[1].provider == "OpenAI" and ollama.requests == 4,
+                                  f"se esperaba OpenAI tras agotar los reintentos de Ollama: {out!r}"),
+        )
+        await run(
+            "concurrencia",
+            lambda: setattr(ollama, "latency", 0.2),
+            lambda: gateway.generate_many("Ollama", MODEL, [PROMPT] * 8),
+            lambda out, t: expect(isinstance(out, list) and ollama.max_in_flight == 2 and t >= 0.8,
+                                  f"se esperaban como máximo 2 peticiones simultáneas: {ollama.max_in_flight} en {t:.2f}s"),
+        )
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reintentos, plazos y respaldos del gateway asíncrono contra servidores simulados.")
+    parser.parse_args(argv)
+
+    with FakeOllamaServer(tokens_per_second=0, response_tokens=20) as ollama, FakeOpenAIServer(response_tokens=20) as openai:
+        # Se fijan antes de importar config/async_providers, que leen OLLAMA_HOST al importarse.
+        os.environ.update({
+            "OLLAMA_HOST": ollama.url,
+            "OPENAI_BASE_URL": openai.base_url,
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+        })
+        results = asyncio.run(_scenarios(ollama, openai))
+
+    failures = 0
+    for name, elapsed, error in results:
+        failures += error is not None
+        print(f"{'OK ' if error is None else 'ERROR'} {name:<20} {elapsed * 1000:7.0f} ms" + (f"  {error}" if error else ""))
+    if failures:
+        print(f"ERROR: {failures} escenario(s) del gateway no se comportan como se esperaba.")
+        return 1
+    print("OK: reintentos, Retry-After, plazos, respaldos y concurrencia del gateway.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""
+Comprobación de regresión de la caché de fuentes de `pdf_generator.py`.
+
+`_add_fonts` reutiliza la fuente ya analizada copiando un objeto interno de fpdf2 en lugar
+de llamar a `add_font`. Este script exporta varias actas de las dos formas (con la misma
+fecha de creación) y falla si los PDF no son idénticos byte a byte. Debe pasar antes de
+ampliar el rango de fpdf2 en requirements.txt y FONT_CACHE_FPDF_VERSIONS.
+
+Uso:
+    python benchmarks/check_pdf_render.py
+"""
+import argparse
+import datetime
+import hashlib
+import os
+import sys
+from typing import List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, REPO_DIR)
+
+_CREATION_DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+SAMPLES = {
+    "breve": "# Acta de Reunión\n\nSin temas tratados.\n",
+    "completa": (
+        "# Acta de Reunión: Revisión del Presupuesto\n\n"
+        "**Fecha:** 2024-05-03\n\n"
+        "## Participantes\n"
+        "* **Ana García** - Finanzas\n"
+        "* **Íñigo Núñez** - Ingeniería\n\n"
+        "## Decisiones Clave\n"
+        "1. Se aprueba la migración con un coste de 12.000 € (acordado por **Ana**).\n"
+        "2. Se pospone la auditoría a __junio__.\n\n"
+        "---\n\n"
+        "## Tareas Pendientes\n"
+        "- Preparar el informe — Responsable: **Íñigo** — Fecha límite: 2024-05-20\n"
+        "    - Revisar «riesgos» y dependencias\n"
+    ),
+    "larga": "# Acta extensa\n\n" + "\n".join(
+        f"* Punto {i}: se comentó la señalización, el año fiscal y la logística de la reunión ¿ok?" for i in range(400)
+    ),
+}
+
+
+def render(markdown_text: str, cached: bool) -> bytes:
+    import pdf_generator
+
+    pdf = pdf_generator._pdf_class()()
+    pdf.set_creation_date(_CREATION_DATE)
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf_generator._add_fonts(pdf, cached=cached)
+    pdf.set_font(pdf_generator.FONT_FAMILY, '', pdf_generator.BODY_FONT_SIZE)
+    pdf_generator._write_markdown(pdf, markdown_text)
+    return bytes(pdf.output())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compara los PDF exportados con y sin la caché de fuentes.")
+    parser.parse_args(argv)
+
+    import fpdf
+    import pdf_generator
+
+    if not pdf_generator._font_cache_supported():
+        print(f"AVISO: fpdf2 {fpdf.FPDF_VERSION} está fuera de FONT_CACHE_FPDF_VERSIONS; se compara igualmente.")
+        pdf_generator._font_cache_supported = lambda: True
+
+    failures = 0
+    # Dos vueltas: la segunda reutiliza las fuentes ya analizadas por la primera.
+    for round_number in (1, 2):
+        for name, markdown_text in SAMPLES.items():
+            expected, actual = render(markdown_text, cached=False), render(markdown_text, cached=True)
+            same = expected == actual
+            failures += not same
+            print(f"{'OK ' if same else 'ERROR'} vuelta {round_number} {name:<9} {len(actual) / 1024:7.1f} KB "
+                  f"{hashlib.sha256(actual).hexdigest()[:12]}" + ("" if same else f" != {hashlib.sha256(expected).hexdigest()[:12]}"))
+
+    if failures:
+        print(f"ERROR: {failures} PDF distintos con fpdf2 {fpdf.FPDF_VERSION}: la caché de fuentes no es válida para esta versión.")
+        return 1
+    print(f"OK: la caché de fuentes produce los mismos PDF que add_font con fpdf2 {fpdf.FPDF_VERSION}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
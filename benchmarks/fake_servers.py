@@ -0,0 +1,339 @@
+"""
+Servidores HTTP locales que imitan a Deepgram y a Ollama para los benchmarks.
+
+- `FakeDeepgramServer` responde a `POST /v1/listen` con una transcripción sintética cuyo
+  tamaño es proporcional al audio recibido (unas `words_per_second` palabras por segundo).
+- `FakeOllamaServer` responde a `GET /api/tags` y a `POST /api/generate` (con y sin
+  streaming), generando `response_tokens` tokens a `tokens_per_second`. Con
+  `prefill_tokens_per_second`, antes del primer token espera lo que tardaría en procesar
+  el prompt (~4 caracteres por token), como hace un modelo local.
+
+- `FakeOpenAIServer` responde a `POST /v1/chat/completions` (sin streaming).
+
+Todos aceptan una latencia fija por petición y cuentan las peticiones, los bytes recibidos
+y el máximo de peticiones simultáneas, de modo que el benchmark puede medir cuánto envía el
+cliente. Con `fail_next` las siguientes peticiones POST responden con un error HTTP (y
+opcionalmente `Retry-After`), para probar reintentos y cadenas de respaldo. Se ejecutan en
+un hilo en segundo plano y se usan como gestores de contexto:
+
+    with FakeOllamaServer(tokens_per_second=200) as ollama:
+        os.environ["OLLAMA_HOST"] = ollama.url
+"""
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# Vocabulario con el que se construyen las transcripciones y respuestas sintéticas.
+_WORDS = (
+    "el proyecto la reunión presupuesto equipo cliente entrega revisar acuerdo "
+    "tarea plazo semana informe datos propuesta riesgo próximo responsable"
+).split()
+
+
+def synthetic_text(tokens: int) -> str:
+    """Texto de relleno de aproximadamente `tokens` tokens (~4 caracteres por token)."""
+    words = []
+    chars = 0
+    index = 0
+    while chars < tokens * 4:
+        word = _WORDS[index % len(_WORDS)]
+        words.append(word)
+        chars += len(word) + 1
+        index += 1
+    return " ".join(words)
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Un cliente que abandona la petición (plazo agotado, cancelación) no es un error del servidor.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class _FakeServer:
+    """Base común: servidor en un hilo, latencia configurable y contadores."""
+
+    # Si es False, el cuerpo de las peticiones se cuenta y se descarta según llega: el
+    # servidor comparte proceso con el muestreo de memoria de bench_pipeline y no debe
+    # sumar el tamaño del audio subido al pico de RSS.
+    keep_body = True
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        self.bytes_received = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures: deque = deque()
+        self._counter_lock = threading.Lock()
+        self._httpd = _QuietHTTPServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_counters(self):
+        with self._counter_lock:
+            self.requests = 0
+            self.bytes_received = 0
+            self.max_in_flight = 0
+            self._failures.clear()
+
+    def fail_next(self, count: int = 1, status: int = 503, retry_after: Optional[float] = None):
+        """Las siguientes `count` peticiones POST responden `status` (con `Retry-After` si se indica)."""
+        with self._counter_lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def _next_failure(self) -> Optional[tuple]:
+        with self._counter_lock:
+            return self._failures.popleft() if self._failures else None
+
+    def _enter(self, delta: int):
+        with self._counter_lock:
+            self.in_flight += delta
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _count(self, received: int):
+        with self._counter_lock:
+            self.requests += 1
+            self.bytes_received += received
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _read(self, size: int, parts: list) -> int:
+                remaining = size
+                while remaining > 0:
+                    block = self.rfile.read(min(remaining, 64 * 1024))
+                    if not block:
+                        break
+                    remaining -= len(block)
+                    if server.keep_body:
+                        parts.append(block)
+                return size - remaining
+
+            def read_body(self) -> bytes:
+                """Lee el cuerpo y deja su tamaño en `body_size`; sin `keep_body` devuelve b""."""
+                parts = []
+                received = 0
+                # El SDK de Deepgram envía el audio con codificación chunked.
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            break
+                        received += self._read(size, parts)
+                        self.rfile.readline()
+                else:
+                    received = self._read(int(self.headers.get("Content-Length", 0)), parts)
+                self.body_size = received
+                server._count(received)
+                return b"".join(parts)
+
+            def send_json(self, payload: dict, status: int = 200, headers: Optional[dict] = None):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                server._count(0)
+                server.handle_get(self)
+
+            def do_POST(self):
+                body = self.read_body()
+                server._enter(1)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    failure = server._next_failure()
+                    if failure is not None:
+                        status, retry_after = failure
+                        headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else None
+                        self.send_json({"error": f"Fallo simulado ({status})"}, status=status, headers=headers)
+                        return
+                    server.handle_post(self, body)
+                finally:
+                    server._enter(-1)
+
+        return Handler
+
+    def handle_get(self, handler):
+        handler.send_json({"error": "not found"}, status=404)
+
+    def handle_post(self, handler, body: bytes):
+        handler.send_json({"error": "not found"}, status=404)
+
+
+class FakeDeepgramServer(_FakeServer):
+    """
+    Imita el endpoint de audio pregrabado de Deepgram. La duración del audio se estima
+    con `bytes_per_second` (por defecto, WAV PCM mono de 16 bits a 16 kHz); el audio en
+    sí se descarta según llega.
+    """
+
+    keep_body = False
+
+    def __init__(self, latency: float = 0.05, words_per_second: float = 2.5,
+                 bytes_per_second: int = 32000, **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.words_per_second = words_per_second
+        self.bytes_per_second = bytes_per_second
+
+    def handle_post(self, handler, body: bytes):
+        if not handler.path.startswith("/v1/listen"):
+            return super().handle_post(handler, body)
+        duration = handler.body_size / self.bytes_per_second
+        handler.send_json(self.build_response(duration))
+
+    def build_response(self, duration: float) -> dict:
+        count = max(1, int(duration * self.words_per_second))
+        step = duration / count if count else 0.0
+        words = []
+        for i in range(count):
+            word = _WORDS[i % len(_WORDS)]
+            words.append({
+                "word": word,
+                "punctuated_word": word,
+                "start": round(i * step, 3),
+                "end": round((i + 0.8) * step, 3),
+                "confidence": 0.99,
+                "speaker": (i // 40) % 2,
+            })
+        transcript = " ".join(w["word"] for w in words)
+        return {
+            "metadata": {
+                "transaction_key": "deprecated",
+                "request_id": "00000000-0000-0000-0000-000000000000",
+                "sha256": "",
+                "created": "2024-01-01T00:00:00.000Z",
+                "duration": duration,
+                "channels": 1,
+                "models": ["fake"],
+                "model_info": {"fake": {"name": "fake", "version": "0", "arch": "fake"}},
+            },
+            "results": {
+                "channels": [{"alternatives": [{"transcript": transcript, "confidence": 0.99, "words": words}]}],
+            },
+        }
+
+
+class FakeOllamaServer(_FakeServer):
+    """Imita `/api/tags` y `/api/generate` de Ollama con una velocidad de generación fija."""
+
+    def __init__(self, latency: float = 0.02, tokens_per_second: float = 400.0,
+                 response_tokens: int = 300, models=("fake-model",), prefill_tokens_per_second: float = 0.0, **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.response_tokens = response_tokens
+        self.models = list(models)
+
+    def handle_get(self, handler):
+        if handler.path != "/api/tags":
+            return super().handle_get(handler)
+        handler.send_json({"models": [
+            {"name": name, "model": name, "modified_at": "2024-01-01T00:00:00Z", "size": 0, "digest": "", "details": {}}
+            for name in self.models
+        ]})
+
+    def handle_post(self, handler, body: bytes):
+        if handler.path != "/api/generate":
+            return super().handle_post(handler, body)
+        request = json.loads(body or b"{}")
+        model = request.get("model", "")
+        if not request.get("prompt"):
+            # Un prompt vacío solo carga el modelo (ver client_registry.warm_up_ollama_model).
+            return handler.send_json({"model": model, "response": "", "done": True})
+
+        prompt_tokens = len(request["prompt"]) // 4 + 1
+        if self.prefill_tokens_per_second:
+            time.sleep(prompt_tokens / self.prefill_tokens_per_second)
+
+        tokens = synthetic_text(self.response_tokens).split()
+        counts = {"prompt_eval_count": prompt_tokens, "eval_count": len(tokens)}
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        if not request.get("stream", True):
+            time.sleep(delay * len(tokens))
+            return handler.send_json({"model": model, "response": "## Acta\n\n" + " ".join(tokens), "done": True, **counts})
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def write_chunk(payload: dict):
+            data = (json.dumps(payload) + "\n").encode('utf-8')
+            handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            handler.wfile.flush()
+
+        write_chunk({"model": model, "response": "## Acta\n\n", "done": False})
+        for token in tokens:
+            time.sleep(delay)
+            write_chunk({"model": model, "response": token + " ", "done": False})
+        write_chunk({"model": model, "response": "", "done": True, **counts})
+        handler.wfile.write(b"0\r\n\r\n")
+
+
+class FakeOpenAIServer(_FakeServer):
+    """Imita `POST /v1/chat/completions` de la API de OpenAI (sin streaming)."""
+
+    def __init__(self, latency: float = 0.02, response_tokens: int = 300, **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.response_tokens = response_tokens
+
+    @property
+    def base_url(self) -> str:
+        """Valor de OPENAI_BASE_URL para dirigir el SDK a este servidor."""
+        return f"{self.url}/v1"
+
+    def handle_post(self, handler, body: bytes):
+        if handler.path != "/v1/chat/completions":
+            return super().handle_post(handler, body)
+        request = json.loads(body or b"{}")
+        text = "## Acta\n\n" + synthetic_text(self.response_tokens)
+        handler.send_json({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", ""),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": self.response_tokens, "total_tokens": self.response_tokens},
+        })
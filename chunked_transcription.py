@@ -0,0 +1,249 @@
+"""
+Transcripción en paralelo de grabaciones largas.
+
+El audio se divide en segmentos solapados (cortando preferentemente en silencios), los
+segmentos se transcriben a la vez y el resultado se une de nuevo: los solapes se
+eliminan por tiempo y las etiquetas de hablante de cada segmento se traducen a
+etiquetas globales comparando las palabras que ambos segmentos reconocieron en el solape.
+"""
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from audio_processor import (
+    cached_transcription,
+    extract_audio_track,
+    transcription_cache_key,
+)
+from config import (
+    CHUNKED_MAX_RETRIES,
+    CHUNKED_OVERLAP_SECONDS,
+    CHUNKED_SEGMENT_SECONDS,
+    CHUNKED_WORKERS,
+    SILENCE_MIN_SECONDS,
+    SILENCE_NOISE_DB,
+)
+from transcript import Transcript
+from transcription_backends import TranscriptionBackend, get_backend
+from utils import hash_file, probe_duration
+
+logger = logging.getLogger(__name__)
+
+# Tolerancia (segundos) para considerar que dos palabras del solape son la misma.
+_MATCH_TOLERANCE = 0.3
+
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*([\d.]+)")
+
+
+@dataclass
+class Segment:
+    """Fragmento de audio. `core_*` es el tramo del que es responsable; `cut_*` incluye el solape."""
+    index: int
+    core_start: float
+    core_end: float
+    cut_start: float
+    cut_end: float
+
+
+def detect_silences(file_path: str, noise_db: float = SILENCE_NOISE_DB, min_seconds: float = SILENCE_MIN_SECONDS) -> List[Tuple[float, float]]:
+    """Devuelve los intervalos de silencio (inicio, fin) detectados por el filtro silencedetect de ffmpeg."""
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("ffmpeg no está instalado o no se encuentra en el PATH.")
+
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-vn", "-i", file_path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_seconds}",
+        "-f", "null", "-",
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg no pudo analizar los silencios de {file_path}: {result.stderr.strip()[-500:]}")
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        match = _SILENCE_START_RE.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = _SILENCE_END_RE.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def plan_segments(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    segment_seconds: float = CHUNKED_SEGMENT_SECONDS,
+    overlap_seconds: float = CHUNKED_OVERLAP_SECONDS,
+) -> List[Segment]:
+    """
+    Divide `duration` segundos en tramos de unos `segment_seconds`. Cada corte se desplaza
+    al centro del silencio más cercano dentro de una ventana del 20 % del tramo y cada
+    segmento se amplía `overlap_seconds` por ambos lados.
+    """
+    window = segment_seconds * 0.2
+    midpoints = [(start + end) / 2 for start, end in silences]
+
+    cuts = []
+    position = 0.0
+    while duration - position > segment_seconds + window:
+        target = position + segment_seconds
+        candidates = [m for m in midpoints if abs(m - target) <= window and m > position]
+        cut = min(candidates, key=lambda m: abs(m - target)) if candidates else target
+        cuts.append(cut)
+        position = cut
+
+    bounds = [0.0] + cuts + [duration]
+    return [
+        Segment(
+            index=i,
+            core_start=bounds[i],
+            core_end=bounds[i + 1],
+            cut_start=max(0.0, bounds[i] - overlap_seconds),
+            cut_end=min(duration, bounds[i + 1] + overlap_seconds),
+        )
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def _request_segment(file_path: str, segment: Segment, engine: TranscriptionBackend) -> dict:
+    segment_path = extract_audio_track(file_path, start=segment.cut_start, duration=segment.cut_end - segment.cut_start)
+    try:
+        return engine.transcribe(segment_path)
+    finally:
+        os.remove(segment_path)
+
+
+def _transcribe_segment(file_path: str, segment: Segment, max_retries: int, audio_hash: str, engine: TranscriptionBackend) -> List[dict]:
+    """
+    Extrae y transcribe un segmento, reintentando solo ese segmento si falla.
+    Cada segmento se guarda en la caché por separado, así que repetir un archivo que
+    falló a medias solo vuelve a pedir los segmentos que faltaban.
+    """
+    key = transcription_cache_key(audio_hash, engine.name, segment=[round(segment.cut_start, 3), round(segment.cut_end, 3)])
+    for attempt in range(max_retries + 1):
+        try:
+            response = cached_transcription(key, lambda: _request_segment(file_path, segment, engine))
+            return response["results"]["channels"][0]["alternatives"][0].get("words", [])
+        except Exception as e:
+            if attempt == max_retries:
+                raise RuntimeError(f"El segmento {segment.index} falló tras {max_retries + 1} intentos: {e}")
+            logger.warning(f"Segmento {segment.index} falló ({e}). Reintentando...")
+            time.sleep(2 ** attempt)
+
+
+def _normalize(word: dict) -> str:
+    return word.get("word", "").lower()
+
+
+def _match_speakers(previous: List[dict], current: List[dict], overlap_start: float, overlap_end: float) -> Dict[int, int]:
+    """
+    Relaciona los hablantes locales de `current` con los globales de `previous` votando
+    con las palabras que ambos segmentos reconocieron en el solape.
+    """
+    previous_overlap = [w for w in previous if overlap_start <= w["start"] < overlap_end and w.get("speaker") is not None]
+    current_overlap = [w for w in current if overlap_start <= w["start"] < overlap_end and w.get("speaker") is not None]
+
+    votes: Counter = Counter()
+    for word in current_overlap:
+        for candidate in previous_overlap:
+            if _normalize(candidate) == _normalize(word) and abs(candidate["start"] - word["start"]) <= _MATCH_TOLERANCE:
+                votes[(word["speaker"], candidate["speaker"])] += 1
+                break
+
+    mapping: Dict[int, int] = {}
+    used = set()
+    for (local, global_speaker), _ in votes.most_common():
+        if local not in mapping and global_speaker not in used:
+            mapping[local] = global_speaker
+            used.add(global_speaker)
+    return mapping
+
+
+def stitch_segments(segments: List[Segment], segment_words: List[List[dict]]) -> List[dict]:
+    """
+    Une las palabras de cada segmento en una única lista con tiempos absolutos.
+    De cada segmento solo se conservan las palabras cuyo punto medio cae en su tramo
+    `core`, lo que elimina los duplicados del solape.
+    """
+    stitched = []
+    previous: List[dict] = []
+    previous_cut_end = 0.0
+    next_speaker = 0
+
+    for segment, words in zip(segments, segment_words):
+        absolute = [dict(w, start=w["start"] + segment.cut_start, end=w["end"] + segment.cut_start) for w in words]
+
+        mapping = _match_speakers(previous, absolute, segment.cut_start, previous_cut_end) if previous else {}
+        for local in sorted({w["speaker"] for w in absolute if w.get("speaker") is not None}):
+            if local not in mapping:
+                mapping[local] = next_speaker
+                next_speaker += 1
+        for word in absolute:
+            if word.get("speaker") is not None:
+                word["speaker"] = mapping[word["speaker"]]
+
+        stitched.extend(w for w in absolute if segment.core_start <= (w["start"] + w["end"]) / 2 < segment.core_end)
+        previous = absolute
+        previous_cut_end = segment.cut_end
+
+    return stitched
+
+
+def render_words(words: List[dict]) -> str:
+    """Convierte la lista de palabras en texto con un párrafo por turno de hablante."""
+    return Transcript.from_words(words).render()
+
+
+def transcribe_transcript_chunked(
+    file_path: str,
+    segment_seconds: float = CHUNKED_SEGMENT_SECONDS,
+    overlap_seconds: float = CHUNKED_OVERLAP_SECONDS,
+    workers: int = CHUNKED_WORKERS,
+    max_retries: int = CHUNKED_MAX_RETRIES,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    backend: Optional[str] = None,
+) -> Transcript:
+    """
+    Transcribe un archivo largo dividiéndolo en segmentos que se envían en paralelo al motor
+    `backend` (por defecto, TRANSCRIPTION_BACKEND).
+    Devuelve un `Transcript` con tiempos absolutos y etiquetas de hablante coherentes en todo el archivo.
+    `on_progress(completados, total)` se invoca cada vez que termina un segmento.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"El archivo no existe: {file_path}")
+
+    duration = probe_duration(file_path)
+    if duration <= 0:
+        raise RuntimeError(f"No se pudo determinar la duración de {file_path} (¿está instalado ffprobe?).")
+
+    engine = get_backend(backend)
+    audio_hash = hash_file(file_path)
+    segments = plan_segments(duration, detect_silences(file_path), segment_seconds, overlap_seconds)
+    logger.info("%s dividido en %d segmento(s).", os.path.basename(file_path), len(segments))
+
+    results: List[Optional[List[dict]]] = [None] * len(segments)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment") as pool:
+        futures = {pool.submit(_transcribe_segment, file_path, segment, max_retries, audio_hash, engine): segment for segment in segments}
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future].index] = future.result()
+            if on_progress is not None:
+                on_progress(done, len(segments))
+
+    return Transcript.from_words(stitch_segments(segments, results))
+
+
+def transcribe_audio_chunked(file_path: str, **kwargs) -> str:
+    """Como `transcribe_transcript_chunked`, pero devuelve el texto con etiquetas de hablante."""
+    return transcribe_transcript_chunked(file_path, **kwargs).render()
@@ -0,0 +1,156 @@
+"""
+Registro de clientes de los proveedores, compartidos por todo el proceso.
+
+Cada cliente se crea la primera vez que se pide y se reutiliza después, de modo que sus
+conexiones HTTP (TLS y keep-alive) sobreviven entre peticiones. Los clientes de OpenAI,
+Anthropic y Ollama se basan en `httpx.Client`, que es seguro entre hilos, así que pueden
+usarse a la vez desde los hilos de trabajo de la GUI y del modo por lotes.
+
+Los SDK se importan dentro de cada función, la primera vez que se usa su proveedor:
+importarlos todos al arrancar costaba varios segundos antes de mostrar la ventana.
+"""
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, TypeVar
+
+from dotenv import load_dotenv
+
+from config import DEEPGRAM_URL, OLLAMA_HOST, OLLAMA_KEEP_ALIVE
+
+if TYPE_CHECKING:
+    import anthropic
+    import google.generativeai as genai
+    import ollama
+    import openai
+    from deepgram import DeepgramClient
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+load_dotenv()
+
+T = TypeVar("T")
+
+_clients: Dict[Hashable, object] = {}
+_key_locks: Dict[Hashable, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def _get_or_create(key: Hashable, factory: Callable[[], T]) -> T:
+    # `_lock` solo protege los diccionarios. El cliente se crea con el cerrojo de su clave:
+    # cargar un modelo de Whisper puede tardar minutos y no debe bloquear a los demás proveedores.
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        with _lock:
+            client = _clients.get(key)
+        if client is None:
+            client = factory()
+            with _lock:
+                _clients[key] = client
+        return client
+
+
+def _require_key(name: str) -> str:
+    api_key = os.getenv(name)
+    if not api_key:
+        raise ValueError(f"La clave {name} no se encontró en el archivo .env")
+    return api_key
+
+
+def get_openai_client() -> "openai.OpenAI":
+    import openai
+
+    api_key = _require_key("OPENAI_API_KEY")
+    return _get_or_create(("openai", api_key), lambda: openai.OpenAI(api_key=api_key))
+
+
+def get_anthropic_client() -> "anthropic.Anthropic":
+    import anthropic
+
+    api_key = _require_key("ANTHROPIC_API_KEY")
+    return _get_or_create(("anthropic", api_key), lambda: anthropic.Anthropic(api_key=api_key))
+
+
+def get_google_model(model: str) -> "genai.GenerativeModel":
+    import google.generativeai as genai
+
+    api_key = _require_key("GOOGLE_API_KEY")
+
+    def create() -> "genai.GenerativeModel":
+        # genai.configure es global al proceso: solo se llama al crear el modelo, no en cada petición.
+        # GOOGLE_API_ENDPOINT permite apuntar a otro servidor (p. ej. uno de pruebas) por REST.
+        endpoint = os.getenv("GOOGLE_API_ENDPOINT")
+        if endpoint:
+            genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+        else:
+            genai.configure(api_key=api_key)
+        return genai.GenerativeModel(model)
+
+    return _get_or_create(("google", api_key, model), create)
+
+
+def get_deepgram_client() -> "DeepgramClient":
+    from deepgram import DeepgramClient
+
+    # Cuando no hay DEEPGRAM_API_KEY se mantiene el mensaje de error que usaba audio_processor.
+    api_key = os.getenv("DEEPGRAM_API_KEY")
+    if not api_key:
+        raise ValueError("No se encontró la DEEPGRAM_API_KEY en el archivo .env")
+    def create() -> "DeepgramClient":
+        if DEEPGRAM_URL:
+            # Permite dirigir las peticiones a otro servidor (p. ej. el de benchmarks/fake_servers.py).
+            from deepgram import DeepgramClientOptions
+            return DeepgramClient(api_key, DeepgramClientOptions(url=DEEPGRAM_URL))
+        return DeepgramClient(api_key)
+
+    return _get_or_create(("deepgram", api_key, DEEPGRAM_URL), create)
+
+
+def get_ollama_client(host: str = OLLAMA_HOST) -> "ollama.Client":
+    import ollama
+
+    return _get_or_create(("ollama", host), lambda: ollama.Client(host=host))
+
+
+def warm_up_ollama_model(model_name: str, keep_alive: str = OLLAMA_KEEP_ALIVE, host: str = OLLAMA_HOST):
+    """
+    Carga el modelo en memoria de Ollama sin generar texto (un prompt vacío solo carga el
+    modelo) y lo mantiene residente durante `keep_alive`, para que la primera generación
+    real no pague el tiempo de carga.
+    """
+    get_ollama_client(host).generate(model=model_name, prompt="", keep_alive=keep_alive)
+
+
+def get_whisper_model(model: str, compute_type: str, cpu_threads: int, download_root: str) -> "WhisperModel":
+    """
+    Devuelve el modelo de Whisper residente del proceso. Cargarlo (y descargarlo la primera
+    vez a `download_root`) cuesta segundos: se hace una vez y se reutiliza en cada trabajo.
+    """
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise RuntimeError("El motor Whisper local necesita faster-whisper: pip install -r requirements-whisper.txt")
+
+    return _get_or_create(
+        ("whisper", model, compute_type, cpu_threads, download_root),
+        lambda: WhisperModel(model, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads, download_root=download_root),
+    )
+
+
+def get_whisper_pipeline(model: str, compute_type: str, cpu_threads: int, download_root: str) -> "BatchedInferencePipeline":
+    """Decodificador por lotes sobre el modelo residente de `get_whisper_model`."""
+    whisper_model = get_whisper_model(model, compute_type, cpu_threads, download_root)
+    from faster_whisper import BatchedInferencePipeline
+
+    return _get_or_create(
+        ("whisper-batched", model, compute_type, cpu_threads, download_root),
+        lambda: BatchedInferencePipeline(model=whisper_model),
+    )
+
+
+def reset_clients():
+    """Descarta todos los clientes (por ejemplo, tras cambiar las claves del .env)."""
+    with _lock:
+        _clients.clear()
@@ -0,0 +1,153 @@
+import os
+
+# --- Ollama ---
+OLLAMA_HOST = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
+# Tiempo que Ollama mantiene el modelo cargado tras cada petición (formato de Ollama: "30m", "1h", "-1").
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# --- Parámetros de generación por defecto (compartidos por la GUI y el modo por lotes) ---
+DEFAULT_GENERATION_PARAMS = {"temperature": 0.5, "num_predict": 8192, "num_ctx": 16384}
+
+# --- Extensiones de audio/video aceptadas ---
+AUDIO_EXTENSIONS = (".mp4", ".mp3", ".wav", ".m4a")
+
+# --- Procesamiento por lotes ---
+# Número de trabajadores de cada etapa del pipeline. La generación con Ollama local
+# suele estar limitada por la GPU, por eso su valor por defecto es 1.
+BATCH_TRANSCRIBE_WORKERS = int(os.environ.get("BATCH_TRANSCRIBE_WORKERS", "4"))
+BATCH_GENERATE_WORKERS = int(os.environ.get("BATCH_GENERATE_WORKERS", "1"))
+BATCH_RENDER_WORKERS = int(os.environ.get("BATCH_RENDER_WORKERS", "2"))
+
+# --- Transcripción (Deepgram) ---
+# Extraer solo la pista de audio con ffmpeg y recodificarla (Opus, mono, 16 kHz) antes de subirla.
+AUDIO_EXTRACTION_ENABLED = os.environ.get("AUDIO_EXTRACTION_ENABLED", "1") == "1"
+AUDIO_EXTRACTION_SAMPLE_RATE = int(os.environ.get("AUDIO_EXTRACTION_SAMPLE_RATE", "16000"))
+AUDIO_EXTRACTION_BITRATE = os.environ.get("AUDIO_EXTRACTION_BITRATE", "24k")
+# Tamaño de cada bloque leído del disco durante la subida en streaming.
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+# URL base de la API de Deepgram; vacía para usar la oficial.
+DEEPGRAM_URL = os.environ.get("DEEPGRAM_URL", "")
+# Tiempo máximo (segundos) de la petición a Deepgram; la subida de archivos largos supera los 30 s del SDK.
+DEEPGRAM_TIMEOUT = float(os.environ.get("DEEPGRAM_TIMEOUT", "900"))
+
+# --- Transcripción por segmentos en paralelo ---
+CHUNKED_SEGMENT_SECONDS = float(os.environ.get("CHUNKED_SEGMENT_SECONDS", "600"))
+CHUNKED_OVERLAP_SECONDS = float(os.environ.get("CHUNKED_OVERLAP_SECONDS", "5"))
+CHUNKED_WORKERS = int(os.environ.get("CHUNKED_WORKERS", "4"))
+CHUNKED_MAX_RETRIES = int(os.environ.get("CHUNKED_MAX_RETRIES", "3"))
+# Umbral de ruido (dB) y duración mínima (s) para detectar silencios donde cortar.
+SILENCE_NOISE_DB = float(os.environ.get("SILENCE_NOISE_DB", "-30"))
+SILENCE_MIN_SECONDS = float(os.environ.get("SILENCE_MIN_SECONDS", "0.5"))
+
+# --- Motor de transcripción (transcription_backends.py) ---
+# "deepgram" (API) o "whisper" (local, sin red: el audio no sale del equipo).
+TRANSCRIPTION_BACKEND = os.environ.get("TRANSCRIPTION_BACKEND", "deepgram")
+# Modelo de faster-whisper (tiny, base, small, medium, large-v3...) o ruta a un modelo convertido.
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "small")
+# int8 reduce la memoria a la mitad y acelera la CPU; "float32" para la máxima precisión.
+WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_LANGUAGE = os.environ.get("WHISPER_LANGUAGE", "es")
+# Detección de voz (VAD): los silencios no se decodifican.
+WHISPER_VAD = os.environ.get("WHISPER_VAD", "1") == "1"
+# Fragmentos de voz que se decodifican a la vez (1 = secuencial).
+WHISPER_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "8"))
+WHISPER_CPU_THREADS = int(os.environ.get("WHISPER_CPU_THREADS", str(os.cpu_count() or 4)))
+WHISPER_BEAM_SIZE = int(os.environ.get("WHISPER_BEAM_SIZE", "5"))
+
+# --- Transcripción en vivo (live_transcription.py) ---
+# Motor en vivo: "deepgram" (websocket) o "whisper" (local, por ventanas de audio).
+LIVE_BACKEND = os.environ.get("LIVE_BACKEND", TRANSCRIPTION_BACKEND)
+# Cada cuántos segundos se actualiza el borrador del acta con lo nuevo de la transcripción.
+LIVE_DRAFT_INTERVAL_SECONDS = float(os.environ.get("LIVE_DRAFT_INTERVAL_SECONDS", "90"))
+# Audio del micrófono: PCM de 16 bits mono a esta frecuencia.
+LIVE_SAMPLE_RATE = int(os.environ.get("LIVE_SAMPLE_RATE", "16000"))
+# Una grabación en curso se da por terminada cuando deja de crecer durante este tiempo.
+LIVE_FILE_IDLE_SECONDS = float(os.environ.get("LIVE_FILE_IDLE_SECONDS", "15"))
+# Segundos de audio que el motor Whisper transcribe de una vez en vivo.
+LIVE_WHISPER_WINDOW_SECONDS = float(os.environ.get("LIVE_WHISPER_WINDOW_SECONDS", "10"))
+
+# --- Caché de transcripciones ---
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "meeting-analyzer"))
+TRANSCRIPTION_CACHE_ENABLED = os.environ.get("TRANSCRIPTION_CACHE_ENABLED", "1") == "1"
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.environ.get("TRANSCRIPTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Directorio donde se descargan (una sola vez) los modelos de Whisper.
+WHISPER_MODEL_DIR = os.environ.get("WHISPER_MODEL_DIR", os.path.join(CACHE_DIR, "whisper"))
+
+# --- Caché de actas generadas por el LLM ---
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# --- Cola de trabajos persistente (job_store.py, job_queue.py) ---
+# Base de datos de la cola y artefactos de cada etapa (transcripción, acta en Markdown).
+JOB_STORE_DIR = os.environ.get("JOB_STORE_DIR", os.path.join(CACHE_DIR, "jobs"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Un trabajo reclamado se libera si su trabajador deja de renovarlo durante este tiempo (proceso caído).
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "120"))
+# Intentos de un trabajo antes de marcarlo como fallido; entre uno y otro se espera
+# JOB_RETRY_DELAY_SECONDS, duplicándolo en cada intento.
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY_SECONDS = float(os.environ.get("JOB_RETRY_DELAY_SECONDS", "30"))
+# API HTTP local para encolar trabajos y consultar su estado.
+JOB_API_HOST = os.environ.get("JOB_API_HOST", "127.0.0.1")
+JOB_API_PORT = int(os.environ.get("JOB_API_PORT", "8765"))
+
+# --- Índice del archivo de actas (minutes_index.py) ---
+MINUTES_INDEX_PATH = os.environ.get("MINUTES_INDEX_PATH", os.path.join(CACHE_DIR, "minutes_index.sqlite3"))
+# Las actas que genera la cola de trabajos se añaden al índice al terminar.
+MINUTES_INDEX_ENABLED = os.environ.get("MINUTES_INDEX_ENABLED", "1") == "1"
+# Directorios del archivo que se indexan si no se indica otro (separados por os.pathsep).
+MINUTES_ARCHIVE_DIRS = [d for d in os.environ.get("MINUTES_ARCHIVE_DIRS", "").split(os.pathsep) if d]
+# API HTTP local de búsqueda.
+INDEX_API_HOST = os.environ.get("INDEX_API_HOST", "127.0.0.1")
+INDEX_API_PORT = int(os.environ.get("INDEX_API_PORT", "8766"))
+
+# --- Generación del acta por partes (map-reduce) para transcripciones largas ---
+# "auto": solo si el prompt no cabe en el contexto; "always" o "never" para forzarlo.
+MAP_REDUCE_MODE = os.environ.get("MAP_REDUCE_MODE", "auto")
+MAP_REDUCE_CHUNK_TOKENS = int(os.environ.get("MAP_REDUCE_CHUNK_TOKENS", "6000"))
+MAP_REDUCE_WORKERS = int(os.environ.get("MAP_REDUCE_WORKERS", "4"))
+MAP_REDUCE_SUMMARY_TOKENS = int(os.environ.get("MAP_REDUCE_SUMMARY_TOKENS", "1024"))
+# Vueltas máximas de resumen de los resúmenes parciales antes de desistir.
+MAP_REDUCE_MAX_ROUNDS = int(os.environ.get("MAP_REDUCE_MAX_ROUNDS", "4"))
+# Para proveedores en la nube (contextos grandes) se usa este umbral en lugar de num_ctx.
+MAP_REDUCE_CLOUD_THRESHOLD_TOKENS = int(os.environ.get("MAP_REDUCE_CLOUD_THRESHOLD_TOKENS", "100000"))
+
+# --- Compactación de la transcripción antes del LLM (prompt_compaction.py) ---
+# 0 = sin cambios, 1 = normalizar, 2 = quitar muletillas y repeticiones, 3 = agresiva.
+# Desde el nivel 1 se altera el texto que ve el modelo, así que hay que activarlo expresamente.
+PROMPT_COMPACTION_LEVEL = int(os.environ.get("PROMPT_COMPACTION_LEVEL", "0"))
+PROMPT_COMPACTION_LANGUAGE = os.environ.get("PROMPT_COMPACTION_LANGUAGE", "es")
+# Tokenizadores de Hugging Face para contar los tokens de los modelos de Ollama,
+# p. ej. "llama3.1=meta-llama/Llama-3.1-8B,mistral=/ruta/a/tokenizer.json".
+OLLAMA_TOKENIZERS = os.environ.get("OLLAMA_TOKENIZERS", "")
+
+# --- Capa asíncrona de proveedores (async_providers.py) ---
+# Peticiones simultáneas como máximo por proveedor.
+PROVIDER_CONCURRENCY = {
+    "Ollama": int(os.environ.get("OLLAMA_CONCURRENCY", "1")),
+    "OpenAI": int(os.environ.get("OPENAI_CONCURRENCY", "8")),
+    "Anthropic": int(os.environ.get("ANTHROPIC_CONCURRENCY", "4")),
+    "Google": int(os.environ.get("GOOGLE_CONCURRENCY", "4")),
+}
+PROVIDER_MAX_RETRIES = int(os.environ.get("PROVIDER_MAX_RETRIES", "4"))
+PROVIDER_BASE_DELAY_SECONDS = float(os.environ.get("PROVIDER_BASE_DELAY_SECONDS", "1"))
+PROVIDER_MAX_DELAY_SECONDS = float(os.environ.get("PROVIDER_MAX_DELAY_SECONDS", "60"))
+# Plazo total de una petición, reintentos incluidos (0 = sin plazo).
+PROVIDER_DEADLINE_SECONDS = float(os.environ.get("PROVIDER_DEADLINE_SECONDS", "900")) or None
+# Cadena de respaldo por defecto del modo por lotes, p. ej. "Ollama:mistral:60,OpenAI:gpt-4o-mini".
+LLM_FALLBACK_CHAIN = os.environ.get("LLM_FALLBACK_CHAIN", "")
+
+# --- Registro y métricas ---
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+# Medición de etapas (ver instrumentation.py). También se activa al indicar un archivo o un puerto.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "0") == "1"
+METRICS_JSONL_PATH = os.environ.get("METRICS_JSONL_PATH", "")
+# Puerto del endpoint /metrics en formato Prometheus (0 = desactivado).
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+
+# --- Exportación a PDF ---
+# Fuente Unicode del acta; junto a ella se buscan las variantes -Bold, -Oblique y -BoldOblique.
+PDF_FONT_PATH = os.environ.get("PDF_FONT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "DejaVuSans.ttf"))
+# Procesos para exportar muchas actas a la vez (pdf_generator.render_pdfs).
+PDF_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", str(os.cpu_count() or 2)))
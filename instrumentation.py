@@ -0,0 +1,233 @@
+"""
+Medición por etapas del pipeline (spans) y exportación de métricas.
+
+Cada etapa se envuelve en un span con nombre y atributos:
+
+    with span("pdf_render", input_chars=len(text)) as s:
+        ...
+        s.set(output_bytes=os.path.getsize(path))
+
+Al cerrarse, el span registra su duración y su estado ("ok" o "error") y se exporta:
+- como una línea JSON en METRICS_JSONL_PATH, si está configurado;
+- a los agregados que sirve `render_prometheus()` en formato de texto de Prometheus,
+  también accesibles por HTTP en METRICS_PORT (`/metrics`);
+- como mensaje DEBUG del logger `instrumentation`.
+
+Con las métricas desactivadas (el valor por defecto), `span()` devuelve siempre el mismo
+objeto vacío, así que el coste es el de una llamada a función. Para atributos caros de
+calcular, comprobar antes `s.recording`.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from config import LOG_LEVEL, METRICS_ENABLED, METRICS_JSONL_PATH, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+# Atributos que se usan como etiquetas de Prometheus; el resto de atributos numéricos se suman.
+LABEL_ATTRIBUTES = ("provider", "model")
+
+# Límites (segundos) de los buckets del histograma de duraciones.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_enabled = METRICS_ENABLED or bool(METRICS_JSONL_PATH) or METRICS_PORT > 0
+_jsonl_path = METRICS_JSONL_PATH
+_jsonl_file = None
+_lock = threading.Lock()
+
+# (span, provider, model, status) -> [recuentos por bucket, suma, total]
+_durations: Dict[Tuple[str, ...], list] = {}
+# (span, atributo) -> suma de los valores numéricos
+_attribute_totals: Dict[Tuple[str, str], float] = defaultdict(float)
+
+
+class _NoopSpan:
+    """Span que no mide nada; se devuelve cuando las métricas están desactivadas."""
+    __slots__ = ()
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Etapa medida. La duración se toma con `time.perf_counter` entre la entrada y la salida."""
+    __slots__ = ("name", "attributes", "start", "started_at")
+    recording = True
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.started_at = 0.0
+
+    def __enter__(self):
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _export(self.name, self.started_at, duration, "error" if exc_type is not None else "ok", self.attributes)
+        return False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+def setup_logging(level: str = LOG_LEVEL):
+    """
+    Configura el registro de los puntos de entrada (GUI, lotes, CLI) y, si METRICS_PORT está
+    definido, arranca el endpoint de métricas.
+    """
+    logging.basicConfig(level=level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if METRICS_PORT > 0:
+        start_metrics_server(METRICS_PORT)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def configure(enable: Optional[bool] = None, jsonl_path: Optional[str] = None):
+    """Activa o desactiva las métricas y cambia el archivo JSONL en tiempo de ejecución."""
+    global _enabled, _jsonl_path, _jsonl_file
+    with _lock:
+        if jsonl_path is not None and jsonl_path != _jsonl_path:
+            if _jsonl_file is not None:
+                _jsonl_file.close()
+                _jsonl_file = None
+            _jsonl_path = jsonl_path
+        if enable is not None:
+            _enabled = enable
+
+
+def span(name: str, **attributes):
+    """Devuelve un gestor de contexto que mide la etapa `name` con los `attributes` dados."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def record_span(name: str, duration: float, started_at: Optional[float] = None, **attributes):
+    """
+    Registra una etapa ya medida por otros medios (p. ej. el tiempo hasta el primer token).
+    `started_at` es la hora de inicio (`time.time()`); por defecto, ahora menos `duration`.
+    """
+    if _enabled:
+        _export(name, started_at if started_at is not None else time.time() - duration, duration, "ok", attributes)
+
+
+def _export(name: str, started_at: float, duration: float, status: str, attributes: dict):
+    labels = (name,) + tuple(str(attributes.get(a, "")) for a in LABEL_ATTRIBUTES) + (status,)
+    with _lock:
+        histogram = _durations.get(labels)
+        if histogram is None:
+            histogram = _durations[labels] = [[0] * len(DURATION_BUCKETS), 0.0, 0]
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if duration <= bound:
+                histogram[0][i] += 1
+        histogram[1] += duration
+        histogram[2] += 1
+        for key, value in attributes.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                _attribute_totals[(name, key)] += value
+
+        if _jsonl_path:
+            _write_jsonl({"span": name, "start": started_at, "duration": duration, "status": status, **attributes})
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s %.3fs %s %s", name, duration, status, attributes)
+
+
+def _write_jsonl(record: dict):
+    global _jsonl_file
+    try:
+        if _jsonl_file is None:
+            _jsonl_file = open(_jsonl_path, 'a', encoding='utf-8', buffering=1)
+        _jsonl_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        logger.warning("No se pudo escribir la métrica en %s: %s", _jsonl_path, e)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    """Devuelve las métricas acumuladas en el formato de texto de Prometheus."""
+    lines = [
+        "# HELP meeting_analyzer_span_duration_seconds Duración de cada etapa del pipeline.",
+        "# TYPE meeting_analyzer_span_duration_seconds histogram",
+    ]
+    with _lock:
+        durations = {labels: (list(h[0]), h[1], h[2]) for labels, h in _durations.items()}
+        totals = dict(_attribute_totals)
+
+    for (name, provider, model, status), (buckets, total, count) in sorted(durations.items()):
+        base = f'span="{_escape(name)}",provider="{_escape(provider)}",model="{_escape(model)}",status="{status}"'
+        for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+            lines.append(f'meeting_analyzer_span_duration_seconds_bucket{{{base},le="{bound}"}} {bucket_count}')
+        lines.append(f'meeting_analyzer_span_duration_seconds_bucket{{{base},le="+Inf"}} {count}')
+        lines.append(f'meeting_analyzer_span_duration_seconds_sum{{{base}}} {total}')
+        lines.append(f'meeting_analyzer_span_duration_seconds_count{{{base}}} {count}')
+
+    lines += [
+        "# HELP meeting_analyzer_span_attribute_total Suma de los atributos numéricos de cada etapa (bytes, tokens, segundos de audio...).",
+        "# TYPE meeting_analyzer_span_attribute_total counter",
+    ]
+    for (name, attribute), value in sorted(totals.items()):
+        lines.append(f'meeting_analyzer_span_attribute_total{{span="{_escape(name)}",attribute="{_escape(attribute)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Descarta las métricas acumuladas."""
+    with _lock:
+        _durations.clear()
+        _attribute_totals.clear()
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = "127.0.0.1"):
+    """
+    Sirve `render_prometheus()` en http://host:port/metrics desde un hilo en segundo plano
+    y activa las métricas. Devuelve el servidor (con `shutdown()` para detenerlo).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    configure(enable=True)
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Métricas disponibles en http://%s:%d/metrics", host, server.server_address[1])
+    return server
@@ -0,0 +1,479 @@
+"""
+Trabajadores y API HTTP de la cola de trabajos persistente (ver `job_store`).
+
+Cada trabajador es un proceso que reclama trabajos de la cola y ejecuta sus etapas
+pendientes, guardando el resultado de cada una antes de pasar a la siguiente:
+- transcribe: la transcripción con tiempos y hablantes (`transcript.transcript`);
+- generate: el acta en Markdown (`minutes.md`);
+- render: el PDF en la ruta de salida del trabajo.
+Un trabajo que falla vuelve a la cola y, al reintentarse, empieza en la etapa que falló.
+
+Uso:
+    python job_queue.py submit audios/*.mp4 --provider Ollama --model mistral --output-dir pdfs
+    python job_queue.py work --workers 2 [--drain]
+    python job_queue.py serve --workers 2            # API HTTP + trabajadores
+    python job_queue.py status [--job 12]
+    python job_queue.py retry [--job 12]
+
+API (solo en JOB_API_HOST, por defecto 127.0.0.1):
+    POST /jobs                  {"audio_path": ..., "provider": ..., "model": ..., "output_pdf": ..., ...}
+    GET  /jobs[?status=queued]  lista de trabajos
+    GET  /jobs/<id>             estado de un trabajo
+    GET  /jobs/<id>/transcript  transcripción en texto
+    GET  /jobs/<id>/minutes     acta en Markdown
+    POST /jobs/<id>/retry       reencola un trabajo fallido
+    GET  /stats                 profundidad de la cola y rendimiento
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from config import (
+    DEFAULT_GENERATION_PARAMS,
+    JOB_API_HOST,
+    JOB_API_PORT,
+    JOB_STORE_DIR,
+    JOB_WORKERS,
+    LLM_FALLBACK_CHAIN,
+    MINUTES_INDEX_ENABLED,
+)
+from instrumentation import setup_logging, span
+from job_store import FAILED, STATUSES, JobRecord, JobStore
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("Ollama", "OpenAI", "Anthropic", "Google")
+
+# Opciones de un trabajo que se aceptan al encolarlo (ver `run_stage`).
+JOB_OPTIONS = ("context", "compaction", "backend", "chunked", "refresh", "fallback")
+
+# Segundos entre comprobaciones de la cola cuando está vacía.
+POLL_SECONDS = 1.0
+
+
+def _write_atomically(path: str, data: str):
+    # Se escribe en un temporal y se renombra: un proceso que muere a medias no deja un artefacto truncado.
+    partial = f"{path}.partial"
+    with open(partial, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(partial, path)
+
+
+def submit_job(
+    store: JobStore,
+    audio_path: str,
+    provider: str,
+    model: str,
+    output_pdf: Optional[str] = None,
+    output_dir: str = "pdfs",
+    **options,
+) -> int:
+    """
+    Valida y encola una grabación. `output_pdf` es por defecto `<output_dir>/<nombre>.pdf`;
+    `options` admite las claves de JOB_OPTIONS. Lanza ValueError si algo no es válido.
+    """
+    if not os.path.isfile(audio_path):
+        raise ValueError(f"El archivo no existe: {audio_path}")
+    unknown = set(options) - set(JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Opciones desconocidas: {', '.join(sorted(unknown))}. Válidas: {', '.join(JOB_OPTIONS)}.")
+    options = {key: value for key, value in options.items() if value is not None and value != "" and value is not False}
+    if options.get("fallback"):
+        from async_providers import parse_fallback_chain
+
+        first = parse_fallback_chain(options["fallback"])[0]
+        provider, model = first.provider, first.model
+    if provider not in PROVIDERS:
+        raise ValueError(f"Proveedor desconocido: '{provider}'. Opciones: {', '.join(PROVIDERS)}.")
+    if not model:
+        raise ValueError("Se necesita el modelo (o una cadena de respaldo en 'fallback').")
+    if output_pdf is None:
+        stem = os.path.splitext(os.path.basename(audio_path))[0]
+        output_pdf = os.path.join(output_dir, f"{stem}.pdf")
+    return store.submit(audio_path, output_pdf, provider, model, options)
+
+
+# --- Etapas ---
+
+def run_stage(store: JobStore, job: JobRecord, stage: str) -> dict:
+    """Ejecuta una etapa del trabajo, guarda su artefacto y devuelve las columnas a registrar."""
+    options = job.options
+    if stage == "transcribe":
+        from audio_processor import transcribe_transcript
+        from chunked_transcription import transcribe_transcript_chunked
+        from utils import probe_duration
+
+        if options.get("chunked"):
+            transcript = transcribe_transcript_chunked(job.audio_path, backend=options.get("backend"))
+        else:
+            transcript = transcribe_transcript(job.audio_path, backend=options.get("backend"))
+        path = store.artifact_path(job.id, "transcript.transcript")
+        transcript.save(f"{path}.partial")
+        os.replace(f"{path}.partial", path)
+        return {"artifact": path, "audio_seconds": probe_duration(job.audio_path)}
+
+    if stage == "generate":
+        from llm_processor import generate_minutes, generate_minutes_with_fallback
+        from transcript import Transcript
+
+        with Transcript.load(job.transcript_path) as transcript:
+            text = transcript.render()
+        params = dict(DEFAULT_GENERATION_PARAMS)
+        if options.get("fallback"):
+            from async_providers import parse_fallback_chain
+
+            minutes, _ = generate_minutes_with_fallback(
+                parse_fallback_chain(options["fallback"]), text, options.get("context", ""), params,
+                bypass_cache=bool(options.get("refresh")), compaction_level=options.get("compaction"),
+            )
+        else:
+            minutes = generate_minutes(
+                job.provider, job.model, text, options.get("context", ""), params,
+                bypass_cache=bool(options.get("refresh")), compaction_level=options.get("compaction"),
+            )
+        path = store.artifact_path(job.id, "minutes.md")
+        _write_atomically(path, minutes)
+        return {"artifact": path}
+
+    if stage == "render":
+        from pdf_generator import render_pdf_file
+
+        with open(job.minutes_path, 'r', encoding='utf-8') as f:
+            minutes = f.read()
+        os.makedirs(os.path.dirname(job.output_pdf), exist_ok=True)
+        result = render_pdf_file(minutes, job.output_pdf)
+        if result.error:
+            raise RuntimeError(result.error)
+        return {"artifact": job.output_pdf}
+
+    raise ValueError(f"Etapa desconocida: {stage}")
+
+
+class _Heartbeat:
+    """Renueva el plazo del trabajo en segundo plano mientras se ejecutan sus etapas."""
+
+    def __init__(self, store: JobStore, job: JobRecord):
+        self.store = store
+        self.job = job
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job.id}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.store.lease_seconds / 3):
+            if not self.store.heartbeat(self.job):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def process_job(store: JobStore, job: JobRecord) -> str:
+    """Ejecuta las etapas pendientes de un trabajo reclamado y devuelve su estado final."""
+    name = os.path.basename(job.audio_path)
+    with _Heartbeat(store, job) as heartbeat:
+        for stage in job.pending_stages:
+            start = time.perf_counter()
+            try:
+                with span("job_stage", stage=stage, provider=job.provider, model=job.model):
+                    columns = run_stage(store, job, stage)
+            except Exception as e:
+                status = store.fail(job, f"{stage}: {e}")
+                logger.warning("Trabajo %d (%s) falló en %s (intento %d): %s -> %s", job.id, name, stage, job.attempts, e, status,
+                               exc_info=True)
+                return status
+            artifact = columns.pop("artifact")
+            if heartbeat.lost or not store.complete_stage(job, stage, time.perf_counter() - start, artifact, **columns):
+                # El plazo venció y otro trabajador lo ha retomado: este deja de tocarlo.
+                logger.warning("Trabajo %d (%s): se perdió la reclamación durante %s.", job.id, name, stage)
+                return "lost"
+            logger.info("Trabajo %d (%s): %s completada en %.1fs.", job.id, name, stage, time.perf_counter() - start)
+    if MINUTES_INDEX_ENABLED:
+        _index_job(job)
+    return "done"
+
+
+def _index_job(job: JobRecord):
+    """Añade el acta y la transcripción del trabajo al índice del archivo (ver `minutes_index`)."""
+    from minutes_index import MinutesIndex
+
+    meeting = os.path.splitext(job.output_pdf)[0]
+    try:
+        index = MinutesIndex()
+        index.index_file(job.minutes_path, meeting=meeting, pdf_path=job.output_pdf)
+        index.index_file(job.transcript_path, meeting=meeting, pdf_path=job.output_pdf)
+    except Exception as e:
+        # El acta ya está generada: un fallo del índice no hace fallar el trabajo.
+        logger.warning("Trabajo %d: no se pudo añadir al índice de actas: %s", job.id, e)
+
+
+def run_worker(directory: str = JOB_STORE_DIR, worker: Optional[str] = None, drain: bool = False, stop: Optional[threading.Event] = None):
+    """
+    Bucle de un trabajador: reclama y procesa trabajos hasta que se activa `stop` o, con
+    `drain`, hasta que no queda ninguno disponible.
+    """
+    setup_logging()
+    store = JobStore(directory)
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        job = store.claim(worker)
+        if job is None:
+            if drain:
+                return
+            stop.wait(POLL_SECONDS)
+            continue
+        logger.info("Trabajo %d reclamado por %s (etapas pendientes: %s).", job.id, worker, ", ".join(job.pending_stages))
+        process_job(store, job)
+
+
+def start_workers(count: int = JOB_WORKERS, directory: str = JOB_STORE_DIR, drain: bool = False) -> List[multiprocessing.Process]:
+    """Lanza `count` procesos trabajadores y los devuelve."""
+    processes = []
+    for index in range(count):
+        process = multiprocessing.Process(target=run_worker, args=(directory, None, drain), name=f"job-worker-{index}", daemon=not drain)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+# --- API HTTP ---
+
+def start_api_server(store: JobStore, host: str = JOB_API_HOST, port: int = JOB_API_PORT):
+    """
+    Sirve la API de la cola en http://host:port desde un hilo en segundo plano. Devuelve el
+    servidor (con `shutdown()` para detenerlo). Las rutas de audio se leen del disco local,
+    así que por defecto solo escucha en 127.0.0.1.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class JobsHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body, content_type: str = "application/json; charset=utf-8"):
+            if not isinstance(body, str):
+                body = json.dumps(body, ensure_ascii=False)
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _job(self, parts: List[str]) -> Optional[JobRecord]:
+            job = store.get(int(parts[1])) if parts[1].isdigit() else None
+            if job is None:
+                self._send(404, {"error": "Trabajo no encontrado."})
+            return job
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if parts == ["stats"]:
+                self._send(200, store.stats())
+            elif parts == ["jobs"]:
+                query = parse_qs(url.query)
+                status = query.get("status", [None])[0]
+                if status is not None and status not in STATUSES:
+                    self._send(400, {"error": f"Estado desconocido. Opciones: {', '.join(STATUSES)}."})
+                    return
+                try:
+                    limit = int(query.get("limit", ["100"])[0])
+                except ValueError:
+                    self._send(400, {"error": "'limit' debe ser un número entero."})
+                    return
+                self._send(200, [job.to_dict() for job in store.list_jobs(status, limit)])
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = self._job(parts)
+                if job is not None:
+                    self._send(200, job.to_dict())
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] in ("transcript", "minutes"):
+                job = self._job(parts)
+                if job is None:
+                    return
+                if parts[2] == "transcript":
+                    if not job.transcript_path:
+                        self._send(404, {"error": "El trabajo todavía no tiene transcripción."})
+                        return
+                    from transcript import Transcript
+
+                    with Transcript.load(job.transcript_path) as transcript:
+                        self._send(200, transcript.render(), "text/plain; charset=utf-8")
+                else:
+                    if not job.minutes_path:
+                        self._send(404, {"error": "El trabajo todavía no tiene acta."})
+                        return
+                    with open(job.minutes_path, 'r', encoding='utf-8') as f:
+                        self._send(200, f.read(), "text/markdown; charset=utf-8")
+            else:
+                self._send(404, {"error": "Ruta desconocida."})
+
+        def do_POST(self):
+            parts = urlparse(self.path).path.strip("/").split("/")
+            if parts == ["jobs"]:
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    if not isinstance(request, dict):
+                        raise ValueError("El cuerpo debe ser un objeto JSON.")
+                    audio_path = request.pop("audio_path", None)
+                    if not audio_path:
+                        raise ValueError("Falta 'audio_path'.")
+                    job_id = submit_job(
+                        store, audio_path, request.pop("provider", "Ollama"), request.pop("model", ""),
+                        output_pdf=request.pop("output_pdf", None), output_dir=request.pop("output_dir", "pdfs"),
+                        **request,
+                    )
+                except (ValueError, TypeError) as e:
+                    self._send(400, {"error": str(e)})
+                    return
+                self._send(201, store.get(job_id).to_dict())
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "retry":
+                job = self._job(parts)
+                if job is None:
+                    return
+                if job.status != FAILED:
+                    self._send(409, {"error": f"Solo se reintentan trabajos fallidos (estado actual: {job.status})."})
+                    return
+                store.retry(job.id)
+                self._send(200, store.get(job.id).to_dict())
+            else:
+                self._send(404, {"error": "Ruta desconocida."})
+
+    server = ThreadingHTTPServer((host, port), JobsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="jobs-api", daemon=True).start()
+    logger.info("API de la cola disponible en http://%s:%d/jobs", host, server.server_address[1])
+    return server
+
+
+# --- CLI ---
+
+def _print_stats(stats: dict):
+    print(
+        f"En cola: {stats['queued']} | En curso: {stats['running']} | Terminados: {stats['done']} | Fallidos: {stats['failed']}"
+    )
+    if stats["queued"]:
+        print(f"El trabajo más antiguo lleva {stats['oldest_queued_seconds'] / 60:.1f} min en cola.")
+    print(
+        f"Última hora: {stats['done_in_window']} terminados | {stats['jobs_per_minute']:.2f} trabajos/min | "
+        f"{stats['audio_hours_per_minute']:.3f} horas de audio/min"
+    )
+    for stage, values in stats["stages"].items():
+        print(f"  {stage}: {values['runs']} ejecuciones, media {values['mean_seconds']:.1f}s")
+
+
+def _print_job(job: JobRecord):
+    stage = job.stage or "-"
+    error = f" | {job.error}" if job.error else ""
+    print(f"#{job.id} [{job.status}] etapa={stage} intentos={job.attempts} {os.path.basename(job.audio_path)} -> {job.output_pdf}{error}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cola persistente de trabajos: transcripción -> acta -> PDF, reanudable.")
+    parser.add_argument("--store", default=JOB_STORE_DIR, help="Directorio de la cola (por defecto JOB_STORE_DIR).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Encola grabaciones.")
+    submit.add_argument("audio_paths", nargs="+")
+    submit.add_argument("--output-dir", default="pdfs")
+    submit.add_argument("--provider", default="Ollama", choices=PROVIDERS)
+    submit.add_argument("--model", default="")
+    submit.add_argument("--context", default="")
+    submit.add_argument("--compaction", type=int, choices=range(0, 4), default=None)
+    submit.add_argument("--backend", default=None, help="Motor de transcripción (por defecto TRANSCRIPTION_BACKEND).")
+    submit.add_argument("--chunked", action="store_true")
+    submit.add_argument("--refresh", action="store_true", help="Regenera el acta aunque esté en la caché del LLM.")
+    submit.add_argument("--fallback", default=LLM_FALLBACK_CHAIN, help="Cadena de proveedores de respaldo (sustituye a --provider/--model).")
+
+    work = commands.add_parser("work", help="Ejecuta trabajadores hasta Ctrl+C.")
+    work.add_argument("--workers", type=int, default=JOB_WORKERS)
+    work.add_argument("--drain", action="store_true", help="Termina cuando no quedan trabajos disponibles.")
+
+    serve = commands.add_parser("serve", help="Sirve la API HTTP y ejecuta trabajadores.")
+    serve.add_argument("--host", default=JOB_API_HOST)
+    serve.add_argument("--port", type=int, default=JOB_API_PORT)
+    serve.add_argument("--workers", type=int, default=JOB_WORKERS, help="0 = solo la API.")
+
+    status = commands.add_parser("status", help="Estado de la cola o de un trabajo.")
+    status.add_argument("--job", type=int)
+    status.add_argument("--list", choices=STATUSES, help="Lista los trabajos con este estado.")
+
+    retry = commands.add_parser("retry", help="Reencola trabajos fallidos (se reanudan desde la última etapa completada).")
+    retry.add_argument("--job", type=int, help="Solo este trabajo (por defecto, todos los fallidos).")
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    store = JobStore(args.store)
+
+    if args.command == "submit":
+        for audio_path in args.audio_paths:
+            try:
+                job_id = submit_job(
+                    store, audio_path, args.provider, args.model, output_dir=args.output_dir,
+                    context=args.context, compaction=args.compaction, backend=args.backend,
+                    chunked=args.chunked, refresh=args.refresh, fallback=args.fallback,
+                )
+            except ValueError as e:
+                parser.error(str(e))
+            print(f"Encolado #{job_id}: {audio_path}")
+        return 0
+
+    if args.command == "status":
+        if args.job is not None:
+            job = store.get(args.job)
+            if job is None:
+                print(f"No existe el trabajo #{args.job}.")
+                return 1
+            print(json.dumps(job.to_dict(), ensure_ascii=False, indent=2))
+        elif args.list:
+            for job in store.list_jobs(args.list):
+                _print_job(job)
+        else:
+            _print_stats(store.stats())
+        return 0
+
+    if args.command == "retry":
+        print(f"Reencolados: {store.retry(args.job)}")
+        return 0
+
+    if args.command == "serve":
+        server = start_api_server(store, args.host, args.port)
+    processes = start_workers(args.workers, args.store, drain=args.command == "work" and args.drain)
+    try:
+        if args.command == "work" and args.drain:
+            for process in processes:
+                process.join()
+            _print_stats(store.stats())
+        else:
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        # Los trabajos en curso quedan reclamados hasta que vence su plazo y otro trabajador los retoma.
+        for process in processes:
+            process.terminate()
+    finally:
+        if args.command == "serve":
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
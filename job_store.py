@@ -0,0 +1,313 @@
+"""
+Cola de trabajos persistente respaldada por SQLite.
+
+Cada trabajo es una grabación que recorre las etapas de `STAGES` (transcripción -> acta en
+Markdown -> PDF). El resultado de cada etapa se guarda como archivo en el directorio de
+artefactos del trabajo y su ruta queda registrada en la base de datos, de modo que un
+trabajo interrumpido (proceso caído, app cerrada) o fallido (error del proveedor) se
+reanuda desde la última etapa completada: una transcripción de 40 minutos no se paga dos
+veces porque falle la generación del acta.
+
+La base de datos está en modo WAL y cada hilo usa su propia conexión, como `DiskCache`, así
+que varios procesos trabajadores pueden reclamar trabajos a la vez:
+- `claim` asigna un trabajo a un trabajador con una sola sentencia UPDATE (atómica) y un
+  plazo (`lease`) que el trabajador renueva con `heartbeat`; si el proceso muere, el plazo
+  vence y otro trabajador lo retoma.
+- Las escrituras de un trabajador solo se aplican si el trabajo sigue siendo suyo (`claim`).
+- Un fallo devuelve el trabajo a la cola con espera creciente hasta `max_attempts` intentos.
+
+`stats()` resume la profundidad de la cola, el rendimiento reciente y la duración media de
+cada etapa.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY_SECONDS, JOB_STORE_DIR
+
+STAGES = ("transcribe", "generate", "render")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    audio_path TEXT NOT NULL,
+    output_pdf TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    worker TEXT,
+    claim TEXT,
+    lease_until REAL,
+    available_at REAL NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    finished REAL,
+    audio_seconds REAL NOT NULL DEFAULT 0,
+    transcript_path TEXT,
+    minutes_path TEXT,
+    pdf_path TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS stage_runs (
+    job_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    finished REAL NOT NULL,
+    worker TEXT
+);
+CREATE INDEX IF NOT EXISTS stage_runs_finished ON stage_runs (finished);
+"""
+
+# Columna donde se registra el artefacto de cada etapa.
+_ARTIFACT_COLUMNS = {"transcribe": "transcript_path", "generate": "minutes_path", "render": "pdf_path"}
+
+
+@dataclass
+class JobRecord:
+    """Estado de un trabajo tal como está en la base de datos."""
+    id: int
+    audio_path: str
+    output_pdf: str
+    provider: str
+    model: str
+    options: dict = field(default_factory=dict)
+    status: str = QUEUED
+    # Última etapa completada ('' si ninguna).
+    stage: str = ""
+    attempts: int = 0
+    error: Optional[str] = None
+    worker: Optional[str] = None
+    claim: Optional[str] = None
+    lease_until: Optional[float] = None
+    available_at: float = 0.0
+    created: float = 0.0
+    updated: float = 0.0
+    finished: Optional[float] = None
+    audio_seconds: float = 0.0
+    transcript_path: Optional[str] = None
+    minutes_path: Optional[str] = None
+    pdf_path: Optional[str] = None
+
+    @property
+    def pending_stages(self) -> tuple:
+        """Etapas que faltan por ejecutar, en orden."""
+        return STAGES[STAGES.index(self.stage) + 1:] if self.stage else STAGES
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("claim")
+        return data
+
+
+class JobStore:
+    def __init__(
+        self,
+        directory: str = JOB_STORE_DIR,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_delay_seconds: float = JOB_RETRY_DELAY_SECONDS,
+    ):
+        self.directory = directory
+        self.path = os.path.join(directory, "jobs.sqlite3")
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self._local = threading.local()
+        os.makedirs(os.path.join(directory, "artifacts"), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por hilo: los objetos de sqlite3 no deben compartirse entre hilos.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> JobRecord:
+        data = dict(row)
+        data["options"] = json.loads(data["options"])
+        return JobRecord(**data)
+
+    def artifact_path(self, job_id: int, name: str) -> str:
+        """Ruta de un artefacto del trabajo (el directorio se crea si no existe)."""
+        directory = os.path.join(self.directory, "artifacts", str(job_id))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, name)
+
+    # --- Envío y consulta ---
+
+    def submit(self, audio_path: str, output_pdf: str, provider: str, model: str, options: Optional[dict] = None) -> int:
+        """Encola una grabación y devuelve el id del trabajo."""
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (audio_path, output_pdf, provider, model, options, status, available_at, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(audio_path), os.path.abspath(output_pdf), provider, model,
+                 json.dumps(options or {}, ensure_ascii=False), QUEUED, now, now, now),
+            )
+            return cursor.lastrowid
+
+    def get(self, job_id: int) -> Optional[JobRecord]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._record(row) if row is not None else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 100) -> List[JobRecord]:
+        """Trabajos más recientes primero, opcionalmente solo los de un estado."""
+        conn = self._connection()
+        if status:
+            rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._record(row) for row in rows]
+
+    # --- Ciclo de vida (trabajadores) ---
+
+    def claim(self, worker: str) -> Optional[JobRecord]:
+        """
+        Reclama el trabajo disponible más antiguo (en cola, o en curso con el plazo vencido
+        porque su trabajador murió) y lo devuelve, o None si no hay ninguno. Un trabajo cuyo
+        trabajador murió habiendo agotado `max_attempts` (p. ej. porque el propio trabajo lo
+        mata por falta de memoria) queda como fallido en lugar de pasar a otro trabajador.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, claim = NULL, lease_until = NULL, updated = ?, finished = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, "El trabajador dejó de responder (plazo vencido) en el último intento.", now, now,
+                 RUNNING, now, self.max_attempts),
+            )
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, claim = ?, lease_until = ?, attempts = attempts + 1, updated = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?) "
+                "ORDER BY id LIMIT 1)",
+                (RUNNING, worker, token, now + self.lease_seconds, now, QUEUED, now, RUNNING, now),
+            )
+            if cursor.rowcount == 0:
+                return None
+            row = conn.execute("SELECT * FROM jobs WHERE claim = ?", (token,)).fetchone()
+        return self._record(row)
+
+    def heartbeat(self, job: JobRecord) -> bool:
+        """Renueva el plazo del trabajo; False si ya no pertenece a este trabajador."""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND claim = ?",
+                (time.time() + self.lease_seconds, job.id, job.claim),
+            )
+            return cursor.rowcount == 1
+
+    def complete_stage(self, job: JobRecord, stage: str, seconds: float, artifact: str, **columns) -> bool:
+        """
+        Registra que `stage` ha terminado, con la ruta de su artefacto. `columns` admite
+        además `audio_seconds`. Tras la última etapa el trabajo queda como terminado.
+        Devuelve False (sin cambiar nada) si el trabajo ya no pertenece a este trabajador.
+        """
+        now = time.time()
+        assignments = {"stage": stage, _ARTIFACT_COLUMNS[stage]: artifact, "updated": now, "error": None, **columns}
+        if stage == STAGES[-1]:
+            assignments.update(status=DONE, finished=now, claim=None, lease_until=None)
+        sql = ", ".join(f"{column} = ?" for column in assignments)
+        with self._connection() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {sql} WHERE id = ? AND claim = ?",
+                (*assignments.values(), job.id, job.claim),
+            )
+            if cursor.rowcount != 1:
+                return False
+            conn.execute(
+                "INSERT INTO stage_runs (job_id, stage, seconds, finished, worker) VALUES (?, ?, ?, ?, ?)",
+                (job.id, stage, seconds, now, job.worker),
+            )
+        job.stage = stage
+        setattr(job, _ARTIFACT_COLUMNS[stage], artifact)
+        return True
+
+    def fail(self, job: JobRecord, error: str) -> str:
+        """
+        Registra un fallo. El trabajo vuelve a la cola (conservando las etapas completadas)
+        tras una espera que se duplica en cada intento, o queda como fallido si ha agotado
+        `max_attempts`. Devuelve el nuevo estado.
+        """
+        now = time.time()
+        if job.attempts >= self.max_attempts:
+            status, available_at = FAILED, now
+        else:
+            status, available_at = QUEUED, now + self.retry_delay_seconds * 2 ** (job.attempts - 1)
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, claim = NULL, lease_until = NULL, updated = ?, "
+                "finished = CASE WHEN ? = ? THEN ? ELSE finished END WHERE id = ? AND claim = ?",
+                (status, error, available_at, now, status, FAILED, now, job.id, job.claim),
+            )
+        return status
+
+    def retry(self, job_id: Optional[int] = None) -> int:
+        """
+        Vuelve a encolar un trabajo fallido (o todos, sin `job_id`) con los intentos a cero.
+        Se reanuda desde la última etapa completada. Devuelve cuántos se han reencolado.
+        """
+        now = time.time()
+        query = "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, finished = NULL, updated = ? WHERE status = ?"
+        values = [QUEUED, now, now, FAILED]
+        if job_id is not None:
+            query += " AND id = ?"
+            values.append(job_id)
+        with self._connection() as conn:
+            return conn.execute(query, values).rowcount
+
+    # --- Introspección ---
+
+    def stats(self, window_seconds: float = 3600.0) -> dict:
+        """
+        Trabajos por estado, antigüedad del más viejo en cola, rendimiento en la última
+        `window_seconds` (trabajos terminados y horas de audio por minuto) y duración media
+        de cada etapa en esa ventana.
+        """
+        conn = self._connection()
+        now = time.time()
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        oldest = conn.execute("SELECT MIN(created) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+        since = now - window_seconds
+        done, audio_seconds = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(audio_seconds), 0) FROM jobs WHERE status = ? AND finished >= ?", (DONE, since)
+        ).fetchone()
+        stages = {
+            stage: {"runs": runs, "mean_seconds": mean}
+            for stage, runs, mean in conn.execute(
+                "SELECT stage, COUNT(*), AVG(seconds) FROM stage_runs WHERE finished >= ? GROUP BY stage", (since,)
+            ).fetchall()
+        }
+        minutes = window_seconds / 60
+        return {
+            **{status: counts.get(status, 0) for status in STATUSES},
+            "oldest_queued_seconds": now - oldest if oldest is not None else 0.0,
+            "window_seconds": window_seconds,
+            "done_in_window": done,
+            "jobs_per_minute": done / minutes,
+            "audio_hours_per_minute": audio_seconds / 3600 / minutes,
+            "stages": stages,
+        }
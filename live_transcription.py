@@ -0,0 +1,511 @@
+"""
+Transcripción en vivo con acta incremental.
+
+Durante la reunión, el audio de un micrófono (`microphone`) o de una grabación que todavía
+está creciendo (`tail_file`) se envía por bloques a un motor en streaming:
+
+- `DeepgramLiveSession`: el websocket de Deepgram, que devuelve frases finales con tiempos
+  y hablantes a los pocos segundos de pronunciarse.
+- `WhisperLiveSession`: Whisper en local (ver `transcription_backends`), que transcribe el
+  audio por ventanas de LIVE_WHISPER_WINDOW_SECONDS. Necesita PCM de 16 bits mono a
+  16 kHz (el micrófono, o una grabación .wav con ese formato).
+
+`LiveMinutes` acumula las palabras y el texto y, cada LIVE_DRAFT_INTERVAL_SECONDS, actualiza
+en segundo plano un borrador del acta con solo el tramo nuevo de la transcripción
+(`llm_processor.update_minutes_draft`). Al terminar la reunión solo falta incorporar los
+últimos segundos, así que el acta definitiva está lista poco después.
+
+    stop = threading.Event()
+    minutes = LiveMinutes("Ollama", "mistral", on_transcript=print)
+    acta = run_live(tail_file("reunion.ogg", stop), DeepgramLiveSession(), minutes)
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from array import array
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from config import (
+    DEFAULT_GENERATION_PARAMS,
+    LIVE_BACKEND,
+    LIVE_DRAFT_INTERVAL_SECONDS,
+    LIVE_FILE_IDLE_SECONDS,
+    LIVE_SAMPLE_RATE,
+    LIVE_WHISPER_WINDOW_SECONDS,
+)
+from transcript import Transcript
+from transcription_backends import PARAGRAPH_PAUSE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Bytes que se leen de una grabación en curso en cada paso.
+FILE_CHUNK_SIZE = 64 * 1024
+# Segundos entre comprobaciones de si la grabación ha crecido.
+FILE_POLL_SECONDS = 0.25
+
+# Sample rate que espera Whisper.
+WHISPER_SAMPLE_RATE = 16000
+
+
+# --- Fuentes de audio ---
+
+def tail_file(path: str, stop: threading.Event, idle_seconds: float = LIVE_FILE_IDLE_SECONDS) -> Iterator[bytes]:
+    """
+    Lee una grabación que se está escribiendo y devuelve los bytes nuevos a medida que
+    aparecen. Termina cuando se activa `stop` o cuando el archivo no crece durante
+    `idle_seconds` (la grabación ha terminado).
+    """
+    with open(path, 'rb') as f:
+        last_data = time.monotonic()
+        while not stop.is_set():
+            chunk = f.read(FILE_CHUNK_SIZE)
+            if chunk:
+                last_data = time.monotonic()
+                yield chunk
+                continue
+            if time.monotonic() - last_data >= idle_seconds:
+                logger.info("%s no ha crecido en %.0fs: se da por terminada la grabación.", path, idle_seconds)
+                return
+            stop.wait(FILE_POLL_SECONDS)
+
+
+def microphone(stop: threading.Event, sample_rate: int = LIVE_SAMPLE_RATE, block_seconds: float = 0.1) -> Iterator[bytes]:
+    """Captura el micrófono por defecto como PCM de 16 bits mono hasta que se activa `stop`."""
+    try:
+        import sounddevice
+    except ImportError:
+        raise RuntimeError("Para capturar el micrófono se necesita sounddevice: pip install sounddevice")
+
+    blocks: "queue.Queue[bytes]" = queue.Queue()
+
+    def on_block(data, frames, time_info, status):
+        if status:
+            logger.warning("Micrófono: %s", status)
+        blocks.put(bytes(data))
+
+    with sounddevice.RawInputStream(samplerate=sample_rate, channels=1, dtype="int16",
+                                    blocksize=int(sample_rate * block_seconds), callback=on_block):
+        while not stop.is_set():
+            try:
+                yield blocks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+    while not blocks.empty():
+        yield blocks.get_nowait()
+
+
+# --- Motores en streaming ---
+
+class LiveSession:
+    """
+    Conexión con un motor de transcripción en streaming. `start(on_words)` la abre; después
+    se llama a `send` con cada bloque de audio y `on_words` recibe listas de palabras con el
+    formato de Deepgram (tiempos desde el inicio del audio) a medida que son definitivas.
+    `finish()` envía lo pendiente y espera las últimas palabras.
+    """
+
+    def start(self, on_words: Callable[[List[dict]], None]):
+        raise NotImplementedError
+
+    def send(self, chunk: bytes):
+        raise NotImplementedError
+
+    def finish(self):
+        raise NotImplementedError
+
+
+class DeepgramLiveSession(LiveSession):
+    """
+    Websocket de Deepgram con las mismas opciones de modelo, idioma y diarización que la
+    transcripción de archivos. Con `sample_rate` se envía PCM de 16 bits sin cabecera (el
+    micrófono); sin él, Deepgram detecta el formato del contenedor (ogg, webm, wav...).
+    """
+
+    def __init__(self, sample_rate: Optional[int] = None):
+        self.sample_rate = sample_rate
+        self.error: Optional[str] = None
+        self._connection = None
+
+    def start(self, on_words: Callable[[List[dict]], None]):
+        from deepgram import LiveOptions, LiveTranscriptionEvents
+
+        from audio_processor import DEEPGRAM_OPTIONS
+        from client_registry import get_deepgram_client
+
+        def on_transcript(_client, result, **kwargs):
+            if not result.is_final:
+                return
+            words = [word.to_dict() for word in result.channel.alternatives[0].words]
+            if words:
+                on_words(words)
+
+        def on_error(_client, error, **kwargs):
+            self.error = str(error)
+            logger.error("Error de Deepgram en vivo: %s", error)
+
+        options = {key: DEEPGRAM_OPTIONS[key] for key in ("model", "language", "smart_format", "punctuate", "diarize")}
+        if self.sample_rate:
+            options.update(encoding="linear16", sample_rate=self.sample_rate, channels=1)
+
+        self._connection = get_deepgram_client().listen.websocket.v("1")
+        self._connection.on(LiveTranscriptionEvents.Transcript, on_transcript)
+        self._connection.on(LiveTranscriptionEvents.Error, on_error)
+        if not self._connection.start(LiveOptions(**options)):
+            raise RuntimeError("No se pudo abrir la conexión en vivo con Deepgram.")
+
+    def send(self, chunk: bytes):
+        if self.error:
+            raise RuntimeError(f"Deepgram cerró la transcripción en vivo: {self.error}")
+        self._connection.send(chunk)
+
+    def finish(self):
+        if self._connection is not None:
+            self._connection.finish()
+
+
+_WAV_REQUIRED = (
+    "El motor Whisper en vivo necesita una grabación WAV PCM de 16 bits, mono y 16 kHz "
+    "(o el micrófono). Use LIVE_BACKEND=deepgram para otros formatos, o grabe con "
+    "ffmpeg ... -ac 1 -ar 16000 -c:a pcm_s16le grabacion.wav."
+)
+# Cabecera máxima que se espera antes del bloque de datos de un .wav.
+_WAV_HEADER_LIMIT = 64 * 1024
+
+
+def _pcm_from_wav(data: bytes) -> Optional[bytes]:
+    """
+    Quita la cabecera de un .wav comprobando que es PCM de 16 bits mono a 16 kHz. Devuelve
+    None si `data` aún no llega al bloque de datos (la grabación acaba de empezar).
+    """
+    import struct
+
+    if len(data) >= 12 and (data[:4] != b"RIFF" or data[8:12] != b"WAVE"):
+        raise RuntimeError(_WAV_REQUIRED)
+    position = 12
+    while position + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, position)
+        if chunk_id == b"fmt ":
+            if position + 24 > len(data):
+                return None
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, position + 8)
+            if (audio_format, channels, sample_rate, bits) != (1, 1, WHISPER_SAMPLE_RATE, 16):
+                raise RuntimeError(_WAV_REQUIRED)
+        elif chunk_id == b"data":
+            return data[position + 8:]
+        position += 8 + size + (size & 1)
+    if len(data) > _WAV_HEADER_LIMIT:
+        raise RuntimeError("No se encontró el bloque de datos del archivo WAV.")
+    return None
+
+
+def _quiet_cut(pcm: bytes, sample_rate: int, search_seconds: float = 2.0, frame_seconds: float = 0.05) -> int:
+    """
+    Devuelve el byte por el que cortar `pcm`: el tramo más silencioso de sus últimos
+    `search_seconds`, para no partir una palabra entre dos ventanas.
+    """
+    samples = array("h", pcm[:len(pcm) - len(pcm) % 2])
+    frame = max(1, int(sample_rate * frame_seconds))
+    first = max(0, len(samples) - int(sample_rate * search_seconds))
+    best, best_energy = len(samples), None
+    for start in range(first, len(samples) - frame + 1, frame):
+        energy = sum(abs(s) for s in samples[start:start + frame])
+        if best_energy is None or energy < best_energy:
+            best, best_energy = start + frame // 2, energy
+    return best * 2
+
+
+class WhisperLiveSession(LiveSession):
+    """
+    Sustituto local del websocket: acumula PCM y transcribe cada ventana de
+    `window_seconds` con el modelo Whisper residente, en un hilo aparte para no frenar la
+    captura. Las ventanas se cortan en el momento más silencioso de su último tramo.
+    Con `headerless` recibe PCM sin cabecera (el micrófono); si no, una grabación .wav, y
+    cualquier otro formato (comprimido, vídeo) se rechaza en cuanto llegan sus primeros bytes.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = LIVE_WHISPER_WINDOW_SECONDS,
+        sample_rate: int = WHISPER_SAMPLE_RATE,
+        headerless: bool = False,
+    ):
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            raise RuntimeError(f"El motor Whisper en vivo necesita audio a {WHISPER_SAMPLE_RATE} Hz (LIVE_SAMPLE_RATE).")
+        self.window_seconds = window_seconds
+        self.sample_rate = sample_rate
+        self._buffer = bytearray()
+        self._offset = 0.0
+        # Bytes del principio de la grabación hasta completar la cabecera del .wav.
+        self._header: Optional[bytearray] = None if headerless else bytearray()
+        self._windows: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+
+    def start(self, on_words: Callable[[List[dict]], None]):
+        from transcription_backends import get_backend
+
+        engine = get_backend("whisper")
+        model = engine.load()
+
+        def decode():
+            import numpy
+
+            from transcription_backends import whisper_response
+
+            while True:
+                item = self._windows.get()
+                if item is None:
+                    return
+                offset, pcm = item
+                try:
+                    audio = numpy.frombuffer(pcm, dtype=numpy.int16).astype(numpy.float32) / 32768.0
+                    segments, info = model.transcribe(
+                        audio, language=engine.language or None, beam_size=engine.beam_size,
+                        word_timestamps=True, vad_filter=engine.vad,
+                    )
+                    words = whisper_response(segments, info, engine.model)["results"]["channels"][0]["alternatives"][0]["words"]
+                except Exception as e:
+                    self.error = e
+                    logger.exception("Error al transcribir una ventana en vivo con Whisper")
+                    continue
+                for word in words:
+                    word["start"] += offset
+                    word["end"] += offset
+                if words:
+                    on_words(words)
+
+        self._thread = threading.Thread(target=decode, name="whisper-live", daemon=True)
+        self._thread.start()
+
+    def send(self, chunk: bytes):
+        if self.error:
+            raise RuntimeError(f"Whisper falló en la transcripción en vivo: {self.error}")
+        if self._header is not None:
+            self._header += chunk
+            pcm = _pcm_from_wav(bytes(self._header))
+            if pcm is None:
+                return
+            self._header = None
+            chunk = pcm
+        self._buffer += chunk
+        window_bytes = int(self.window_seconds * self.sample_rate) * 2
+        while len(self._buffer) >= window_bytes:
+            cut = _quiet_cut(bytes(self._buffer[:window_bytes]), self.sample_rate)
+            self._emit(cut)
+
+    def _emit(self, cut: int):
+        self._windows.put((self._offset, bytes(self._buffer[:cut])))
+        self._offset += cut / 2 / self.sample_rate
+        del self._buffer[:cut]
+
+    def finish(self):
+        if self._buffer:
+            self._emit(len(self._buffer) - len(self._buffer) % 2)
+        self._windows.put(None)
+        if self._thread is not None:
+            self._thread.join()
+
+
+def create_session(
+    backend: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    source_path: Optional[str] = None,
+) -> LiveSession:
+    """
+    Crea la sesión del motor `backend` (por defecto, LIVE_BACKEND). `sample_rate` solo para
+    PCM sin cabecera. Con `source_path` (la grabación que se va a leer) se rechaza de entrada
+    un formato que el motor no puede recibir.
+    """
+    backend = (backend or LIVE_BACKEND).lower()
+    if backend == "deepgram":
+        return DeepgramLiveSession(sample_rate)
+    if backend == "whisper":
+        if source_path is not None and os.path.splitext(source_path)[1].lower() != ".wav":
+            raise RuntimeError(f"{os.path.basename(source_path)}: {_WAV_REQUIRED}")
+        return WhisperLiveSession(sample_rate=sample_rate or WHISPER_SAMPLE_RATE, headerless=sample_rate is not None)
+    raise ValueError(f"Motor de transcripción en vivo desconocido: '{backend}'. Opciones: deepgram, whisper.")
+
+
+# --- Transcripción y acta incremental ---
+
+class LiveMinutes:
+    """
+    Transcripción y borrador del acta de una reunión en curso. `add_words` se llama desde el
+    hilo del motor; `on_transcript(texto_nuevo)` y `on_draft(borrador, definitivo)` se invocan
+    desde hilos de trabajo, así que una interfaz gráfica debe pasar los cambios a su hilo.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model_name: str,
+        user_context: str = "",
+        params: Optional[dict] = None,
+        draft_interval: float = LIVE_DRAFT_INTERVAL_SECONDS,
+        on_transcript: Optional[Callable[[str], None]] = None,
+        on_draft: Optional[Callable[[str, bool], None]] = None,
+    ):
+        self.provider = provider
+        self.model_name = model_name
+        self.user_context = user_context
+        self.params = params if params is not None else dict(DEFAULT_GENERATION_PARAMS)
+        self.draft_interval = draft_interval
+        self.on_transcript = on_transcript
+        self.on_draft = on_draft
+
+        self.words: List[dict] = []
+        self.draft = ""
+        self._parts: List[str] = []
+        self._chars = 0
+        self._drafted_chars = 0
+        self._last_speaker = None
+        self._last_end = None
+        self._last_draft_at = time.monotonic()
+        self._draft_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def text(self) -> str:
+        with self._lock:
+            return "".join(self._parts)
+
+    def transcript(self) -> Transcript:
+        """La transcripción completa, con tiempos y hablantes."""
+        with self._lock:
+            return Transcript.from_words(list(self.words))
+
+    def _format(self, words: List[dict]) -> str:
+        # Mismo formato que Transcript.render: un párrafo por turno, "Hablante N: ...".
+        pieces = []
+        for word in words:
+            speaker = word.get("speaker")
+            text = word.get("punctuated_word") or word.get("word", "")
+            new_turn = speaker != self._last_speaker or (
+                speaker is None and self._last_end is not None and word.get("start", 0.0) - self._last_end >= PARAGRAPH_PAUSE_SECONDS
+            )
+            if self._last_end is None:
+                prefix = ""
+            else:
+                prefix = "\n\n" if new_turn else " "
+            if new_turn and speaker is not None:
+                prefix += f"Hablante {speaker}: "
+            pieces.append(prefix + text)
+            self._last_speaker = speaker
+            self._last_end = word.get("end", 0.0)
+        return "".join(pieces)
+
+    def add_words(self, words: List[dict]):
+        """Incorpora palabras definitivas y, si toca, lanza la actualización del borrador."""
+        with self._lock:
+            self.words.extend(words)
+            text = self._format(words)
+            self._parts.append(text)
+            self._chars += len(text)
+        if self.on_transcript is not None and text:
+            self.on_transcript(text)
+        self.maybe_refresh()
+
+    def maybe_refresh(self):
+        """Actualiza el borrador en segundo plano si ha pasado el intervalo y hay texto nuevo."""
+        with self._lock:
+            due = time.monotonic() - self._last_draft_at >= self.draft_interval
+            busy = self._draft_thread is not None and self._draft_thread.is_alive()
+            if not due or busy or self._chars <= self._drafted_chars:
+                return
+            self._last_draft_at = time.monotonic()
+            self._draft_thread = threading.Thread(target=self._refresh_safely, name="live-draft", daemon=True)
+            self._draft_thread.start()
+
+    def _refresh_safely(self):
+        try:
+            self.refresh()
+        except Exception:
+            # Un borrador fallido no detiene la reunión: se reintenta en el siguiente intervalo.
+            logger.exception("No se pudo actualizar el borrador del acta")
+
+    def refresh(self, final: bool = False) -> str:
+        """Incorpora al borrador el texto transcrito desde la última actualización y lo devuelve."""
+        from llm_processor import update_minutes_draft
+
+        with self._lock:
+            full = "".join(self._parts)
+            new_text = full[self._drafted_chars:]
+            upto = len(full)
+        start = time.perf_counter()
+        draft = update_minutes_draft(
+            self.provider, self.model_name, self.draft, new_text, self.user_context, self.params, final=final
+        )
+        with self._lock:
+            self.draft = draft
+            self._drafted_chars = upto
+        logger.info("%s en %.1fs (%d caracteres nuevos).", "Acta definitiva" if final else "Borrador actualizado", time.perf_counter() - start, len(new_text))
+        if self.on_draft is not None:
+            self.on_draft(draft, final)
+        return draft
+
+    def finish(self) -> str:
+        """Espera al borrador en curso e incorpora lo que falta para obtener el acta definitiva."""
+        thread = self._draft_thread
+        if thread is not None:
+            thread.join()
+        if not self.text.strip():
+            raise RuntimeError("No se transcribió ninguna palabra durante la sesión en vivo.")
+        return self.refresh(final=True)
+
+
+def run_live(chunks: Iterable[bytes], session: LiveSession, minutes: LiveMinutes) -> str:
+    """
+    Envía el audio de `chunks` a `session` hasta que se agota (fin de la grabación o `stop`
+    activado) y devuelve el acta definitiva.
+    """
+    session.start(minutes.add_words)
+    try:
+        for chunk in chunks:
+            session.send(chunk)
+    finally:
+        session.finish()
+    return minutes.finish()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from dotenv import load_dotenv
+
+    from instrumentation import setup_logging
+
+    load_dotenv()
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Transcribe una reunión en vivo y redacta el acta a medida que avanza.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="Grabación en curso (se lee a medida que crece).")
+    source.add_argument("--mic", action="store_true", help="Captura el micrófono (Ctrl+C para terminar).")
+    parser.add_argument("--backend", choices=["deepgram", "whisper"], default=LIVE_BACKEND)
+    parser.add_argument("--provider", default="Ollama", choices=["Ollama", "OpenAI", "Anthropic", "Google"])
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--context", default="")
+    parser.add_argument("--draft-interval", type=float, default=LIVE_DRAFT_INTERVAL_SECONDS)
+    parser.add_argument("--output", default="acta_en_vivo.md", help="Archivo donde se escribe el borrador y el acta final.")
+    args = parser.parse_args()
+
+    def write_draft(draft: str, final: bool):
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(draft)
+        print(f"\n[{'Acta definitiva' if final else 'Borrador'} guardado en {args.output}]\n", file=sys.stderr)
+
+    stop = threading.Event()
+    live = LiveMinutes(args.provider, args.model, args.context, draft_interval=args.draft_interval,
+                       on_transcript=lambda text: print(text, end="", flush=True), on_draft=write_draft)
+    if args.mic:
+        audio, live_session = microphone(stop), create_session(args.backend, LIVE_SAMPLE_RATE)
+    else:
+        audio, live_session = tail_file(args.file, stop), create_session(args.backend, source_path=args.file)
+    try:
+        run_live(audio, live_session, live)
+    except KeyboardInterrupt:
+        # run_live ya cerró la sesión; el generador del micrófono no se puede reanudar, así que se redacta lo que haya.
+        stop.set()
+        live.finish()
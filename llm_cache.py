@@ -0,0 +1,154 @@
+"""
+Memoización de las respuestas del LLM.
+
+Las respuestas se guardan en una `DiskCache` persistente indexada por (proveedor, modelo,
+prompt, parámetros). Como el prompt incluye la fecha del día, una entrada solo se
+reutiliza dentro del mismo día. Además, las peticiones idénticas que llegan a la vez
+desde varios hilos se agrupan: solo la primera llama al proveedor y las demás esperan
+su resultado.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterator, Optional
+
+from config import CACHE_DIR, LLM_CACHE_ENABLED, LLM_CACHE_MAX_BYTES, LLM_CACHE_TTL_SECONDS
+from disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+_llm_cache: Optional[DiskCache] = None
+_llm_cache_lock = threading.Lock()
+
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def get_llm_cache() -> DiskCache:
+    """Devuelve la caché de respuestas del LLM del proceso, creándola la primera vez."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = DiskCache(os.path.join(CACHE_DIR, "llm.sqlite3"), LLM_CACHE_MAX_BYTES, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+        return _llm_cache
+
+
+def llm_cache_key(provider: str, model_name: str, prompt: str, params: dict) -> str:
+    material = {"provider": provider, "model": model_name, "prompt": prompt, "params": params}
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def lookup_generation(key: str) -> Optional[str]:
+    """Devuelve la respuesta guardada bajo `key`, o None si no está en la caché."""
+    blob = get_llm_cache().get(key)
+    return blob.decode('utf-8') if blob is not None else None
+
+
+def store_generation(key: str, result: str):
+    """Guarda `result` bajo `key`; las respuestas vacías se descartan."""
+    if result.strip():
+        get_llm_cache().put(key, result.encode('utf-8'))
+
+
+def cached_generation(key: str, compute: Callable[[], str], use_cache: bool = LLM_CACHE_ENABLED, bypass_cache: bool = False) -> str:
+    """
+    Devuelve la respuesta guardada bajo `key` o la obtiene con `compute()`.
+
+    Con `bypass_cache=True` no se consulta la caché pero el resultado nuevo sí se guarda,
+    sustituyendo al anterior. Las respuestas vacías nunca se guardan. La agrupación de
+    peticiones simultáneas se aplica siempre, también cuando la caché está desactivada.
+    """
+    if use_cache and not bypass_cache:
+        cached = lookup_generation(key)
+        if cached is not None:
+            logger.info("Acta recuperada de la caché.")
+            return cached
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _inflight[key] = future
+
+    if not is_owner:
+        logger.info("Esperando una petición idéntica en curso...")
+        return future.result()
+
+    try:
+        # Otra petición idéntica pudo terminar entre la consulta a la caché y el registro.
+        result = lookup_generation(key) if use_cache and not bypass_cache else None
+        if result is None:
+            result = compute()
+            if use_cache:
+                store_generation(key, result)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+class _Abandoned(Exception):
+    """La petición en streaming que se esperaba se abandonó antes de terminar."""
+
+
+def coalesced_stream(
+    key: str,
+    stream: Callable[[], Iterator[str]],
+    use_cache: bool = LLM_CACHE_ENABLED,
+    bypass_cache: bool = False,
+) -> Iterator[str]:
+    """
+    Equivalente en streaming de `cached_generation`, para una respuesta que ya se buscó en
+    la caché sin encontrarla. La primera petición transmite los fragmentos de `stream()` según
+    llegan y guarda la respuesta completa; las idénticas que llegan mientras tanto esperan y la
+    reciben de una sola vez. Si quien transmite deja de leer (se cancela), la siguiente petición
+    en espera toma el relevo y llama ella al proveedor.
+    """
+    while True:
+        with _inflight_lock:
+            future = _inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                _inflight[key] = future
+        if is_owner:
+            break
+        logger.info("Esperando una petición idéntica en curso...")
+        try:
+            result = future.result()
+        except _Abandoned:
+            continue
+        yield result
+        return
+
+    try:
+        # Otra petición idéntica pudo terminar entre la consulta a la caché y el registro.
+        result = lookup_generation(key) if use_cache and not bypass_cache else None
+        if result is not None:
+            yield result
+        else:
+            parts = []
+            for delta in stream():
+                parts.append(delta)
+                yield delta
+            result = "".join(parts)
+            if use_cache:
+                store_generation(key, result)
+        future.set_result(result)
+    except GeneratorExit:
+        future.set_exception(_Abandoned())
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
@@ -1,27 +1,24 @@
-import os
+from typing import Iterator
 from dotenv import load_dotenv
-import openai
-import anthropic
-import google.generativeai as genai
+from client_registry import get_anthropic_client, get_google_model, get_openai_client
 
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
 
+OPENAI_SYSTEM_PROMPT = "Eres un asistente experto en la creación de actas de reunión en formato Markdown."
+ANTHROPIC_SYSTEM_PROMPT = "Eres un asistente experto en la creación de actas de reunión. Tu tarea es analizar la transcripción y generar un acta formal y detallada en formato Markdown."
+
 # --- Cliente de OpenAI (ChatGPT) ---
 def generate_with_openai(prompt: str, model: str) -> str:
     """Genera una respuesta usando la API de OpenAI."""
     try:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("La clave OPENAI_API_KEY no se encontró en el archivo .env")
-        
-        client = openai.OpenAI(api_key=api_key)
+        client = get_openai_client()
         
         # Para generar Markdown, no forzamos la respuesta JSON
         response = client.chat.completions.create(
             model=model,
             messages=[
-                {"role": "system", "content": "Eres un asistente experto en la creación de actas de reunión en formato Markdown."},
+                {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ]
         )
@@ -30,22 +27,15 @@ def generate_with_openai(prompt: str, model: str) -> str:
         raise RuntimeError(f"Error con la API de OpenAI: {e}")
 
 # --- Cliente de Anthropic (Claude) ---
-def generate_with_anthropic(prompt: str, model: str) -> str:
+def generate_with_anthropic(prompt: str, model: str, max_tokens: int = 4096) -> str:
     """Genera una respuesta usando la API de Anthropic."""
     try:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("La clave ANTHROPIC_API_KEY no se encontró en el archivo .env")
-
-        client = anthropic.Anthropic(api_key=api_key)
-        
-        # Extraer el inicio del prompt para usarlo como 'system' prompt
-        system_prompt = "Eres un asistente experto en la creación de actas de reunión. Tu tarea es analizar la transcripción y generar un acta formal y detallada en formato Markdown."
+        client = get_anthropic_client()
         
         response = client.messages.create(
             model=model,
-            max_tokens=4096,
-            system=system_prompt,
+            max_tokens=max_tokens,
+            system=ANTHROPIC_SYSTEM_PROMPT,
             messages=[
                 {
                     "role": "user",
@@ -62,15 +52,54 @@ def generate_with_anthropic(prompt: str, model: str) -> str:
 def generate_with_google(prompt: str, model: str) -> str:
     """Genera una respuesta usando la API de Google."""
     try:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("La clave GOOGLE_API_KEY no se encontró en el archivo .env")
-
-        genai.configure(api_key=api_key)
-        gemini_model = genai.GenerativeModel(model)
+        gemini_model = get_google_model(model)
         
         # Para generar Markdown, no forzamos la respuesta JSON
         response = gemini_model.generate_content(prompt)
         return response.text or ""
     except Exception as e:
-        raise RuntimeError(f"Error con la API de Google: {e}")
\ No newline at end of file
+        raise RuntimeError(f"Error con la API de Google: {e}")
+
+# --- Variantes en streaming: devuelven el texto a medida que el modelo lo genera ---
+def stream_with_openai(prompt: str, model: str) -> Iterator[str]:
+    """Genera una respuesta con la API de OpenAI, devolviendo fragmentos de texto a medida que llegan."""
+    try:
+        client = get_openai_client()
+        stream = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        raise RuntimeError(f"Error con la API de OpenAI: {e}")
+
+def stream_with_anthropic(prompt: str, model: str, max_tokens: int = 4096) -> Iterator[str]:
+    """Genera una respuesta con la API de Anthropic, devolviendo fragmentos de texto a medida que llegan."""
+    try:
+        client = get_anthropic_client()
+        with client.messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            system=ANTHROPIC_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+    except Exception as e:
+        raise RuntimeError(f"Error con la API de Anthropic: {e}")
+
+def stream_with_google(prompt: str, model: str) -> Iterator[str]:
+    """Genera una respuesta con la API de Google, devolviendo fragmentos de texto a medida que llegan."""
+    try:
+        gemini_model = get_google_model(model)
+        for chunk in gemini_model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+    except Exception as e:
+        raise RuntimeError(f"Error con la API de Google: {e}")
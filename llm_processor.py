@@ -1,69 +1,565 @@
-import ollama
+import logging
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from llm_clients import generate_with_openai, generate_with_anthropic, generate_with_google
+from typing import Iterator, List, Optional, Tuple
+from llm_clients import (
+    generate_with_openai, generate_with_anthropic, generate_with_google,
+    stream_with_openai, stream_with_anthropic, stream_with_google,
+)
+from client_registry import get_ollama_client
+from llm_cache import cached_generation, coalesced_stream, llm_cache_key, lookup_generation, store_generation
+from instrumentation import record_span, setup_logging, span
+from config import (
+    MAP_REDUCE_CHUNK_TOKENS,
+    MAP_REDUCE_CLOUD_THRESHOLD_TOKENS,
+    MAP_REDUCE_MAX_ROUNDS,
+    MAP_REDUCE_MODE,
+    MAP_REDUCE_SUMMARY_TOKENS,
+    MAP_REDUCE_WORKERS,
+    LLM_CACHE_ENABLED,
+    OLLAMA_HOST,
+    OLLAMA_KEEP_ALIVE,
+    PROMPT_COMPACTION_LEVEL,
+)
+from utils import estimate_tokens
 
-OLLAMA_HOST = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
 PROMPT_FILE = os.path.join(os.path.dirname(__file__), 'ollama_prompt_template.txt')
-try:
-    with open(PROMPT_FILE, 'r', encoding='utf-8') as f:
-        OLLAMA_PROMPT_TEMPLATE = f.read()
-except FileNotFoundError:
-    raise RuntimeError(f"Error: El archivo de plantilla del prompt no se encontró en: {PROMPT_FILE}")
+MAP_PROMPT_FILE = os.path.join(os.path.dirname(__file__), 'ollama_map_prompt_template.txt')
+REDUCE_PROMPT_FILE = os.path.join(os.path.dirname(__file__), 'ollama_reduce_prompt_template.txt')
+LIVE_PROMPT_FILE = os.path.join(os.path.dirname(__file__), 'ollama_live_prompt_template.txt')
 
-def generate_minutes(provider: str, model_name: str, transcription_text: str, user_context: str, params: dict) -> str:
+logger = logging.getLogger(__name__)
+
+def _load_template(path: str) -> str:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise RuntimeError(f"Error: El archivo de plantilla del prompt no se encontró en: {path}")
+
+OLLAMA_PROMPT_TEMPLATE = _load_template(PROMPT_FILE)
+MAP_PROMPT_TEMPLATE = _load_template(MAP_PROMPT_FILE)
+REDUCE_PROMPT_TEMPLATE = _load_template(REDUCE_PROMPT_FILE)
+LIVE_PROMPT_TEMPLATE = _load_template(LIVE_PROMPT_FILE)
+
+LIVE_DRAFT_INSTRUCTIONS = "La reunión continúa: es un borrador, no añadas conclusiones ni cierres secciones."
+LIVE_FINAL_INSTRUCTIONS = "La reunión ha terminado: esta es la versión definitiva del acta, formal y completa."
+
+EMPTY_MINUTES_MESSAGE = "El modelo no generó un acta. Por favor, inténtelo de nuevo."
+
+@dataclass
+class GenerationStats:
+    """Métricas de una generación en streaming: tiempo hasta el primer token y velocidad."""
+    provider: str
+    model: str
+    started: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    output_chars: int = 0
+    cached: bool = False
+
+    def record(self, delta: str):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.output_chars += len(delta)
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        return self.first_token_at - self.started if self.first_token_at is not None else None
+
+    @property
+    def total_time(self) -> Optional[float]:
+        return self.finished_at - self.started if self.finished_at is not None else None
+
+    @property
+    def completion_tokens(self) -> int:
+        # Misma aproximación que utils.estimate_tokens (~4 caracteres por token).
+        return self.output_chars // 4
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if self.first_token_at is None or self.finished_at is None or self.finished_at <= self.first_token_at:
+            return None
+        return self.completion_tokens / (self.finished_at - self.first_token_at)
+
+    def summary(self) -> str:
+        if self.cached:
+            return "recuperada de la caché"
+        ttft = f"{self.time_to_first_token:.1f}s" if self.time_to_first_token is not None else "-"
+        tps = f"{self.tokens_per_second:.1f}" if self.tokens_per_second is not None else "-"
+        return f"primer token en {ttft}, {tps} tokens/s, {self.completion_tokens} tokens"
+
+def _call_provider(provider: str, model_name: str, prompt_formatted: str, params: dict) -> str:
+    """Envía el prompt al proveedor indicado y devuelve el texto de la respuesta."""
+    with span("llm_generation", provider=provider, model=model_name) as s:
+        result = _request_provider(provider, model_name, prompt_formatted, params)
+        if s.recording:
+            s.set(prompt_tokens=estimate_tokens(prompt_formatted), completion_tokens=estimate_tokens(result))
+        return result
+
+def _request_provider(provider: str, model_name: str, prompt_formatted: str, params: dict) -> str:
+    if provider == "Ollama":
+        client = get_ollama_client(OLLAMA_HOST)
+        response = client.generate(
+            model=model_name,
+            prompt=prompt_formatted,
+            options={
+                "temperature": params.get("temperature"),
+                "num_predict": params.get("num_predict"),
+                "num_ctx": params.get("num_ctx")
+            },
+            keep_alive=OLLAMA_KEEP_ALIVE
+            # ¡Ya no forzamos el formato JSON!
+        )
+        return response.get('response', '')
+
+    # La lógica para otros proveedores se puede adaptar para que también devuelvan Markdown
+    elif provider == "OpenAI":
+        # Nota: generate_with_openai necesita ser adaptado para no forzar JSON
+        return generate_with_openai(prompt_formatted, model_name)
+    elif provider == "Anthropic":
+        # Nota: generate_with_anthropic necesita ser adaptado para no forzar JSON
+        return generate_with_anthropic(prompt_formatted, model_name, max_tokens=params.get("max_tokens", 4096))
+    elif provider == "Google":
+         # Nota: generate_with_google necesita ser adaptado para no forzar JSON
+        return generate_with_google(prompt_formatted, model_name)
+    else:
+        raise ValueError(f"Proveedor de LLM no reconocido: {provider}")
+
+def _stream_provider(provider: str, model_name: str, prompt_formatted: str, params: dict) -> Iterator[str]:
+    """Como `_call_provider`, pero devuelve el texto en fragmentos a medida que el modelo lo genera."""
+    if provider == "Ollama":
+        client = get_ollama_client(OLLAMA_HOST)
+        stream = client.generate(
+            model=model_name,
+            prompt=prompt_formatted,
+            options={
+                "temperature": params.get("temperature"),
+                "num_predict": params.get("num_predict"),
+                "num_ctx": params.get("num_ctx")
+            },
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.get('response'):
+                yield chunk['response']
+    elif provider == "OpenAI":
+        yield from stream_with_openai(prompt_formatted, model_name)
+    elif provider == "Anthropic":
+        yield from stream_with_anthropic(prompt_formatted, model_name, max_tokens=params.get("max_tokens", 4096))
+    elif provider == "Google":
+        yield from stream_with_google(prompt_formatted, model_name)
+    else:
+        raise ValueError(f"Proveedor de LLM no reconocido: {provider}")
+
+def split_transcript(text: str, max_tokens: int) -> List[str]:
     """
-    Función principal que despacha la solicitud al proveedor de LLM correcto para generar MARKDOWN.
+    Divide la transcripción en fragmentos de como máximo `max_tokens` tokens estimados.
+    Se corta preferentemente entre líneas (turnos de hablante o párrafos); una línea
+    demasiado larga se corta entre frases y, en último caso, entre palabras.
+    """
+    units = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if estimate_tokens(line) <= max_tokens:
+            units.append(line)
+            continue
+        for sentence in re.split(r'(?<=[.!?…])\s+', line):
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append(sentence)
+                continue
+            words = sentence.split()
+            piece: List[str] = []
+            for word in words:
+                if piece and estimate_tokens(" ".join(piece + [word])) > max_tokens:
+                    units.append(" ".join(piece))
+                    piece = []
+                piece.append(word)
+            if piece:
+                units.append(" ".join(piece))
+
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit in units:
+        unit_tokens = estimate_tokens(unit)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def _prompt_budget(provider: str, params: dict) -> int:
+    """Tokens de prompt que caben en una única llamada al proveedor."""
+    if provider == "Ollama" and params.get("num_ctx"):
+        return params["num_ctx"] - (params.get("num_predict") or 0)
+    return MAP_REDUCE_CLOUD_THRESHOLD_TOKENS
+
+def _needs_map_reduce(provider: str, prompt_formatted: str, params: dict) -> bool:
+    if MAP_REDUCE_MODE == "always":
+        return True
+    if MAP_REDUCE_MODE == "never":
+        return False
+    return estimate_tokens(prompt_formatted) > _prompt_budget(provider, params)
+
+def _map_phase(
+    provider: str,
+    model_name: str,
+    transcription_text: str,
+    user_context: str,
+    params: dict,
+    chunk_tokens: int,
+    workers: int,
+    bypass_cache: bool,
+) -> Tuple[str, dict]:
+    """
+    Fases de división y resumen del modo map-reduce. Devuelve el prompt de combinación
+    (con los resúmenes parciales ya insertados) y las duraciones de ambas fases.
     """
     today_date = datetime.now().strftime("%Y-%m-%d")
-    prompt_formatted = OLLAMA_PROMPT_TEMPLATE.format(
-        user_context=user_context if user_context else "Ninguno.",
-        current_date=today_date, 
-        transcription_text=transcription_text
-    )
+    context = user_context if user_context else "Ninguno."
+    timings = {}
+
+    start = time.perf_counter()
+    chunks = split_transcript(transcription_text, chunk_tokens)
+    timings["split"] = time.perf_counter() - start
+    timings["chunks"] = len(chunks)
+
+    # Los resúmenes parciales son cortos: basta un contexto del tamaño del fragmento más la respuesta.
+    map_params = dict(params)
+    map_params["num_predict"] = MAP_REDUCE_SUMMARY_TOKENS
+    map_params["max_tokens"] = MAP_REDUCE_SUMMARY_TOKENS
+    map_params["num_ctx"] = chunk_tokens + estimate_tokens(MAP_PROMPT_TEMPLATE) + estimate_tokens(context) + MAP_REDUCE_SUMMARY_TOKENS
+
+    def summarize(texts: List[str]) -> List[str]:
+        def summarize_one(index: int) -> str:
+            prompt = MAP_PROMPT_TEMPLATE.format(
+                part_number=index + 1,
+                total_parts=len(texts),
+                user_context=context,
+                transcription_text=texts[index],
+            )
+            key = llm_cache_key(provider, model_name, prompt, map_params)
+            return cached_generation(key, lambda: _call_provider(provider, model_name, prompt, map_params), bypass_cache=bypass_cache)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="map") as pool:
+            return list(pool.map(summarize_one, range(len(texts))))
+
+    start = time.perf_counter()
+    summaries = summarize(chunks)
+    budget = _prompt_budget(provider, params) - estimate_tokens(REDUCE_PROMPT_TEMPLATE) - estimate_tokens(context)
+    rounds = 1
+    size = estimate_tokens("\n\n".join(summaries))
+    while len(summaries) > 1 and size > budget:
+        # OpenAI y Google no siempre respetan max_tokens: si una vuelta no reduce los resúmenes, otra tampoco lo hará.
+        if rounds >= MAP_REDUCE_MAX_ROUNDS:
+            raise RuntimeError(
+                f"Los resúmenes parciales siguen sin caber en el contexto tras {rounds} vueltas "
+                f"({size} tokens estimados, máximo {budget}). Aumente MAP_REDUCE_CHUNK_TOKENS o use un modelo con más contexto."
+            )
+        previous_count, previous_size = len(summaries), size
+        summaries = summarize(split_transcript("\n".join(summaries), chunk_tokens))
+        size = estimate_tokens("\n\n".join(summaries))
+        rounds += 1
+        if len(summaries) >= previous_count and size >= previous_size:
+            raise RuntimeError(
+                f"La vuelta {rounds} de resúmenes no redujo el texto ({previous_size} -> {size} tokens estimados, "
+                f"máximo {budget}). Aumente MAP_REDUCE_CHUNK_TOKENS o reduzca MAP_REDUCE_SUMMARY_TOKENS."
+            )
+    timings["map"] = time.perf_counter() - start
+    timings["map_rounds"] = rounds
+
+    partial_summaries = "\n\n".join(f"### Parte {i + 1}\n{summary.strip()}" for i, summary in enumerate(summaries))
+    reduce_prompt = REDUCE_PROMPT_TEMPLATE.format(user_context=context, current_date=today_date, partial_summaries=partial_summaries)
+    return reduce_prompt, timings
+
+def generate_minutes_map_reduce(
+    provider: str,
+    model_name: str,
+    transcription_text: str,
+    user_context: str,
+    params: dict,
+    chunk_tokens: int = MAP_REDUCE_CHUNK_TOKENS,
+    workers: int = MAP_REDUCE_WORKERS,
+    bypass_cache: bool = False,
+) -> Tuple[str, dict]:
+    """
+    Genera el acta en tres fases para transcripciones que no caben en el contexto del modelo:
+    1. Divide la transcripción en fragmentos de `chunk_tokens` tokens estimados.
+    2. Resume los fragmentos en paralelo (`workers` peticiones simultáneas).
+    3. Combina los resúmenes parciales en el acta final en Markdown.
+    Si los resúmenes parciales tampoco caben en una llamada, se vuelven a resumir por grupos.
+    Devuelve el acta y un diccionario con la duración de cada fase y el número de fragmentos.
+    """
+    prompt, timings = _map_phase(provider, model_name, transcription_text, user_context, params, chunk_tokens, workers, bypass_cache)
+
+    start = time.perf_counter()
+    key = llm_cache_key(provider, model_name, prompt, params)
+    acta_markdown = cached_generation(key, lambda: _call_provider(provider, model_name, prompt, params), bypass_cache=bypass_cache)
+    timings["reduce"] = time.perf_counter() - start
+
+    return acta_markdown, timings
+
+def _compact_transcript(provider: str, model_name: str, transcription_text: str, level: Optional[int]) -> str:
+    """
+    Aplica la compactación configurada (ver `prompt_compaction`) e informa de los tokens ahorrados.
+    El recuento con el tokenizador del modelo (una petición a la API en Anthropic y Google, o la
+    descarga del tokenizador) solo se hace con LOG_LEVEL=DEBUG; si no, se informa de la aproximación local.
+    """
+    level = PROMPT_COMPACTION_LEVEL if level is None else level
+    if level <= 0:
+        return transcription_text
+    from prompt_compaction import compact_for_model
+
+    with span("prompt_compaction", provider=provider, model=model_name, level=level) as s:
+        exact_counts = logger.isEnabledFor(logging.DEBUG)
+        compacted, report = compact_for_model(transcription_text, provider, model_name, level, exact_counts=exact_counts)
+        s.set(tokens_before=report.tokens_before.tokens, tokens_after=report.tokens_after.tokens)
+    logger.info(report.summary())
+    return compacted
+
+def _format_prompt(transcription_text: str, user_context: str) -> str:
+    with span("prompt_formatting") as s:
+        today_date = datetime.now().strftime("%Y-%m-%d")
+        prompt = OLLAMA_PROMPT_TEMPLATE.format(
+            user_context=user_context if user_context else "Ninguno.",
+            current_date=today_date, 
+            transcription_text=transcription_text
+        )
+        if s.recording:
+            s.set(prompt_tokens=estimate_tokens(prompt))
+        return prompt
+
+def generate_minutes(
+    provider: str,
+    model_name: str,
+    transcription_text: str,
+    user_context: str,
+    params: dict,
+    bypass_cache: bool = False,
+    compaction_level: Optional[int] = None,
+) -> str:
+    """
+    Función principal que despacha la solicitud al proveedor de LLM correcto para generar MARKDOWN.
+    Las respuestas se memorizan en disco (ver `llm_cache`); con `bypass_cache=True` se fuerza
+    una nueva llamada al proveedor. Si el prompt no cabe en el contexto del modelo (o
+    MAP_REDUCE_MODE='always'), el acta se genera por partes con `generate_minutes_map_reduce`.
+    Antes, la transcripción se compacta con `compaction_level` (por defecto, PROMPT_COMPACTION_LEVEL).
+    """
+    transcription_text = _compact_transcript(provider, model_name, transcription_text, compaction_level)
+    prompt_formatted = _format_prompt(transcription_text, user_context)
     
     acta_markdown = ""
 
-    print(f"DEBUG: Enviando solicitud a {provider} con el modelo {model_name}...")
+    logger.info("Enviando solicitud a %s con el modelo %s...", provider, model_name)
 
     try:
-        if provider == "Ollama":
-            client = ollama.Client(host=OLLAMA_HOST)
-            response = client.generate(
-                model=model_name,
-                prompt=prompt_formatted,
-                options={
-                    "temperature": params.get("temperature"),
-                    "num_predict": params.get("num_predict"),
-                    "num_ctx": params.get("num_ctx")
-                }
-                # ¡Ya no forzamos el formato JSON!
+        if _needs_map_reduce(provider, prompt_formatted, params):
+            acta_markdown, timings = generate_minutes_map_reduce(
+                provider, model_name, transcription_text, user_context, params, bypass_cache=bypass_cache
+            )
+            logger.info(
+                f"Acta generada por partes ({timings['chunks']} fragmentos, {timings['map_rounds']} ronda(s)): "
+                f"división {timings['split']:.2f}s, resúmenes {timings['map']:.1f}s, combinación {timings['reduce']:.1f}s."
             )
-            acta_markdown = response.get('response', '')
-        
-        # La lógica para otros proveedores se puede adaptar para que también devuelvan Markdown
-        elif provider == "OpenAI":
-            # Nota: generate_with_openai necesita ser adaptado para no forzar JSON
-            acta_markdown = generate_with_openai(prompt_formatted, model_name) 
-        elif provider == "Anthropic":
-            # Nota: generate_with_anthropic necesita ser adaptado para no forzar JSON
-            acta_markdown = generate_with_anthropic(prompt_formatted, model_name)
-        elif provider == "Google":
-             # Nota: generate_with_google necesita ser adaptado para no forzar JSON
-            acta_markdown = generate_with_google(prompt_formatted, model_name)
         else:
-            raise ValueError(f"Proveedor de LLM no reconocido: {provider}")
+            key = llm_cache_key(provider, model_name, prompt_formatted, params)
+            acta_markdown = cached_generation(
+                key,
+                lambda: _call_provider(provider, model_name, prompt_formatted, params),
+                bypass_cache=bypass_cache,
+            )
 
-        print(f"DEBUG: Respuesta Markdown de {provider}:\n{acta_markdown[:1000]}...")
+        logger.debug("Respuesta Markdown de %s: %d caracteres.", provider, len(acta_markdown))
         
         if not acta_markdown.strip():
-            print(f"ADVERTENCIA: {provider} devolvió una respuesta vacía.")
-            return "El modelo no generó un acta. Por favor, inténtelo de nuevo."
+            logger.warning(f"{provider} devolvió una respuesta vacía.")
+            return EMPTY_MINUTES_MESSAGE
             
         return acta_markdown
 
-    except Exception as e:
-        import traceback
-        print(f"ERROR al procesar con {provider}:")
-        traceback.print_exc()
-        raise e
\ No newline at end of file
+    except Exception:
+        logger.exception("Error al procesar con %s:", provider)
+        raise
+
+def update_minutes_draft(
+    provider: str,
+    model_name: str,
+    current_draft: str,
+    new_transcript: str,
+    user_context: str,
+    params: dict,
+    final: bool = False,
+    compaction_level: Optional[int] = None,
+) -> str:
+    """
+    Actualiza el borrador del acta de una reunión en curso con el tramo nuevo de la
+    transcripción (ver `live_transcription`). El prompt solo contiene el borrador y lo nuevo,
+    así que su tamaño no crece con la duración de la reunión. Con `final=True` se pide la
+    versión definitiva. Los borradores no se guardan en la caché.
+    """
+    new_transcript = _compact_transcript(provider, model_name, new_transcript, compaction_level)
+    with span("prompt_formatting"):
+        prompt = LIVE_PROMPT_TEMPLATE.format(
+            user_context=user_context if user_context else "Ninguno.",
+            current_date=datetime.now().strftime("%Y-%m-%d"),
+            current_draft=current_draft.strip() or "(Todavía vacío.)",
+            transcription_text=new_transcript.strip() or "(Sin intervenciones nuevas.)",
+            stage_instructions=LIVE_FINAL_INSTRUCTIONS if final else LIVE_DRAFT_INSTRUCTIONS,
+        )
+    logger.info("%s con %s/%s...", "Redactando el acta definitiva" if final else "Actualizando el borrador del acta", provider, model_name)
+    draft = _call_provider(provider, model_name, prompt, params)
+    if not draft.strip():
+        logger.warning(f"{provider} devolvió una respuesta vacía; se conserva el borrador anterior.")
+        return current_draft
+    return draft
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def _get_gateway():
+    """Devuelve el `GatewayThread` del proceso, compartido por todos los hilos de trabajo."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            from async_providers import GatewayThread
+            _gateway = GatewayThread()
+        return _gateway
+
+
+def generate_minutes_with_fallback(
+    chain: list,
+    transcription_text: str,
+    user_context: str,
+    params: dict,
+    bypass_cache: bool = False,
+    compaction_level: Optional[int] = None,
+) -> Tuple[str, str]:
+    """
+    Genera el acta probando en orden los eslabones de `chain` (lista de `FallbackStep`) a
+    través de la capa asíncrona: reintentos con espera, límite de concurrencia por proveedor
+    y plazo por eslabón. Devuelve el acta y "Proveedor/modelo" del eslabón que respondió.
+    Si el prompt necesita map-reduce se usa directamente el primer eslabón. Los tokens de la
+    compactación se cuentan con el tokenizador del primer eslabón.
+    """
+    first = chain[0]
+    transcription_text = _compact_transcript(first.provider, first.model, transcription_text, compaction_level)
+    prompt_formatted = _format_prompt(transcription_text, user_context)
+    if _needs_map_reduce(first.provider, prompt_formatted, params):
+        acta_markdown = generate_minutes(first.provider, first.model, transcription_text, user_context, params, bypass_cache, compaction_level=0)
+        return acta_markdown, f"{first.provider}/{first.model}"
+
+    keys = {(step.provider, step.model): llm_cache_key(step.provider, step.model, prompt_formatted, params) for step in chain}
+    if LLM_CACHE_ENABLED and not bypass_cache:
+        for step in chain:
+            cached = lookup_generation(keys[(step.provider, step.model)])
+            if cached is not None:
+                logger.info("Acta recuperada de la caché (%s/%s).", step.provider, step.model)
+                return cached, f"{step.provider}/{step.model}"
+
+    logger.info("Enviando solicitud con respaldo: %s...", " -> ".join(f"{s.provider}/{s.model}" for s in chain))
+    acta_markdown, step = _get_gateway().generate_with_fallback(chain, prompt_formatted, params)
+    if not acta_markdown.strip():
+        logger.warning(f"{step.provider} devolvió una respuesta vacía.")
+        return EMPTY_MINUTES_MESSAGE, f"{step.provider}/{step.model}"
+    if LLM_CACHE_ENABLED:
+        store_generation(keys[(step.provider, step.model)], acta_markdown)
+    return acta_markdown, f"{step.provider}/{step.model}"
+
+def stream_minutes(
+    provider: str,
+    model_name: str,
+    transcription_text: str,
+    user_context: str,
+    params: dict,
+    bypass_cache: bool = False,
+    stats: Optional[GenerationStats] = None,
+    compaction_level: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Igual que `generate_minutes`, pero devuelve el acta en fragmentos a medida que el modelo
+    la genera. Si se pasa `stats`, se rellena con el tiempo hasta el primer token y la
+    velocidad de generación. En modo map-reduce solo se transmite la fase final.
+    Un acta ya presente en la caché se devuelve de una sola vez.
+    """
+    stats = stats if stats is not None else GenerationStats(provider, model_name)
+    transcription_text = _compact_transcript(provider, model_name, transcription_text, compaction_level)
+    prompt_formatted = _format_prompt(transcription_text, user_context)
+    logger.info("Enviando solicitud en streaming a %s con el modelo %s...", provider, model_name)
+
+    if _needs_map_reduce(provider, prompt_formatted, params):
+        prompt_formatted, timings = _map_phase(
+            provider, model_name, transcription_text, user_context, params,
+            MAP_REDUCE_CHUNK_TOKENS, MAP_REDUCE_WORKERS, bypass_cache
+        )
+        logger.info("%d fragmentos resumidos en %.1fs; combinando...", timings['chunks'], timings['map'])
+
+    key = llm_cache_key(provider, model_name, prompt_formatted, params)
+    cached = lookup_generation(key) if LLM_CACHE_ENABLED and not bypass_cache else None
+    if cached is not None:
+        stats.cached = True
+        stats.record(cached)
+        stats.finished_at = time.perf_counter()
+        yield cached
+        return
+
+    parts = []
+    # Las peticiones idénticas simultáneas comparten la llamada: las que esperan reciben el acta entera al terminar.
+    stream = coalesced_stream(key, lambda: _stream_provider(provider, model_name, prompt_formatted, params), bypass_cache=bypass_cache)
+    for delta in stream:
+        stats.record(delta)
+        parts.append(delta)
+        yield delta
+    stats.finished_at = time.perf_counter()
+
+    acta_markdown = "".join(parts)
+    if stats.time_to_first_token is not None:
+        record_span("llm_first_token", stats.time_to_first_token, provider=provider, model=model_name)
+    record_span(
+        "llm_generation", stats.total_time, provider=provider, model=model_name,
+        prompt_tokens=estimate_tokens(prompt_formatted), completion_tokens=stats.completion_tokens,
+    )
+    if not acta_markdown.strip():
+        logger.warning(f"{provider} devolvió una respuesta vacía.")
+        yield EMPTY_MINUTES_MESSAGE
+        return
+
+    logger.info("Acta de %s generada en streaming (%s).", provider, stats.summary())
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from dotenv import load_dotenv
+    from config import DEFAULT_GENERATION_PARAMS
+
+    load_dotenv()
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Genera un acta en Markdown a partir de una transcripción, mostrándola a medida que se genera.")
+    parser.add_argument("transcript", help="Archivo de texto con la transcripción.")
+    parser.add_argument("--provider", default="Ollama", choices=["Ollama", "OpenAI", "Anthropic", "Google"])
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--context", default="")
+    parser.add_argument("--refresh", action="store_true", help="Ignora la caché del LLM.")
+    parser.add_argument("--compaction", type=int, default=PROMPT_COMPACTION_LEVEL, choices=range(0, 4),
+                        help="Nivel de compactación de la transcripción (0-3).")
+    args = parser.parse_args()
+
+    with open(args.transcript, 'r', encoding='utf-8') as f:
+        transcript = f.read()
+
+    run_stats = GenerationStats(args.provider, args.model)
+    for delta in stream_minutes(args.provider, args.model, transcript, args.context, dict(DEFAULT_GENERATION_PARAMS), bypass_cache=args.refresh, stats=run_stats, compaction_level=args.compaction):
+        sys.stdout.write(delta)
+        sys.stdout.flush()
+    print(f"\n\n[{run_stats.summary()}]", file=sys.stderr)
@@ -1,21 +1,26 @@
+import logging
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
+import time
 import os
 from dotenv import load_dotenv
-import traceback
-
-# --- ¡IMPORTACIÓN AÑADIDA! ---
-import ollama
-# -----------------------------
 
 # Cargar variables de entorno del archivo .env al inicio
 load_dotenv()
 
 # Importar funciones de los otros módulos
 from audio_processor import transcribe_audio
-from llm_processor import generate_minutes
+from llm_processor import GenerationStats, stream_minutes
 from pdf_generator import create_meeting_minutes_pdf
+from config import DEFAULT_GENERATION_PARAMS, OLLAMA_HOST
+from client_registry import get_ollama_client, warm_up_ollama_model
+from instrumentation import setup_logging
+from live_transcription import LiveMinutes, create_session, microphone, run_live, tail_file
+from config import LIVE_SAMPLE_RATE, MINUTES_ARCHIVE_DIRS, MINUTES_INDEX_ENABLED
+from minutes_index import MinutesIndex, parse_date
+
+logger = logging.getLogger(__name__)
 
 # --- LISTA DE MODELOS ACTUALIZADA ---
 CLOUD_MODELS = {
@@ -24,6 +29,11 @@ CLOUD_MODELS = {
     "Google": ["gemini-1.5-pro-latest", "gemini-1.5-flash-latest", "gemini-1.0-pro"]
 }
 
+# Intervalo (ms) entre actualizaciones del texto mientras el acta llega en streaming.
+STREAM_FLUSH_INTERVAL_MS = 50
+# Caracteres que se insertan en el texto por cada vuelta del bucle de Tk (ver `_set_text`).
+INSERT_BATCH_CHARS = 32 * 1024
+
 class MeetingMinutesApp:
     def __init__(self, root):
         self.root = root
@@ -32,6 +42,23 @@ class MeetingMinutesApp:
 
         self.audio_file_path = None
         self.ollama_models = []
+
+        # Estado del streaming: el hilo de generación acumula fragmentos y el hilo de Tk los vuelca por lotes.
+        self._stream_lock = threading.Lock()
+        self._stream_buffer = []
+        self._stream_flush_pending = False
+        self._stream_started = False
+
+        # Sesión en vivo: se detiene activando este evento (None si no hay ninguna en curso).
+        self._live_stop = None
+
+        # Tarea larga en curso (transcripción o generación): se cancela activando este evento.
+        self._cancel_event = None
+        self._on_cancel = None
+        # Cada carga por partes de `_set_text` invalida la anterior si aún no había terminado.
+        self._insert_generation = 0
+
+        self._search_panel = None
         
         self._create_widgets()
         self.root.after(100, self._on_provider_select)
@@ -56,6 +83,10 @@ class MeetingMinutesApp:
         self.model_var = tk.StringVar()
         self.model_combobox = ttk.Combobox(config_frame, textvariable=self.model_var, state="readonly")
         self.model_combobox.grid(row=0, column=3, padx=5, pady=5, sticky=(tk.W, tk.E))
+        self.model_combobox.bind("<<ComboboxSelected>>", self._on_model_select)
+
+        self.bypass_cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(config_frame, text="Regenerar el acta sin usar la caché", variable=self.bypass_cache_var).grid(row=1, column=1, columnspan=3, padx=5, pady=5, sticky=tk.W)
         
         # --- Sección 2: Flujo de Trabajo ---
         workflow_frame = ttk.LabelFrame(main_frame, text="2. Flujo de Trabajo", padding="10")
@@ -78,14 +109,35 @@ class MeetingMinutesApp:
         ttk.Label(workflow_frame, text="Paso 2:").grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
         self.generate_from_text_button = ttk.Button(workflow_frame, text="Generar Acta desde Texto", command=self._start_generation, state=tk.DISABLED)
         self.generate_from_text_button.grid(row=2, column=1, columnspan=2, padx=5, pady=5, sticky=(tk.W, tk.E))
+
+        # Transcripción en vivo: del archivo seleccionado mientras se graba o, si no hay ninguno, del micrófono
+        ttk.Label(workflow_frame, text="En vivo:").grid(row=3, column=0, padx=5, pady=5, sticky=tk.W)
+        self.live_button = ttk.Button(workflow_frame, text="Transcripción en Vivo", command=self._toggle_live)
+        self.live_button.grid(row=3, column=1, columnspan=2, padx=5, pady=5, sticky=(tk.W, tk.E))
         
         # --- Sección 3: Transcripción y Acta ---
         output_frame = ttk.LabelFrame(main_frame, text="3. Transcripción / Acta Generada (Editable)", padding="10")
         output_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.output_frame = output_frame
+
+        # Borrador del acta durante la transcripción en vivo (se muestra solo mientras dura la sesión)
+        self.draft_frame = ttk.LabelFrame(main_frame, text="Borrador del Acta (en vivo)", padding="10")
+        draft_scroll = ttk.Scrollbar(self.draft_frame)
+        draft_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.draft_text = tk.Text(self.draft_frame, wrap=tk.WORD, font=("Arial", 10), height=12, yscrollcommand=draft_scroll.set)
+        self.draft_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        draft_scroll.config(command=self.draft_text.yview)
         
         self.status_label = ttk.Label(output_frame, text="Estado: Seleccione un archivo para comenzar.", foreground="blue")
         self.status_label.pack(fill=tk.X, pady=5)
 
+        progress_frame = ttk.Frame(output_frame)
+        progress_frame.pack(fill=tk.X)
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="determinate")
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.cancel_button = ttk.Button(progress_frame, text="Cancelar", command=self._cancel_job, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
         text_scroll = ttk.Scrollbar(output_frame)
         text_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.main_text = tk.Text(output_frame, wrap=tk.WORD, font=("Arial", 10), yscrollcommand=text_scroll.set)
@@ -101,24 +153,17 @@ class MeetingMinutesApp:
         self.copy_button = ttk.Button(action_buttons_frame, text="Copiar al Portapapeles", command=self._copy_to_clipboard, state=tk.DISABLED)
         self.copy_button.pack(side=tk.LEFT, padx=5)
 
+        ttk.Button(action_buttons_frame, text="Buscar en el Archivo", command=self._open_search_panel).pack(side=tk.LEFT, padx=5)
+
     def _on_provider_select(self, event=None):
         provider = self.provider_var.get()
         self.model_var.set('')
         
         if provider == "Ollama":
-            try:
-                client = ollama.Client(host=os.environ.get('OLLAMA_HOST', 'http://localhost:11434'))
-                models_info = client.list()
-                self.ollama_models = [m.model for m in models_info['models']]
-                self.model_combobox['values'] = self.ollama_models
-                if self.ollama_models:
-                    self.model_var.set(self.ollama_models[0])
-                else:
-                    self.model_var.set("No hay modelos Ollama")
-            except Exception as e:
-                self.model_combobox['values'] = []
-                self.model_var.set("Error de conexión")
-                messagebox.showerror("Error de Ollama", f"No se pudo conectar a Ollama: {e}")
+            # La lista de modelos se pide en segundo plano para no bloquear la ventana si Ollama tarda o no responde.
+            self.model_combobox['values'] = []
+            self.model_var.set("Cargando modelos...")
+            threading.Thread(target=self._fetch_ollama_models, daemon=True).start()
         else:
             api_key_name = f"{provider.upper()}_API_KEY"
             if not os.getenv(api_key_name):
@@ -129,6 +174,50 @@ class MeetingMinutesApp:
                 if self.model_combobox['values']:
                     self.model_var.set(self.model_combobox['values'][0])
     
+    def _fetch_ollama_models(self):
+        try:
+            client = get_ollama_client(OLLAMA_HOST)
+            models_info = client.list()
+            models = [m.model for m in models_info['models']]
+            self.root.after(0, lambda: self._apply_ollama_models(models))
+        except Exception as e:
+            message = f"No se pudo conectar a Ollama: {e}"
+
+            def update_gui_error():
+                if self.provider_var.get() != "Ollama":
+                    return
+                self.model_combobox['values'] = []
+                self.model_var.set("Error de conexión")
+                messagebox.showerror("Error de Ollama", message)
+
+            self.root.after(0, update_gui_error)
+
+    def _apply_ollama_models(self, models):
+        # El usuario pudo cambiar de proveedor mientras se consultaba Ollama.
+        if self.provider_var.get() != "Ollama":
+            return
+        self.ollama_models = models
+        self.model_combobox['values'] = self.ollama_models
+        if self.ollama_models:
+            self.model_var.set(self.ollama_models[0])
+            self._on_model_select()
+        else:
+            self.model_var.set("No hay modelos Ollama")
+
+    def _on_model_select(self, event=None):
+        """Precarga en segundo plano el modelo de Ollama elegido para que la primera generación no espere a su carga."""
+        if self.provider_var.get() != "Ollama" or self.model_var.get() not in self.ollama_models:
+            return
+        model_name = self.model_var.get()
+
+        def warm_up():
+            try:
+                warm_up_ollama_model(model_name)
+            except Exception as e:
+                logger.warning("No se pudo precargar el modelo %s: %s", model_name, e)
+
+        threading.Thread(target=warm_up, daemon=True).start()
+
     def _browse_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("Archivos de Audio/Video", "*.mp4 *.mp3 *.wav *.m4a"), ("Todos los Archivos", "*.*")])
         if file_path:
@@ -141,67 +230,298 @@ class MeetingMinutesApp:
         if not self.audio_file_path:
             messagebox.showwarning("Advertencia", "Por favor, seleccione un archivo primero.")
             return
-        self._reset_ui_for_processing("Transcribiendo...")
-        threading.Thread(target=self._transcribe_task).start()
+        cancel = self._start_job("Transcribiendo...")
+        threading.Thread(target=self._transcribe_task, args=(self.audio_file_path, cancel), daemon=True).start()
 
     def _start_generation(self):
-        if not self.main_text.get("1.0", tk.END).strip():
+        if not self._has_text():
             messagebox.showwarning("Advertencia", "No hay texto en la ventana para generar el acta.")
             return
-        self._reset_ui_for_processing("Generando acta...")
-        threading.Thread(target=self._generate_task).start()
+        # Tk no es seguro entre hilos: todo lo que la tarea necesita de la interfaz se copia aquí, en el hilo de Tk.
+        provider = self.provider_var.get()
+        model_name = self.model_var.get()
+        transcription_text = self.main_text.get("1.0", "end-1c")
+        bypass_cache = self.bypass_cache_var.get()
+
+        def restore_transcript():
+            # Si el streaming ya había sustituido la transcripción, se restaura para no perderla.
+            with self._stream_lock:
+                self._stream_buffer.clear()
+            if self._stream_started:
+                self._set_text(transcription_text)
+            # Un volcado que estuviera pendiente ya no debe borrar el texto.
+            self._stream_started = True
+
+        self._stream_started = False
+        cancel = self._start_job("Generando acta...", on_cancel=restore_transcript)
+        threading.Thread(
+            target=self._generate_task,
+            args=(provider, model_name, transcription_text, bypass_cache, cancel, restore_transcript),
+            daemon=True,
+        ).start()
+
+    def _show_transcription_progress(self, cancel, done, total):
+        """En el hilo de Tk: avance de la subida (Deepgram) o de la decodificación (Whisper)."""
+        if cancel is not self._cancel_event:
+            return
+        if done < total:
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", maximum=total, value=done)
+            self.status_label.config(text=f"Estado: Transcribiendo... {done / total:.0%}", foreground="orange")
+        else:
+            # Audio enviado: lo que queda es el trabajo del motor, de duración desconocida.
+            self.progress_bar.config(mode="indeterminate", value=0)
+            self.progress_bar.start(20)
+            self.status_label.config(text="Estado: Esperando la transcripción...", foreground="orange")
+
+    def _transcribe_task(self, audio_path, cancel):
+        last_percent = [-1]
+
+        def on_progress(done, total):
+            # Se llama por cada bloque subido: solo se avisa a Tk cuando cambia el porcentaje.
+            percent = int(100 * done / total)
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self.root.after(0, self._show_transcription_progress, cancel, done, total)
 
-    def _transcribe_task(self):
         try:
-            transcription = transcribe_audio(self.audio_file_path)
-            
+            # Con `cancel`, cancelar detiene la extracción, la subida o la decodificación en curso.
+            transcription = transcribe_audio(audio_path, cancel=cancel, on_progress=on_progress)
+            if cancel.is_set():
+                # Si ya había terminado, la transcripción está en la caché: repetirla no vuelve a costar la llamada.
+                return
+
             def update_gui_success():
-                self.main_text.delete(1.0, tk.END)
-                self.main_text.insert(tk.END, transcription)
-                self.status_label.config(text="Estado: Transcripción completa. Puede editar el texto y luego generar el acta.", foreground="green")
-                self.generate_from_text_button.config(state=tk.NORMAL)
+                def loaded():
+                    self.status_label.config(text="Estado: Transcripción completa. Puede editar el texto y luego generar el acta.", foreground="green")
+                    self._finish_job(cancel)
+
+                # La carga por partes no se puede cancelar a medias: el texto quedaría incompleto.
+                self.cancel_button.config(state=tk.DISABLED)
+                self.status_label.config(text="Estado: Cargando la transcripción...", foreground="orange")
+                self._set_text(transcription, on_done=loaded)
             
             self.root.after(0, update_gui_success)
 
         except Exception as e:
+            if cancel.is_set():
+                return
+
+            message = f"Ocurrió un error: {e}"
+
             def update_gui_error():
-                messagebox.showerror("Error de Transcripción", f"Ocurrió un error: {e}")
-                self.status_label.config(text=f"Estado: Error de transcripción.", foreground="red")
+                messagebox.showerror("Error de Transcripción", message)
+                self.status_label.config(text="Estado: Error de transcripción.", foreground="red")
+                self._finish_job(cancel)
             
             self.root.after(0, update_gui_error)
-            traceback.print_exc()
-        finally:
-            self.root.after(0, self._revert_ui_after_processing)
+            logger.exception("Error de transcripción")
     
-    def _generate_task(self):
+    def _queue_stream_delta(self, delta, cancel=None):
+        """Llamado desde el hilo de generación: acumula el fragmento y programa un volcado si no hay uno pendiente."""
+        with self._stream_lock:
+            # Se comprueba con el cerrojo tomado: tras cancelar, ningún fragmento rezagado llega al texto.
+            if cancel is not None and cancel.is_set():
+                return
+            self._stream_buffer.append(delta)
+            if self._stream_flush_pending:
+                return
+            self._stream_flush_pending = True
+        self.root.after(STREAM_FLUSH_INTERVAL_MS, self._flush_stream)
+
+    def _flush_stream(self):
+        """
+        Se ejecuta en el hilo de Tk: inserta de una vez el texto acumulado desde el último volcado.
+        Si llegó mucho de golpe (p. ej. un acta de la caché), inserta INSERT_BATCH_CHARS y deja el
+        resto para la siguiente vuelta del bucle.
+        """
+        with self._stream_lock:
+            text = "".join(self._stream_buffer)
+            self._stream_buffer.clear()
+            if len(text) > INSERT_BATCH_CHARS:
+                self._stream_buffer.append(text[INSERT_BATCH_CHARS:])
+                text = text[:INSERT_BATCH_CHARS]
+                self.root.after(1, self._flush_stream)
+            else:
+                self._stream_flush_pending = False
+        if not self._stream_started:
+            self.main_text.delete(1.0, tk.END)
+            self._stream_started = True
+        if text:
+            self.main_text.insert(tk.END, text)
+            self.main_text.see(tk.END)
+
+    def _generate_task(self, provider, model_name, transcription_text, bypass_cache, cancel, restore_transcript):
         try:
-            provider = self.provider_var.get()
-            model_name = self.model_var.get()
-            transcription_text = self.main_text.get("1.0", tk.END).strip()
+            transcription_text = transcription_text.strip()
             user_context = "" # El contexto ahora se maneja en el prompt, esta variable puede eliminarse o usarse de otra forma
             
-            params = { "temperature": 0.5, "num_predict": 8192, "num_ctx": 16384 }
-            
-            acta_markdown = generate_minutes(provider, model_name, transcription_text, user_context, params)
+            params = dict(DEFAULT_GENERATION_PARAMS)
+
+            stats = GenerationStats(provider, model_name)
+            stream = stream_minutes(provider, model_name, transcription_text, user_context, params, bypass_cache=bypass_cache, stats=stats)
+            for delta in stream:
+                if cancel.is_set():
+                    # Cerrar el generador corta la respuesta en streaming del proveedor.
+                    stream.close()
+                    return
+                self._queue_stream_delta(delta, cancel)
+            if cancel.is_set():
+                return
             
             def update_gui_success():
-                self.main_text.delete(1.0, tk.END)
-                self.main_text.insert(tk.END, acta_markdown)
+                self._flush_stream()
                 self.export_pdf_button.config(state=tk.NORMAL)
                 self.copy_button.config(state=tk.NORMAL)
-                self.status_label.config(text="Estado: Acta generada. Puede editarla antes de exportar.", foreground="green")
+                self.status_label.config(text=f"Estado: Acta generada ({stats.summary()}). Puede editarla antes de exportar.", foreground="green")
+                self._finish_job(cancel)
 
             self.root.after(0, update_gui_success)
 
         except Exception as e:
+            if cancel.is_set():
+                return
+
+            message = f"Ocurrió un error: {e}"
+
             def update_gui_error():
-                messagebox.showerror("Error de Generación", f"Ocurrió un error: {e}")
-                self.status_label.config(text=f"Estado: Error de generación.", foreground="red")
+                restore_transcript()
+                messagebox.showerror("Error de Generación", message)
+                self.status_label.config(text="Estado: Error de generación.", foreground="red")
+                self._finish_job(cancel)
             
             self.root.after(0, update_gui_error)
-            traceback.print_exc()
+            logger.exception("Error de generación")
+
+    def _is_busy(self):
+        """Indica si hay una transcripción, una generación o una sesión en vivo en curso."""
+        return self._cancel_event is not None or self._live_stop is not None
+
+    def _has_text(self):
+        """Indica si hay algo más que espacios en el texto, sin copiar todo su contenido."""
+        return bool(self.main_text.search(r"\S", "1.0", tk.END, regexp=True))
+
+    def _set_text(self, text, on_done=None):
+        """
+        Sustituye el contenido del texto insertándolo por partes de INSERT_BATCH_CHARS, una por
+        vuelta del bucle de Tk, para que una transcripción de varias horas no congele la ventana.
+        Una llamada posterior cancela la carga que estuviera a medias.
+        """
+        self._insert_generation += 1
+        generation = self._insert_generation
+        self.main_text.delete(1.0, tk.END)
+
+        def insert_batch(position):
+            if generation != self._insert_generation:
+                return
+            self.main_text.insert(tk.END, text[position:position + INSERT_BATCH_CHARS])
+            position += INSERT_BATCH_CHARS
+            if position < len(text):
+                self.progress_bar.stop()
+                self.progress_bar.config(mode="determinate", maximum=len(text), value=position)
+                self.root.after(1, insert_batch, position)
+                return
+            self.progress_bar.config(value=0)
+            if on_done is not None:
+                on_done()
+
+        insert_batch(0)
+
+    def _start_job(self, message, on_cancel=None):
+        """Prepara la interfaz para una tarea larga y devuelve el evento con el que se cancela."""
+        self._reset_ui_for_processing(message)
+        self._cancel_event = threading.Event()
+        self._on_cancel = on_cancel
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar.config(mode="indeterminate")
+        self.progress_bar.start(20)
+        return self._cancel_event
+
+    def _finish_job(self, cancel):
+        """En el hilo de Tk, al terminar la tarea de `cancel`. Si se había cancelado, la interfaz ya se restauró."""
+        if cancel is not self._cancel_event:
+            return
+        self._cancel_event = None
+        self._on_cancel = None
+        self.cancel_button.config(state=tk.DISABLED)
+        self.progress_bar.stop()
+        self.progress_bar.config(mode="determinate", value=0)
+        self._revert_ui_after_processing()
+
+    def _cancel_job(self):
+        """Cancela la tarea en curso: la interfaz queda libre al momento; la transcripción deja de subir o decodificar y el hilo descarta su resultado."""
+        cancel, on_cancel = self._cancel_event, self._on_cancel
+        if cancel is None:
+            return
+        cancel.set()
+        if on_cancel is not None:
+            on_cancel()
+        self._finish_job(cancel)
+        self.status_label.config(text="Estado: Operación cancelada.", foreground="blue")
+
+    def _toggle_live(self):
+        if self._live_stop is not None:
+            self._live_stop.set()
+            self.live_button.config(text="Finalizando...", state=tk.DISABLED)
+            self.status_label.config(text="Estado: Redactando el acta definitiva...", foreground="orange")
+            return
+
+        # Todo lo que se lee de la interfaz se toma aquí, en el hilo de Tk.
+        provider = self.provider_var.get()
+        model_name = self.model_var.get()
+        source = self.audio_file_path
+        self._live_stop = threading.Event()
+        self._reset_ui_for_processing("Transcribiendo en vivo desde " + (os.path.basename(source) if source else "el micrófono") + "...")
+        self.live_button.config(text="Detener y Redactar Acta", state=tk.NORMAL)
+        self.main_text.delete(1.0, tk.END)
+        self.draft_text.delete(1.0, tk.END)
+        self.draft_frame.pack(fill=tk.BOTH, padx=5, pady=5, before=self.output_frame)
+        # El texto transcrito llega por el mismo búfer que el streaming del acta, sin borrar lo ya insertado.
+        self._stream_started = True
+        threading.Thread(target=self._live_task, args=(provider, model_name, source, self._live_stop), daemon=True).start()
+
+    def _show_draft(self, draft, final):
+        def update_gui():
+            self.draft_text.delete(1.0, tk.END)
+            self.draft_text.insert(tk.END, draft)
+        self.root.after(0, update_gui)
+
+    def _live_task(self, provider, model_name, source, stop):
+        try:
+            minutes = LiveMinutes(provider, model_name, params=dict(DEFAULT_GENERATION_PARAMS),
+                                  on_transcript=self._queue_stream_delta, on_draft=self._show_draft)
+            if source:
+                audio, session = tail_file(source, stop), create_session(source_path=source)
+            else:
+                audio, session = microphone(stop), create_session(sample_rate=LIVE_SAMPLE_RATE)
+            final_minutes = run_live(audio, session, minutes)
+
+            def update_gui_success():
+                self._flush_stream()
+                self._set_text(final_minutes)
+                self.export_pdf_button.config(state=tk.NORMAL)
+                self.copy_button.config(state=tk.NORMAL)
+                self.status_label.config(text=f"Estado: Acta generada en vivo ({len(minutes.words)} palabras transcritas). Puede editarla antes de exportar.", foreground="green")
+
+            self.root.after(0, update_gui_success)
+
+        except Exception as e:
+            message = f"Ocurrió un error: {e}"
+
+            def update_gui_error():
+                messagebox.showerror("Error en Vivo", message)
+                self.status_label.config(text="Estado: Error en la transcripción en vivo.", foreground="red")
+
+            self.root.after(0, update_gui_error)
+            logger.exception("Error en la transcripción en vivo")
         finally:
-            self.root.after(0, self._revert_ui_after_processing)
+            def end_live():
+                self._live_stop = None
+                self.draft_frame.pack_forget()
+                self.live_button.config(text="Transcripción en Vivo", state=tk.NORMAL)
+                self._revert_ui_after_processing()
+
+            self.root.after(0, end_live)
 
     def _reset_ui_for_processing(self, message):
         self.status_label.config(text=f"Estado: {message}", foreground="orange")
@@ -209,11 +529,14 @@ class MeetingMinutesApp:
         self.generate_from_text_button.config(state=tk.DISABLED)
         self.export_pdf_button.config(state=tk.DISABLED)
         self.copy_button.config(state=tk.DISABLED)
+        self.live_button.config(state=tk.DISABLED)
 
     def _revert_ui_after_processing(self):
+        if self._live_stop is None:
+            self.live_button.config(state=tk.NORMAL)
         if self.audio_file_path:
             self.transcribe_button.config(state=tk.NORMAL)
-        if self.main_text.get("1.0", tk.END).strip():
+        if self._has_text():
             self.generate_from_text_button.config(state=tk.NORMAL)
         
     def _export_pdf(self):
@@ -223,11 +546,43 @@ class MeetingMinutesApp:
             return
         file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("Archivos PDF", "*.pdf")], initialfile="Acta_de_Reunion.pdf")
         if file_path:
-            try:
-                create_meeting_minutes_pdf(markdown_content, file_path)
+            # La maquetación puede tardar varios segundos en actas largas: se hace fuera del hilo de Tk.
+            self.export_pdf_button.config(state=tk.DISABLED)
+            self.status_label.config(text="Estado: Exportando PDF...", foreground="orange")
+            threading.Thread(target=self._export_pdf_task, args=(markdown_content, file_path), daemon=True).start()
+
+    def _export_pdf_task(self, markdown_content, file_path):
+        try:
+            create_meeting_minutes_pdf(markdown_content, file_path)
+            if MINUTES_INDEX_ENABLED:
+                try:
+                    # El acta exportada queda disponible en "Buscar en el Archivo".
+                    MinutesIndex().index_text(file_path, markdown_content, pdf_path=file_path)
+                except Exception as e:
+                    logger.warning("No se pudo añadir el acta al índice: %s", e)
+
+            def update_gui_success():
+                self.status_label.config(text="Estado: Acta exportada a PDF.", foreground="green")
                 messagebox.showinfo("Éxito", "Acta exportada a PDF con éxito.")
-            except Exception as e:
-                messagebox.showerror("Error al Exportar PDF", f"Ocurrió un error: {e}")
+
+            self.root.after(0, update_gui_success)
+        except Exception as e:
+            message = f"Ocurrió un error: {e}"
+
+            def update_gui_error():
+                self.status_label.config(text="Estado: Error al exportar el PDF.", foreground="red")
+                messagebox.showerror("Error al Exportar PDF", message)
+
+            self.root.after(0, update_gui_error)
+            logger.exception("Error al exportar el PDF a %s", file_path)
+        finally:
+            self.root.after(0, lambda: self.export_pdf_button.config(state=tk.NORMAL))
+
+    def _open_search_panel(self):
+        if self._search_panel is not None and self._search_panel.window.winfo_exists():
+            self._search_panel.window.lift()
+            return
+        self._search_panel = ArchiveSearchPanel(self)
 
     def _copy_to_clipboard(self):
         texto_acta = self.main_text.get(1.0, tk.END)
@@ -235,12 +590,231 @@ class MeetingMinutesApp:
         self.root.clipboard_append(texto_acta)
         messagebox.showinfo("Copiado", "El contenido ha sido copiado al portapapeles.")
 
+
+class ArchiveSearchPanel:
+    """Ventana de búsqueda en el índice del archivo de actas (ver `minutes_index`)."""
+
+    MODES = {
+        "Actas y transcripciones": "search",
+        "Tareas pendientes": "tasks",
+        "Decisiones": "decisions",
+        "Reuniones de la persona": "meetings",
+    }
+    # Encabezados de las columnas de resultados según el modo.
+    HEADINGS = {
+        "search": ("Fecha", "Título", "Tipo", "Fragmento"),
+        "tasks": ("Vence", "Tarea", "Responsable", "Reunión"),
+        "decisions": ("Fecha", "Decisión", "Acordada por", "Reunión"),
+        "meetings": ("Fecha", "Reunión", "Participante", "Rol"),
+    }
+
+    def __init__(self, app):
+        self.app = app
+        self.index = MinutesIndex()
+        self._rows = {}
+
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Buscar en el Archivo de Actas")
+        self.window.geometry("950x650")
+
+        form = ttk.Frame(self.window, padding="10")
+        form.pack(fill=tk.X)
+        form.grid_columnconfigure(1, weight=1)
+        form.grid_columnconfigure(3, weight=1)
+
+        self.query_var = tk.StringVar()
+        self.person_var = tk.StringVar()
+        self.from_var = tk.StringVar()
+        self.to_var = tk.StringVar()
+        self.mode_var = tk.StringVar(value=next(iter(self.MODES)))
+
+        ttk.Label(form, text="Palabras:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        query_entry = ttk.Entry(form, textvariable=self.query_var)
+        query_entry.grid(row=0, column=1, padx=5, pady=5, sticky=(tk.W, tk.E))
+        ttk.Label(form, text="Persona:").grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
+        ttk.Entry(form, textvariable=self.person_var).grid(row=0, column=3, padx=5, pady=5, sticky=(tk.W, tk.E))
+        ttk.Label(form, text="Buscar en:").grid(row=0, column=4, padx=5, pady=5, sticky=tk.W)
+        ttk.Combobox(form, textvariable=self.mode_var, values=list(self.MODES), state="readonly", width=24).grid(row=0, column=5, padx=5, pady=5)
+
+        ttk.Label(form, text="Desde (AAAA-MM-DD):").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        ttk.Entry(form, textvariable=self.from_var, width=12).grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
+        ttk.Label(form, text="Hasta:").grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
+        ttk.Entry(form, textvariable=self.to_var, width=12).grid(row=1, column=3, padx=5, pady=5, sticky=tk.W)
+        ttk.Button(form, text="Buscar", command=self._search).grid(row=1, column=4, padx=5, pady=5, sticky=(tk.W, tk.E))
+        ttk.Button(form, text="Indexar Carpeta...", command=self._index_folder).grid(row=1, column=5, padx=5, pady=5, sticky=(tk.W, tk.E))
+
+        results_frame = ttk.Frame(self.window, padding=(10, 0))
+        results_frame.pack(fill=tk.BOTH, expand=True)
+        results_scroll = ttk.Scrollbar(results_frame)
+        results_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.results = ttk.Treeview(results_frame, columns=("c0", "c1", "c2", "c3"), show="headings", yscrollcommand=results_scroll.set)
+        for column, width in zip(("c0", "c1", "c2", "c3"), (90, 380, 160, 280)):
+            self.results.column(column, width=width, stretch=column != "c0")
+        self.results.pack(fill=tk.BOTH, expand=True)
+        results_scroll.config(command=self.results.yview)
+        self.results.bind("<<TreeviewSelect>>", self._show_preview)
+        self.results.bind("<Double-1>", lambda event: self._open_in_editor())
+
+        self.preview = tk.Text(self.window, wrap=tk.WORD, font=("Arial", 10), height=8)
+        self.preview.pack(fill=tk.X, padx=10, pady=5)
+
+        bottom = ttk.Frame(self.window, padding="10")
+        bottom.pack(fill=tk.X)
+        self.status_label = ttk.Label(bottom, text=self._summary(), foreground="blue")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(bottom, text="Abrir en el Editor", command=self._open_in_editor).pack(side=tk.RIGHT)
+
+        self._set_headings("search")
+        query_entry.bind("<Return>", lambda event: self._search())
+        query_entry.focus_set()
+
+        # Los directorios del archivo configurados se ponen al día en segundo plano (solo lo que ha cambiado).
+        if MINUTES_ARCHIVE_DIRS:
+            threading.Thread(target=self._index_task, args=(list(MINUTES_ARCHIVE_DIRS),), daemon=True).start()
+
+    def _summary(self):
+        stats = self.index.stats()
+        return f"Índice: {stats['minutes']} actas, {stats['transcripts']} transcripciones, {stats['tasks']} tareas, {stats['decisions']} decisiones."
+
+    def _after(self, callback):
+        """Ejecuta `callback` en el hilo de Tk si la ventana sigue abierta."""
+        def run():
+            if self.window.winfo_exists():
+                callback()
+        self.app.root.after(0, run)
+
+    def _set_headings(self, mode):
+        for column, heading in zip(("c0", "c1", "c2", "c3"), self.HEADINGS[mode]):
+            self.results.heading(column, text=heading)
+
+    def _search(self):
+        # Las variables de Tk se leen aquí, en el hilo de Tk; la consulta va en un hilo aparte.
+        mode = self.MODES[self.mode_var.get()]
+        query, person = self.query_var.get().strip(), self.person_var.get().strip()
+        dates = []
+        for label, value in (("Desde", self.from_var.get().strip()), ("Hasta", self.to_var.get().strip())):
+            date = parse_date(value) if value else None
+            if value and date is None:
+                messagebox.showwarning("Fecha no válida", f"'{label}' debe tener el formato AAAA-MM-DD.", parent=self.window)
+                return
+            dates.append(date)
+        if mode == "search" and not query:
+            messagebox.showwarning("Advertencia", "Escriba las palabras que quiere buscar.", parent=self.window)
+            return
+        if mode == "meetings" and not person:
+            messagebox.showwarning("Advertencia", "Indique la persona.", parent=self.window)
+            return
+        self.status_label.config(text="Buscando...", foreground="orange")
+        threading.Thread(target=self._search_task, args=(mode, query, person, dates[0], dates[1]), daemon=True).start()
+
+    def _search_task(self, mode, query, person, date_from, date_to):
+        start = time.perf_counter()
+        try:
+            if mode == "search":
+                rows = self.index.search(query, date_from=date_from, date_to=date_to, limit=200)
+                values = [(r["meeting_date"], r["title"], "Acta" if r["kind"] == "minutes" else "Transcripción", r["snippet"]) for r in rows]
+            elif mode == "tasks":
+                rows = self.index.tasks(person or None, query or None, date_from=date_from, date_to=date_to)
+                values = [(r["due_date"] or r["due_text"] or "-", r["task"], r["owner"] or "-", r["title"]) for r in rows]
+            elif mode == "decisions":
+                rows = self.index.decisions(query or None, person or None, date_from, date_to)
+                values = [(r["meeting_date"], r["decision"], r["agreed_by"] or "-", r["title"]) for r in rows]
+            else:
+                rows = self.index.meetings(person, date_from, date_to)
+                values = [(r["meeting_date"], r["title"], r["name"] + (" (ausente)" if r["absent"] else ""), r["role"] or "-") for r in rows]
+        except Exception as e:
+            message = f"Error en la búsqueda: {e}"
+            self._after(lambda: self.status_label.config(text=message, foreground="red"))
+            logger.exception("Error en la búsqueda del archivo")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+
+        def show():
+            self._set_headings(mode)
+            self.results.delete(*self.results.get_children())
+            self._rows.clear()
+            for row, value in zip(rows, values):
+                iid = self.results.insert("", tk.END, values=[" ".join(str(v).split()) for v in value])
+                self._rows[iid] = row
+            self.preview.delete(1.0, tk.END)
+            self.status_label.config(text=f"{len(rows)} resultado(s) en {elapsed:.0f} ms.", foreground="green")
+
+        self._after(show)
+
+    def _selected_row(self):
+        selection = self.results.selection()
+        return self._rows.get(selection[0]) if selection else None
+
+    def _show_preview(self, event=None):
+        row = self._selected_row()
+        if row is None:
+            return
+        lines = [f"{key}: {value}" for key, value in row.items() if value not in (None, "") and key not in ("id", "doc_id")]
+        self.preview.delete(1.0, tk.END)
+        self.preview.insert(tk.END, "\n".join(lines))
+
+    def _warn_if_busy(self):
+        """El editor no se puede sustituir mientras una tarea escribe en él."""
+        if not self.app._is_busy():
+            return False
+        messagebox.showwarning(
+            "Tarea en curso", "Espere a que termine (o cancele) la tarea en curso antes de abrir un documento.", parent=self.window
+        )
+        return True
+
+    def _open_in_editor(self):
+        row = self._selected_row()
+        if row is None or self._warn_if_busy():
+            return
+        doc_id = row.get("doc_id", row.get("id"))
+
+        def load():
+            document = self.index.document(doc_id)
+
+            def show():
+                if document is None:
+                    messagebox.showwarning("Advertencia", "El documento ya no está en el índice.", parent=self.window)
+                    return
+                # Puede haber empezado una tarea mientras se leía el documento.
+                if self._warn_if_busy():
+                    return
+                self.app._set_text(document["body"])
+                self.app.status_label.config(text=f"Estado: Abierto desde el archivo: {document['title']}.", foreground="green")
+                self.app.export_pdf_button.config(state=tk.NORMAL)
+                self.app.copy_button.config(state=tk.NORMAL)
+
+            self.app.root.after(0, show)
+
+        threading.Thread(target=load, daemon=True).start()
+
+    def _index_folder(self):
+        directory = filedialog.askdirectory(parent=self.window, title="Carpeta con actas (.md) y transcripciones (.txt)")
+        if directory:
+            self.status_label.config(text=f"Indexando {directory}...", foreground="orange")
+            threading.Thread(target=self._index_task, args=([directory],), daemon=True).start()
+
+    def _index_task(self, directories):
+        totals = {"indexed": 0, "unchanged": 0, "removed": 0, "errors": 0}
+        for directory in directories:
+            try:
+                counts = self.index.index_directory(directory)
+            except Exception as e:
+                message = f"Error al indexar {directory}: {e}"
+                self._after(lambda: self.status_label.config(text=message, foreground="red"))
+                logger.exception("Error al indexar %s", directory)
+                return
+            for key in totals:
+                totals[key] += counts[key]
+        message = (f"{totals['indexed']} documento(s) indexados, {totals['unchanged']} sin cambios, "
+                   f"{totals['removed']} eliminados. {self._summary()}")
+        self._after(lambda: self.status_label.config(text=message, foreground="green"))
+
 if __name__ == "__main__":
+    setup_logging()
     try:
         root = tk.Tk()
         app = MeetingMinutesApp(root)
         root.mainloop()
-    except Exception as e:
-        print("--- ERROR FATAL ---")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("--- ERROR FATAL ---")
         input("Presiona Enter para cerrar...")
\ No newline at end of file
@@ -0,0 +1,886 @@
+"""
+Índice local del archivo de actas y transcripciones.
+
+Las actas (`.md`) y transcripciones (`.txt`, `.transcript`) se guardan en una base de datos
+SQLite con:
+- un índice de texto completo FTS5 (sin distinguir mayúsculas ni tildes) sobre el título y el
+  cuerpo de cada documento;
+- tablas con los campos del esquema de `.json`: `participantes` (y `ausentes`),
+  `decisiones_clave_tomadas` y `tareas_pendientes` con `responsable` y `fecha_limite`.
+
+Los campos estructurados se extraen de las secciones del acta en Markdown (encabezados
+"Participantes", "Decisiones", "Tareas pendientes"..., con listas o tablas). Si junto al
+acta hay un `<nombre>.json` con ese esquema, se usa en su lugar.
+
+La indexación es incremental: un archivo solo se vuelve a procesar si cambian su tamaño o
+su fecha de modificación, y los documentos cuyo archivo ha desaparecido se eliminan. Las
+consultas (palabras clave, persona, rango de fechas, decisiones) usan los índices de SQLite
+y tardan milisegundos incluso con miles de actas.
+
+Uso:
+    python minutes_index.py index pdfs/ archivo/
+    python minutes_index.py search "presupuesto migración" --from 2024-01-01
+    python minutes_index.py tasks --person "Ana García"
+    python minutes_index.py decisions proveedor
+    python minutes_index.py serve
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import List, Optional
+
+from config import INDEX_API_HOST, INDEX_API_PORT, MINUTES_ARCHIVE_DIRS, MINUTES_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+MINUTES_EXTENSIONS = (".md",)
+TRANSCRIPT_EXTENSIONS = (".transcript", ".txt")
+
+_TOKENIZER = "unicode61 remove_diacritics 2"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    meeting TEXT NOT NULL,
+    title TEXT NOT NULL,
+    meeting_date TEXT,
+    pdf_path TEXT,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    indexed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_date ON documents (meeting_date);
+CREATE INDEX IF NOT EXISTS documents_meeting ON documents (meeting);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, body, tokenize='{_TOKENIZER}');
+CREATE TABLE IF NOT EXISTS participants (
+    doc_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    role TEXT,
+    absent INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS participants_doc ON participants (doc_id);
+CREATE INDEX IF NOT EXISTS participants_name ON participants (name_key);
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL,
+    decision TEXT NOT NULL,
+    agreed_by TEXT
+);
+CREATE INDEX IF NOT EXISTS decisions_doc ON decisions (doc_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS decisions_fts USING fts5(decision, agreed_by, tokenize='{_TOKENIZER}');
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL,
+    task TEXT NOT NULL,
+    task_key TEXT NOT NULL DEFAULT '',
+    owner TEXT,
+    owner_key TEXT,
+    due_date TEXT,
+    due_text TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_doc ON tasks (doc_id);
+CREATE INDEX IF NOT EXISTS tasks_owner ON tasks (owner_key);
+CREATE INDEX IF NOT EXISTS tasks_due ON tasks (due_date);
+"""
+
+
+# --- Extracción de los campos estructurados ---
+
+_MONTHS = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+_LONG_DATE_RE = re.compile(r"\b(\d{1,2})\s+de\s+(" + "|".join(_MONTHS) + r")\s+(?:de|del)\s+(\d{4})\b", re.IGNORECASE)
+
+# Secciones del esquema y palabras (sin tildes, en minúsculas) de los encabezados que las introducen.
+# "ausentes" va antes que "participantes" para que "Participantes ausentes" caiga en la primera.
+_SECTIONS = (
+    ("ausentes", ("ausente", "absent")),
+    ("participantes", ("participante", "asistente", "attendee", "participant")),
+    ("decisiones_clave_tomadas", ("decision", "acuerdo")),
+    ("tareas_pendientes", ("tarea", "accion", "pendiente", "compromiso", "action item", "task")),
+)
+
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$")
+# Pseudo-encabezado en negrita: "**Participantes:**", con o sin valor a continuación.
+_BOLD_LABEL_RE = re.compile(r"^\s*\*\*(?P<label>[^*]+?):?\*\*:?\s*(?P<value>.*)$")
+_BULLET_RE = re.compile(r"^(?P<indent>\s*)(?:[-*+•]|\d+[.)])\s+(?P<text>.+)$")
+_TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{2,}")
+_EMPHASIS_RE = re.compile(r"(\*\*|__|\*|`)")
+_EMPTY_GROUP_RE = re.compile(r"\(\s*\)|\[\s*\]")
+
+# Fin de un valor etiquetado ("Responsable: Ana García | Fecha: ...").
+_VALUE_END = r"(?=\s*(?:[|;()\[\]]|\s[-–—]\s|,?\s*\b(?:fecha|plazo|vence|responsable)|\.\s|\.?$))"
+_OWNER_RE = re.compile(r"\b(?:responsables?|encargad[oa]s?|asignad[oa]s?(?:\s+a)?)\s*:?\s+(?P<value>.+?)" + _VALUE_END, re.IGNORECASE)
+# "plazo" y "fecha" solo como etiqueta ("Plazo: ..."): sin dos puntos suelen formar parte de la tarea.
+_DUE_RE = re.compile(r"\b(?:fecha\s+l[ií]mite\s*:?|fecha\s*:|plazo\s*:|vence(?:\s+el)?\s*:?|antes\s+del?)\s*(?P<value>.+?)" + _VALUE_END, re.IGNORECASE)
+_AGREED_RE = re.compile(r"\b(?:acordad[oa]s?|aprobad[oa]s?|propuest[oa]s?|decidid[oa]s?)\s+por\s*:?\s+(?P<value>.+?)" + _VALUE_END, re.IGNORECASE)
+# "Ana García: preparar el informe" (nombre corto, con mayúscula, antes de dos puntos).
+_LEADING_NAME_RE = re.compile(r"^(?P<name>[A-ZÁÉÍÓÚÑ][\w.'-]*(?:\s+[A-ZÁÉÍÓÚÑ][\w.'-]*){0,3})\s*:\s+(?P<rest>.+)$")
+
+_UNSPECIFIED = ("no especificad", "no se especific", "no se menciona", "ninguno", "ninguna", "n/a", "no aplica")
+
+
+def normalize_key(text: str) -> str:
+    """Minúsculas y sin tildes, para comparar nombres y palabras de las tareas."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def parse_date(text: str) -> Optional[str]:
+    """Primera fecha de `text` (AAAA-MM-DD, DD/MM/AAAA o "3 de mayo de 2024") en formato ISO, o None."""
+    candidates = []
+    for regex, order in ((_ISO_DATE_RE, "ymd"), (_NUMERIC_DATE_RE, "dmy"), (_LONG_DATE_RE, "dmy")):
+        match = regex.search(text)
+        if match:
+            candidates.append((match.start(), match.groups(), order))
+    for _, groups, order in sorted(candidates):
+        if order == "ymd":
+            year, month, day = groups
+        else:
+            day, month, year = groups
+        month = _MONTHS.get(month.lower(), None) if not month.isdigit() else int(month)
+        try:
+            return datetime.date(int(year), month, int(day)).isoformat()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _clean(text: str) -> str:
+    text = _EMPTY_GROUP_RE.sub("", _EMPHASIS_RE.sub("", text))
+    # Separadores que quedan al quitar las etiquetas ("Tarea | Responsable: Ana" -> "Tarea |").
+    text = re.sub(r"(?:\s*\|)+\s*", " | ", text)
+    return text.strip(" \t-–—:;,.|")
+
+
+def _specified(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    value = _clean(value)
+    if not value or normalize_key(value).startswith(_UNSPECIFIED):
+        return None
+    return value
+
+
+def _section_for(label: str) -> Optional[str]:
+    key = normalize_key(_clean(label))
+    for section, words in _SECTIONS:
+        if any(word in key for word in words):
+            return section
+    return None
+
+
+def _take(regex: re.Pattern, text: str):
+    """Devuelve (valor, texto sin la etiqueta) para la primera coincidencia de `regex`."""
+    match = regex.search(text)
+    if not match:
+        return None, text
+    return match.group("value"), (text[:match.start()] + text[match.end():])
+
+
+def _parse_participant(text: str, absent: bool = False) -> Optional[dict]:
+    text = _EMPHASIS_RE.sub("", text).strip()
+    match = re.match(r"^(?P<name>[^(:,–—]+?)(?:\s*[-–—]\s+|\s*\(|\s*:\s*|\s*,\s*)(?P<role>.*?)\)?\s*$", text)
+    name, role = (match.group("name"), match.group("role")) if match else (text, "")
+    name = _specified(name)
+    if name is None:
+        return None
+    participant = {"nombre": name}
+    if not absent:
+        participant["rol"] = _specified(role) or ""
+    return participant
+
+
+def _parse_decision(text: str) -> Optional[dict]:
+    agreed_by, rest = _take(_AGREED_RE, _EMPHASIS_RE.sub("", text))
+    decision = _clean(rest)
+    if not decision:
+        return None
+    return {"decision": decision, "acordada_por": _specified(agreed_by) or ""}
+
+
+def _take_date(text: str):
+    """Devuelve (fecha ISO, texto sin ella) para la primera fecha reconocible de `text`."""
+    for regex in (_ISO_DATE_RE, _NUMERIC_DATE_RE, _LONG_DATE_RE):
+        match = regex.search(text)
+        if match and parse_date(match.group(0)):
+            return parse_date(match.group(0)), text[:match.start()] + text[match.end():]
+    return None, text
+
+
+def _parse_task(text: str) -> Optional[dict]:
+    text = _EMPHASIS_RE.sub("", text)
+    owner, text = _take(_OWNER_RE, text)
+    due, text = _take(_DUE_RE, text)
+    if owner is None:
+        match = _LEADING_NAME_RE.match(text.strip())
+        if match:
+            owner, text = match.group("name"), match.group("rest")
+    # "Preparar el informe (Ana García, 2024-06-01)": lo que queda entre paréntesis al final.
+    trailing = re.search(r"\(([^()]*)\)\s*\.?\s*$", text)
+    if trailing:
+        for part in trailing.group(1).split(","):
+            if due is None and parse_date(part):
+                due = part
+            elif owner is None and part.strip()[:1].isupper():
+                owner = part
+        text = text[:trailing.start()]
+    if due is None:
+        due, text = _take_date(text)
+    task = _clean(text)
+    if not task:
+        return None
+    return {
+        "tarea": task,
+        "responsable": _specified(owner) or "",
+        "fecha_limite": (parse_date(due) or _specified(due) or "") if due else "",
+    }
+
+
+def _split_names(value: str) -> List[str]:
+    return [name for name in re.split(r",|;|\s+y\s+|\s+and\s+", value) if name.strip()]
+
+
+def _table_items(header: List[str], rows: List[List[str]], section: str) -> List[dict]:
+    """Convierte las filas de una tabla de Markdown en elementos del esquema según sus columnas."""
+    keys = [normalize_key(_clean(cell)) for cell in header]
+
+    def column(*words):
+        for index, key in enumerate(keys):
+            if any(word in key for word in words):
+                return index
+        return None
+
+    items = []
+    for row in rows:
+        cell = lambda index: row[index] if index is not None and index < len(row) else ""  # noqa: E731
+        if section == "tareas_pendientes":
+            task_col = column("tarea", "accion", "descripcion", "task")
+            owner_col = column("responsable", "encargad", "asignad", "owner")
+            due_col = column("fecha", "plazo", "vence", "due")
+            task = _clean(cell(task_col if task_col is not None else 0))
+            if task:
+                due = cell(due_col)
+                items.append({"tarea": task, "responsable": _specified(cell(owner_col)) or "", "fecha_limite": parse_date(due) or _specified(due) or ""})
+        elif section == "decisiones_clave_tomadas":
+            decision_col = column("decision", "acuerdo")
+            agreed_col = column("acordad", "aprobad", "quien")
+            decision = _clean(cell(decision_col if decision_col is not None else 0))
+            if decision:
+                items.append({"decision": decision, "acordada_por": _specified(cell(agreed_col)) or ""})
+        else:
+            name_col = column("nombre", "participante", "name")
+            role_col = column("rol", "cargo", "departamento", "role")
+            name = _specified(cell(name_col if name_col is not None else 0))
+            if name:
+                item = {"nombre": name}
+                if section == "participantes":
+                    item["rol"] = _specified(cell(role_col)) or ""
+                items.append(item)
+    return items
+
+
+def parse_minutes(markdown: str) -> dict:
+    """
+    Extrae de un acta en Markdown los campos del esquema de `.json` que se indexan:
+    `titulo_reunion`, `fecha_reunion` (AAAA-MM-DD o None), `participantes`, `ausentes`,
+    `decisiones_clave_tomadas` y `tareas_pendientes`.
+    """
+    data = {
+        "titulo_reunion": "", "fecha_reunion": None, "participantes": [], "ausentes": [],
+        "decisiones_clave_tomadas": [], "tareas_pendientes": [],
+    }
+    parsers = {
+        "participantes": _parse_participant,
+        "ausentes": lambda text: _parse_participant(text, absent=True),
+        "decisiones_clave_tomadas": _parse_decision,
+        "tareas_pendientes": _parse_task,
+    }
+    section = None
+    items: List[str] = []
+    item_indent = 0
+    table: List[List[str]] = []
+
+    def flush_items():
+        for text in items:
+            item = parsers[section](text)
+            if item is not None:
+                data[section].append(item)
+        items.clear()
+
+    def flush_table():
+        if section is not None and len(table) > 1:
+            data[section].extend(_table_items(table[0], table[1:], section))
+        table.clear()
+
+    for line in markdown.splitlines():
+        heading = _HEADING_RE.match(line)
+        bold = None if heading else _BOLD_LABEL_RE.match(line)
+        label = heading.group(1) if heading else (bold.group("label") if bold else None)
+        if label is not None:
+            if heading and not data["titulo_reunion"] and line.lstrip().startswith("# "):
+                data["titulo_reunion"] = _clean(label)
+            new_section = _section_for(label)
+            if data["fecha_reunion"] is None and bold and "fecha" in normalize_key(label) and "limite" not in normalize_key(label):
+                data["fecha_reunion"] = parse_date(bold.group("value"))
+            if heading or new_section is not None:
+                if section is not None:
+                    flush_items()
+                    flush_table()
+                section = new_section
+                # "**Participantes:** Ana García, Luis Pérez" en una sola línea.
+                value = bold.group("value").strip() if bold else ""
+                if section in ("participantes", "ausentes") and value:
+                    items.extend(_split_names(value))
+                continue
+
+        if data["fecha_reunion"] is None and re.search(r"\bfecha\b", normalize_key(line)) and "limite" not in normalize_key(line):
+            data["fecha_reunion"] = parse_date(line)
+        if section is None:
+            continue
+
+        if line.lstrip().startswith("|"):
+            if not _TABLE_SEPARATOR_RE.match(line.strip().strip("|")):
+                table.append([cell.strip() for cell in line.strip().strip("|").split("|")])
+            continue
+        flush_table()
+
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            indent = len(bullet.group("indent").expandtabs(4))
+            text = bullet.group("text")
+            if items and indent > item_indent:
+                # Una sub-viñeta ("- Responsable: Ana") completa el elemento anterior.
+                items[-1] += " | " + text
+            else:
+                items.append(text)
+                item_indent = indent
+        elif items and line.strip() and line.startswith((" ", "\t")):
+            items[-1] += " " + line.strip()
+
+    if section is not None:
+        flush_items()
+        flush_table()
+    return data
+
+
+def _load_sidecar(path: str) -> Optional[dict]:
+    """Datos del acta en un `<nombre>.json` con el esquema de `.json`, si existe y es válido."""
+    sidecar = os.path.splitext(path)[0] + ".json"
+    if not os.path.isfile(sidecar):
+        return None
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("No se pudo leer %s: %s", sidecar, e)
+        return None
+    if not isinstance(data, dict):
+        return None
+    data["fecha_reunion"] = parse_date(str(data.get("fecha_reunion") or ""))
+    for task in data.get("tareas_pendientes") or ():
+        task["fecha_limite"] = parse_date(str(task.get("fecha_limite") or "")) or _specified(str(task.get("fecha_limite") or "")) or ""
+    return data
+
+
+def _fts_query(text: str) -> str:
+    """Convierte lo que escribe el usuario en una consulta FTS5 segura: todas las palabras, `pala*` como prefijo."""
+    terms = []
+    for word, prefix in re.findall(r"(\w+)(\*?)", text):
+        terms.append(f'"{word}"{prefix}')
+    return " ".join(terms)
+
+
+# --- Índice ---
+
+class MinutesIndex:
+    def __init__(self, path: str = MINUTES_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+            if "task_key" not in columns:
+                # Índices creados antes de que existiera `task_key`: se añade y se rellena.
+                conn.execute("ALTER TABLE tasks ADD COLUMN task_key TEXT NOT NULL DEFAULT ''")
+                conn.executemany(
+                    "UPDATE tasks SET task_key = ? WHERE id = ?",
+                    [(normalize_key(row["task"]), row["id"]) for row in conn.execute("SELECT id, task FROM tasks").fetchall()],
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por hilo: los objetos de sqlite3 no deben compartirse entre hilos.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Ingesta ---
+
+    def _delete(self, conn: sqlite3.Connection, doc_id: int):
+        decision_ids = [row[0] for row in conn.execute("SELECT id FROM decisions WHERE doc_id = ?", (doc_id,))]
+        conn.executemany("DELETE FROM decisions_fts WHERE rowid = ?", [(i,) for i in decision_ids])
+        conn.execute("DELETE FROM decisions WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM tasks WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM participants WHERE doc_id = ?", (doc_id,))
+        conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+        conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def index_text(
+        self,
+        path: str,
+        body: str,
+        kind: str = "minutes",
+        meeting: Optional[str] = None,
+        pdf_path: Optional[str] = None,
+        data: Optional[dict] = None,
+        mtime: Optional[float] = None,
+        size: Optional[int] = None,
+    ) -> int:
+        """
+        Indexa (o sustituye) el documento `path` con el contenido `body` y devuelve su id. En
+        las actas, `data` son los campos del esquema; si no se indican, se extraen de `body`.
+        """
+        path = os.path.abspath(path)
+        if mtime is None or size is None:
+            stat = os.stat(path) if os.path.exists(path) else None
+            mtime = stat.st_mtime if stat else time.time()
+            size = stat.st_size if stat else len(body)
+        if kind == "minutes" and data is None:
+            data = parse_minutes(body)
+        data = data or {}
+        meeting = meeting or os.path.splitext(path)[0]
+        title = _clean(str(data.get("titulo_reunion") or "")) or os.path.basename(meeting)
+        # Sin fecha en el acta, se toma la del archivo.
+        meeting_date = data.get("fecha_reunion") or datetime.date.fromtimestamp(mtime).isoformat()
+        if pdf_path is None and os.path.exists(meeting + ".pdf"):
+            pdf_path = meeting + ".pdf"
+
+        conn = self._connection()
+        with conn:
+            row = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                self._delete(conn, row[0])
+            doc_id = conn.execute(
+                "INSERT INTO documents (path, kind, meeting, title, meeting_date, pdf_path, mtime, size, indexed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, kind, meeting, title, meeting_date, pdf_path, mtime, size, time.time()),
+            ).lastrowid
+            conn.execute("INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)", (doc_id, title, body))
+            participants = [(p, 0) for p in data.get("participantes") or ()] + [(p, 1) for p in data.get("ausentes") or ()]
+            conn.executemany(
+                "INSERT INTO participants (doc_id, name, name_key, role, absent) VALUES (?, ?, ?, ?, ?)",
+                [(doc_id, p["nombre"], normalize_key(p["nombre"]), p.get("rol") or None, absent)
+                 for p, absent in participants if isinstance(p, dict) and p.get("nombre")],
+            )
+            for decision in data.get("decisiones_clave_tomadas") or ():
+                if not isinstance(decision, dict) or not decision.get("decision"):
+                    continue
+                decision_id = conn.execute(
+                    "INSERT INTO decisions (doc_id, decision, agreed_by) VALUES (?, ?, ?)",
+                    (doc_id, decision["decision"], decision.get("acordada_por") or None),
+                ).lastrowid
+                conn.execute(
+                    "INSERT INTO decisions_fts (rowid, decision, agreed_by) VALUES (?, ?, ?)",
+                    (decision_id, decision["decision"], decision.get("acordada_por") or ""),
+                )
+            conn.executemany(
+                "INSERT INTO tasks (doc_id, task, task_key, owner, owner_key, due_date, due_text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(doc_id, t["tarea"], normalize_key(str(t["tarea"])), t.get("responsable") or None, normalize_key(t.get("responsable") or "") or None,
+                  parse_date(str(t.get("fecha_limite") or "")), t.get("fecha_limite") or None)
+                 for t in data.get("tareas_pendientes") or () if isinstance(t, dict) and t.get("tarea")],
+            )
+        return doc_id
+
+    def index_file(self, path: str, meeting: Optional[str] = None, pdf_path: Optional[str] = None, force: bool = False) -> bool:
+        """
+        Indexa un acta (.md) o transcripción (.txt, .transcript) si es nueva o ha cambiado
+        desde la última vez. Devuelve True si se ha (re)indexado.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        if not force:
+            row = self._connection().execute("SELECT mtime, size FROM documents WHERE path = ?", (path,)).fetchone()
+            if row is not None and row["mtime"] == stat.st_mtime and row["size"] == stat.st_size:
+                return False
+
+        extension = os.path.splitext(path)[1].lower()
+        data = None
+        if extension == ".transcript":
+            from transcript import Transcript
+
+            with Transcript.load(path) as transcript:
+                body = transcript.render()
+            kind = "transcript"
+        else:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                body = f.read()
+            kind = "minutes" if extension in MINUTES_EXTENSIONS else "transcript"
+            if kind == "minutes":
+                data = _load_sidecar(path) or parse_minutes(body)
+        self.index_text(path, body, kind, meeting, pdf_path, data, stat.st_mtime, stat.st_size)
+        return True
+
+    def index_directory(self, directory: str, prune: bool = True, force: bool = False) -> dict:
+        """
+        Indexa de forma incremental las actas y transcripciones de `directory` (recursivo) y,
+        con `prune`, elimina del índice los documentos de ese directorio que ya no existen.
+        Si hay `.transcript` y `.txt` de la misma reunión, solo se indexa el primero.
+        """
+        start = time.perf_counter()
+        counts = {"indexed": 0, "unchanged": 0, "removed": 0, "errors": 0}
+        directory = os.path.abspath(directory)
+        for root, _, names in os.walk(directory):
+            present = set(names)
+            for name in sorted(names):
+                stem, extension = os.path.splitext(name)
+                extension = extension.lower()
+                if extension not in MINUTES_EXTENSIONS + TRANSCRIPT_EXTENSIONS:
+                    continue
+                if extension == ".txt" and f"{stem}.transcript" in present:
+                    continue
+                try:
+                    counts["indexed" if self.index_file(os.path.join(root, name), force=force) else "unchanged"] += 1
+                except Exception as e:
+                    counts["errors"] += 1
+                    logger.warning("No se pudo indexar %s: %s", os.path.join(root, name), e)
+
+        if prune:
+            conn = self._connection()
+            prefix = directory.rstrip(os.sep) + os.sep
+            with conn:
+                for row in conn.execute("SELECT id, path FROM documents WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)).fetchall():
+                    if not os.path.exists(row["path"]):
+                        self._delete(conn, row["id"])
+                        counts["removed"] += 1
+        counts["seconds"] = time.perf_counter() - start
+        return counts
+
+    # --- Consultas ---
+
+    @staticmethod
+    def _date_filter(column: str, date_from: Optional[str], date_to: Optional[str], where: List[str], values: list):
+        if date_from:
+            where.append(f"{column} >= ?")
+            values.append(date_from)
+        if date_to:
+            where.append(f"{column} <= ?")
+            values.append(date_to)
+
+    def search(
+        self,
+        query: str,
+        kind: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[dict]:
+        """Documentos que contienen todas las palabras de `query`, los más relevantes primero."""
+        match = _fts_query(query)
+        if not match:
+            return []
+        where, values = ["documents_fts MATCH ?"], [match]
+        if kind:
+            where.append("d.kind = ?")
+            values.append(kind)
+        self._date_filter("d.meeting_date", date_from, date_to, where, values)
+        rows = self._connection().execute(
+            "SELECT d.id, d.path, d.kind, d.title, d.meeting_date, d.pdf_path, "
+            "snippet(documents_fts, 1, '[', ']', '…', 16) AS snippet "
+            f"FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid WHERE {' AND '.join(where)} "
+            "ORDER BY bm25(documents_fts) LIMIT ?",
+            (*values, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def tasks(
+        self,
+        person: Optional[str] = None,
+        query: Optional[str] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[dict]:
+        """
+        Tareas pendientes, por responsable (`person`, sin distinguir mayúsculas ni tildes,
+        basta parte del nombre), palabras de la tarea, fecha límite o fecha de la reunión.
+        """
+        where, values = [], []
+        if person:
+            where.append("t.owner_key LIKE ?")
+            values.append(f"%{normalize_key(person)}%")
+        if query:
+            for word in re.findall(r"\w+", normalize_key(query)):
+                where.append("t.task_key LIKE ?")
+                values.append(f"%{word}%")
+        self._date_filter("t.due_date", due_from, due_to, where, values)
+        self._date_filter("d.meeting_date", date_from, date_to, where, values)
+        rows = self._connection().execute(
+            "SELECT t.task, t.owner, t.due_date, t.due_text, d.id AS doc_id, d.title, d.meeting_date, d.path, d.pdf_path "
+            f"FROM tasks t JOIN documents d ON d.id = t.doc_id {'WHERE ' + ' AND '.join(where) if where else ''} "
+            "ORDER BY t.due_date IS NULL, t.due_date, d.meeting_date DESC LIMIT ?",
+            (*values, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def decisions(
+        self,
+        query: Optional[str] = None,
+        person: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[dict]:
+        """Decisiones que contienen las palabras de `query` y/o acordadas por `person`, las más recientes primero."""
+        match = _fts_query(query or "")
+        if person:
+            person_match = " ".join(f"agreed_by : {term}" for term in _fts_query(person).split())
+            match = f"{match} {person_match}".strip()
+        where, values = [], []
+        if match:
+            where.append("decisions_fts MATCH ?")
+            values.append(match)
+        self._date_filter("d.meeting_date", date_from, date_to, where, values)
+        rows = self._connection().execute(
+            "SELECT dec.decision, dec.agreed_by, d.id AS doc_id, d.title, d.meeting_date, d.path, d.pdf_path "
+            "FROM decisions_fts JOIN decisions dec ON dec.id = decisions_fts.rowid JOIN documents d ON d.id = dec.doc_id "
+            f"{'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY d.meeting_date DESC LIMIT ?",
+            (*values, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def meetings(
+        self,
+        person: str,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 200,
+    ) -> List[dict]:
+        """Reuniones en las que participó (o estuvo ausente) `person`, las más recientes primero."""
+        where, values = ["p.name_key LIKE ?"], [f"%{normalize_key(person)}%"]
+        self._date_filter("d.meeting_date", date_from, date_to, where, values)
+        rows = self._connection().execute(
+            "SELECT DISTINCT d.id AS doc_id, d.title, d.meeting_date, d.path, d.pdf_path, p.name, p.role, p.absent "
+            f"FROM participants p JOIN documents d ON d.id = p.doc_id WHERE {' AND '.join(where)} "
+            "ORDER BY d.meeting_date DESC LIMIT ?",
+            (*values, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def document(self, doc_id: int) -> Optional[dict]:
+        """Un documento con su contenido completo."""
+        row = self._connection().execute(
+            "SELECT d.*, f.body FROM documents d JOIN documents_fts f ON f.rowid = d.id WHERE d.id = ?", (doc_id,)
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def stats(self) -> dict:
+        conn = self._connection()
+        kinds = dict(conn.execute("SELECT kind, COUNT(*) FROM documents GROUP BY kind").fetchall())
+        return {
+            "minutes": kinds.get("minutes", 0),
+            "transcripts": kinds.get("transcript", 0),
+            "participants": conn.execute("SELECT COUNT(*) FROM participants").fetchone()[0],
+            "decisions": conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0],
+            "tasks": conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0],
+        }
+
+
+# --- API HTTP ---
+
+def start_index_api(index: MinutesIndex, host: str = INDEX_API_HOST, port: int = INDEX_API_PORT):
+    """
+    Sirve las consultas del índice en http://host:port desde un hilo en segundo plano y
+    devuelve el servidor (con `shutdown()` para detenerlo):
+        GET  /search?q=...&kind=minutes&from=AAAA-MM-DD&to=AAAA-MM-DD
+        GET  /tasks?person=...&q=...&due_from=...&due_to=...&from=...&to=...
+        GET  /decisions?q=...&person=...&from=...&to=...
+        GET  /meetings?person=...&from=...&to=...
+        GET  /documents/<id>
+        GET  /stats
+        POST /index   {"path": "directorio o archivo"}
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class IndexHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            parts = url.path.strip("/").split("/")
+            try:
+                limit = int(query.get("limit", "50"))
+            except ValueError:
+                self._send(400, {"error": "'limit' debe ser un número entero."})
+                return
+            dates = dict(date_from=query.get("from"), date_to=query.get("to"))
+            start = time.perf_counter()
+            if parts == ["search"]:
+                results = index.search(query.get("q", ""), query.get("kind"), limit=limit, **dates)
+            elif parts == ["tasks"]:
+                results = index.tasks(query.get("person"), query.get("q"), query.get("due_from"), query.get("due_to"), limit=limit, **dates)
+            elif parts == ["decisions"]:
+                results = index.decisions(query.get("q"), query.get("person"), limit=limit, **dates)
+            elif parts == ["meetings"]:
+                if not query.get("person"):
+                    self._send(400, {"error": "Falta 'person'."})
+                    return
+                results = index.meetings(query["person"], limit=limit, **dates)
+            elif parts == ["stats"]:
+                self._send(200, index.stats())
+                return
+            elif len(parts) == 2 and parts[0] == "documents" and parts[1].isdigit():
+                document = index.document(int(parts[1]))
+                self._send(200 if document else 404, document or {"error": "Documento no encontrado."})
+                return
+            else:
+                self._send(404, {"error": "Ruta desconocida."})
+                return
+            self._send(200, {"results": results, "milliseconds": (time.perf_counter() - start) * 1000})
+
+        def do_POST(self):
+            if urlparse(self.path).path.strip("/") != "index":
+                self._send(404, {"error": "Ruta desconocida."})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                path = json.loads(self.rfile.read(length) or b"{}").get("path", "")
+            except (ValueError, AttributeError):
+                self._send(400, {"error": "El cuerpo debe ser un objeto JSON con 'path'."})
+                return
+            if os.path.isdir(path):
+                self._send(200, index.index_directory(path))
+            elif os.path.isfile(path):
+                self._send(200, {"indexed": int(index.index_file(path))})
+            else:
+                self._send(400, {"error": f"No existe: {path}"})
+
+    server = ThreadingHTTPServer((host, port), IndexHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="minutes-index-api", daemon=True).start()
+    logger.info("API del índice de actas disponible en http://%s:%d/search", host, server.server_address[1])
+    return server
+
+
+# --- CLI ---
+
+def _print_rows(rows: List[dict], columns: List[str]):
+    for row in rows:
+        print(" | ".join(str(row.get(column) or "-") for column in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Índice de búsqueda del archivo de actas y transcripciones.")
+    parser.add_argument("--index", default=MINUTES_INDEX_PATH, help="Base de datos del índice (por defecto MINUTES_INDEX_PATH).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_cmd = commands.add_parser("index", help="Indexa (de forma incremental) directorios o archivos.")
+    index_cmd.add_argument("paths", nargs="*", help="Por defecto, MINUTES_ARCHIVE_DIRS.")
+    index_cmd.add_argument("--force", action="store_true", help="Reindexa aunque los archivos no hayan cambiado.")
+
+    for name, help_text in (("search", "Busca palabras en actas y transcripciones."), ("tasks", "Tareas pendientes."),
+                            ("decisions", "Decisiones tomadas."), ("meetings", "Reuniones de una persona.")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("query", nargs="?" if name != "search" else None, default=None)
+        command.add_argument("--person")
+        command.add_argument("--from", dest="date_from", help="Fecha de la reunión desde (AAAA-MM-DD).")
+        command.add_argument("--to", dest="date_to", help="Fecha de la reunión hasta (AAAA-MM-DD).")
+        command.add_argument("--limit", type=int, default=50)
+        if name == "search":
+            command.add_argument("--kind", choices=["minutes", "transcript"])
+        if name == "tasks":
+            command.add_argument("--due-from")
+            command.add_argument("--due-to")
+
+    serve = commands.add_parser("serve", help="Sirve la API HTTP de búsqueda.")
+    serve.add_argument("--host", default=INDEX_API_HOST)
+    serve.add_argument("--port", type=int, default=INDEX_API_PORT)
+    commands.add_parser("stats", help="Número de documentos, tareas y decisiones indexados.")
+
+    args = parser.parse_args(argv)
+    from instrumentation import setup_logging
+
+    setup_logging()
+    index = MinutesIndex(args.index)
+
+    if args.command == "index":
+        paths = args.paths or MINUTES_ARCHIVE_DIRS
+        if not paths:
+            parser.error("Indique los directorios a indexar (o defina MINUTES_ARCHIVE_DIRS).")
+        for path in paths:
+            if os.path.isdir(path):
+                counts = index.index_directory(path, force=args.force)
+                print(f"{path}: {counts['indexed']} indexados, {counts['unchanged']} sin cambios, "
+                      f"{counts['removed']} eliminados, {counts['errors']} errores en {counts['seconds']:.2f}s")
+            else:
+                print(f"{path}: {'indexado' if index.index_file(path, force=args.force) else 'sin cambios'}")
+        return 0
+
+    if args.command == "stats":
+        print(json.dumps(index.stats(), indent=2))
+        return 0
+
+    if args.command == "serve":
+        start_index_api(index, args.host, args.port)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.command == "meetings" and not (args.person or args.query):
+        parser.error("Indique la persona.")
+
+    start = time.perf_counter()
+    if args.command == "search":
+        rows = index.search(args.query, args.kind, args.date_from, args.date_to, args.limit)
+        columns = ["meeting_date", "kind", "title", "snippet"]
+    elif args.command == "tasks":
+        rows = index.tasks(args.person, args.query, args.due_from, args.due_to, args.date_from, args.date_to, args.limit)
+        columns = ["due_date", "owner", "task", "title"]
+    elif args.command == "decisions":
+        rows = index.decisions(args.query, args.person, args.date_from, args.date_to, args.limit)
+        columns = ["meeting_date", "decision", "agreed_by", "title"]
+    else:
+        rows = index.meetings(args.person or args.query, args.date_from, args.date_to, args.limit)
+        columns = ["meeting_date", "title", "name", "role"]
+    elapsed = (time.perf_counter() - start) * 1000
+    _print_rows(rows, columns)
+    print(f"{len(rows)} resultado(s) en {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
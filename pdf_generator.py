@@ -1,48 +1,274 @@
-from fpdf import FPDF
+import copy
+import io
+import logging
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
-class PDF(FPDF):
-    def header(self):
-        """Define el encabezado del PDF."""
-        self.set_font('Arial', 'B', 15)
-        self.cell(0, 10, 'Acta de Reunión', 0, 1, 'C')
-        self.ln(10)
+from config import PDF_FONT_PATH, PDF_RENDER_WORKERS
+from instrumentation import span
 
-    def footer(self):
-        """Define el pie de página del PDF."""
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Página {self.page_no()}/{{nb}}', 0, 0, 'C')
+logger = logging.getLogger(__name__)
+
+FONT_FAMILY = "DejaVu"
+# Variantes que se buscan junto a la fuente regular (DejaVuSans.ttf -> DejaVuSans-Bold.ttf, ...).
+_STYLE_SUFFIXES = {"": "", "B": "-Bold", "I": "-Oblique", "BI": "-BoldOblique"}
+
+BODY_FONT_SIZE = 11
+HEADING_FONT_SIZES = {1: 16, 2: 14, 3: 12}
+LINE_HEIGHT = 6
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_LIST_ITEM_RE = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+# Versiones de fpdf2 [desde, hasta) con las que la caché de fuentes produce el mismo PDF que
+# `add_font`. Debe coincidir con el rango de requirements.txt.
+FONT_CACHE_FPDF_VERSIONS = ((2, 8, 6), (2, 9))
+
+@lru_cache(maxsize=None)
+def _pdf_class():
+    """
+    Define la clase PDF la primera vez que se necesita. Importar fpdf2 tarda casi medio
+    segundo, así que no se hace al arrancar la aplicación sino al exportar el primer PDF.
+    """
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def header(self):
+            """Define el encabezado del PDF."""
+            self.set_font('Arial', 'B', 15)
+            self.cell(0, 10, 'Acta de Reunión', 0, 1, 'C')
+            self.ln(10)
+
+        def footer(self):
+            """Define el pie de página del PDF."""
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, f'Página {self.page_no()}/{{nb}}', 0, 0, 'C')
+
+    return PDF
+
+@lru_cache(maxsize=None)
+def _font_files(font_path: str) -> Dict[str, str]:
+    """
+    Devuelve el archivo .ttf de cada estilo. Si falta la variante negrita o cursiva se usa
+    la regular (el texto se ve, pero sin énfasis); si falta la regular es un error.
+    """
+    if not os.path.exists(font_path):
+        raise RuntimeError(
+            f"No se encontró la fuente {font_path}. Descárgala desde https://dejavu-fonts.github.io/ "
+            "o indica otra con PDF_FONT_PATH."
+        )
+    stem, ext = os.path.splitext(font_path)
+    files = {}
+    missing = []
+    for style, suffix in _STYLE_SUFFIXES.items():
+        candidate = f"{stem}{suffix}{ext}"
+        if os.path.exists(candidate):
+            files[style] = candidate
+        else:
+            files[style] = font_path
+            missing.append(os.path.basename(candidate))
+    if missing:
+        logger.warning("No se encontraron %s: la negrita y la cursiva se mostrarán con la fuente regular.", ", ".join(missing))
+    return files
+
+@lru_cache(maxsize=None)
+def _parsed_font(path: str, style: str):
+    """
+    Analiza un .ttf una sola vez por proceso. Crear la fuente con `add_font` (tabla cmap y
+    anchos de todos los glifos) cuesta unos 50 ms; copiar la ya analizada, menos de 1 ms.
+    """
+    from fpdf import FPDF
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    pdf = FPDF()
+    pdf.add_font(FONT_FAMILY, style, path)
+    return pdf.fonts[f"{FONT_FAMILY.lower()}{style}"], data
+
+@lru_cache(maxsize=None)
+def _font_cache_supported() -> bool:
+    """
+    La copia de fuentes de `_add_fonts` toca atributos internos de `TTFFont`, así que solo
+    se usa con las versiones de fpdf2 comprobadas (FONT_CACHE_FPDF_VERSIONS, y
+    benchmarks/check_pdf_render.py para verificar una nueva); con otras se usa `add_font`.
+    """
+    import fpdf
+
+    version = tuple(int(part) for part in re.findall(r"\d+", fpdf.FPDF_VERSION)[:3])
+    low, high = FONT_CACHE_FPDF_VERSIONS
+    if low <= version < high:
+        return True
+    logger.info("fpdf2 %s no está comprobado con la caché de fuentes: se usa add_font (más lento).", fpdf.FPDF_VERSION)
+    return False
+
+def _add_fonts(pdf, font_path: str = PDF_FONT_PATH, cached: bool = True):
+    """
+    Registra en `pdf` los cuatro estilos de la fuente reutilizando las métricas ya analizadas.
+    Con `cached=False` (o una versión de fpdf2 no comprobada) se cargan con `add_font`.
+    """
+    if not cached or not _font_cache_supported():
+        for style, path in _font_files(font_path).items():
+            pdf.add_font(FONT_FAMILY, style, path)
+        return
+
+    from fontTools import ttLib
+    from fpdf.fonts import SubsetMap
+
+    for style, path in _font_files(font_path).items():
+        parsed, data = _parsed_font(path, style)
+        if parsed.color_font is not None or parsed.is_cff:
+            # Estas fuentes guardan estado ligado al documento: se cargan de la forma normal.
+            pdf.add_font(FONT_FAMILY, style, path)
+            continue
+        font = copy.copy(parsed)
+        # Cada documento necesita su propio TTFont: al guardar, fpdf2 lo recorta en el sitio
+        # para incrustar solo los glifos usados (subsetting). Abrirlo en modo lazy es inmediato.
+        font.ttfont = ttLib.TTFont(io.BytesIO(data), recalcTimestamp=False, lazy=True)
+        font.i = len(pdf.fonts) + 1
+        font.subset = SubsetMap(font)
+        font.missing_glyphs = []
+        font.biggest_size_pt = 0
+        font._hbfont = None
+        pdf.fonts[font.fontkey] = font
+
+def _write_markdown(pdf, markdown_text: str):
+    """
+    Escribe el Markdown del acta: encabezados (#), listas (-, *, 1.), separadores (---) y
+    párrafos. Dentro de cada línea, fpdf2 interpreta **negrita** y __cursiva__.
+    """
+    from fpdf.enums import XPos, YPos
+
+    def paragraph(text: str, indent: float = 0.0, bullet: Optional[str] = None):
+        pdf.set_x(pdf.l_margin + indent)
+        if bullet is not None:
+            pdf.cell(6, LINE_HEIGHT, bullet)
+        pdf.multi_cell(0, LINE_HEIGHT, text, markdown=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    for line in markdown_text.splitlines():
+        if not line.strip():
+            pdf.ln(LINE_HEIGHT / 2)
+            continue
+
+        if _RULE_RE.match(line):
+            pdf.ln(2)
+            pdf.line(pdf.l_margin, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+            pdf.ln(2)
+            continue
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            pdf.ln(2)
+            pdf.set_font(FONT_FAMILY, 'B', HEADING_FONT_SIZES.get(level, BODY_FONT_SIZE))
+            pdf.multi_cell(0, LINE_HEIGHT + 2, heading.group(2).replace("**", ""), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf.set_font(FONT_FAMILY, '', BODY_FONT_SIZE)
+            continue
+
+        item = _LIST_ITEM_RE.match(line)
+        if item:
+            depth = len(item.group(1).expandtabs(4)) // 2
+            marker = item.group(2)
+            paragraph(item.group(3), indent=4 + 6 * depth, bullet="•" if marker in "-*+" else marker)
+            continue
+
+        paragraph(line.strip())
 
 def create_meeting_minutes_pdf(markdown_text: str, output_filepath: str):
     """
     Crea un PDF a partir de un texto en formato Markdown.
+    Si falta la fuente o el texto no se puede maquetar se lanza RuntimeError.
     """
-    pdf = PDF()
+    with span("pdf_render", input_chars=len(markdown_text)) as s:
+        _render_pdf(markdown_text, output_filepath)
+        if s.recording:
+            s.set(output_bytes=os.path.getsize(output_filepath))
+
+def _render_pdf(markdown_text: str, output_filepath: str):
+    from fpdf.errors import FPDFException
+
+    pdf = _pdf_class()()
     pdf.alias_nb_pages()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
-    
+
     # Es crucial usar una fuente que soporte UTF-8 para manejar caracteres especiales
     # como tildes, eñes, etc., que son comunes en español.
+    _add_fonts(pdf)
+    pdf.set_font(FONT_FAMILY, '', BODY_FONT_SIZE)
+
     try:
-        # Intenta añadir la fuente DejaVu. Debes tener el archivo .ttf en la misma carpeta
-        # o en una ruta conocida por FPDF.
-        pdf.add_font('DejaVu', '', 'DejaVuSans.ttf', uni=True)
-        pdf.set_font('DejaVu', '', 11)
-    except RuntimeError:
-        print("ADVERTENCIA: No se encontró la fuente DejaVuSans.ttf. Usando Arial.")
-        print("Los caracteres especiales podrían no mostrarse correctamente.")
-        print("Descarga la fuente desde: https://dejavu-fonts.github.io/")
-        pdf.set_font('Arial', '', 10)
-
-    # Usar la funcionalidad de Markdown de FPDF2
+        _write_markdown(pdf, markdown_text)
+    except FPDFException as e:
+        raise RuntimeError(f"No se pudo maquetar el acta en PDF: {e}")
+
+    pdf.output(output_filepath)
+
+@dataclass
+class RenderResult:
+    """Resultado de exportar un documento con `render_pdfs`."""
+    output_path: str
+    seconds: float = 0.0
+    output_bytes: int = 0
+    error: Optional[str] = None
+
+def render_pdf_file(markdown_text: str, output_filepath: str) -> RenderResult:
+    """Exporta un documento y devuelve su duración y tamaño. Los errores se devuelven, no se lanzan."""
+    start = time.perf_counter()
     try:
-        pdf.write_markdown(markdown_text)
+        create_meeting_minutes_pdf(markdown_text, output_filepath)
+        return RenderResult(output_filepath, time.perf_counter() - start, os.path.getsize(output_filepath))
     except Exception as e:
-        print(f"Error al procesar Markdown para el PDF: {e}")
-        # Si falla el Markdown, lo escribimos como texto plano como respaldo.
-        pdf.set_font('Arial', '', 10)
-        pdf.multi_cell(0, 5, markdown_text)
-    
-    pdf.output(output_filepath)
\ No newline at end of file
+        return RenderResult(output_filepath, time.perf_counter() - start, error=str(e))
+
+def _warm_up_worker():
+    # Cada proceso analiza la fuente al arrancar, no al exportar su primer documento.
+    for style, path in _font_files(PDF_FONT_PATH).items():
+        _parsed_font(path, style)
+
+def render_pdfs(documents: Iterable[Tuple[str, str]], workers: int = PDF_RENDER_WORKERS) -> Iterator[RenderResult]:
+    """
+    Exporta muchos documentos (pares `(markdown, ruta_pdf)`) en un grupo de procesos, de modo
+    que la maquetación, que ocupa la CPU, no compite por el GIL. Cada proceso escribe su PDF
+    directamente en disco; los resultados se devuelven a medida que terminan, no en orden.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up_worker) as pool:
+        futures = [pool.submit(render_pdf_file, markdown_text, output_path) for markdown_text, output_path in documents]
+        for future in as_completed(futures):
+            yield future.result()
+
+if __name__ == "__main__":
+    import argparse
+
+    from instrumentation import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Exporta a PDF una o varias actas en Markdown.")
+    parser.add_argument("inputs", nargs="+", help="Archivos .md con las actas.")
+    parser.add_argument("--output-dir", default="pdfs", help="Directorio de salida de los PDF (por defecto: pdfs).")
+    parser.add_argument("--workers", type=int, default=PDF_RENDER_WORKERS)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    def documents():
+        for path in args.inputs:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield f.read(), os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + ".pdf")
+
+    start = time.perf_counter()
+    failed = 0
+    for result in render_pdfs(documents(), workers=args.workers):
+        if result.error:
+            failed += 1
+            print(f"[ERROR] {result.output_path}: {result.error} ({result.seconds:.2f}s)")
+        else:
+            print(f"[OK] {result.output_path} ({result.seconds:.2f}s, {result.output_bytes / 1024:.0f} KB)")
+    print(f"{len(args.inputs) - failed}/{len(args.inputs)} documentos en {time.perf_counter() - start:.1f}s")
+    raise SystemExit(1 if failed else 0)
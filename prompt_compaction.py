@@ -0,0 +1,400 @@
+"""
+Compactación de la transcripción antes de enviarla al LLM.
+
+La transcripción en bruto incluye muletillas ("eh", "o sea,"), palabras y fragmentos que
+el reconocimiento de voz repite, turnos que solo son asentimientos ("sí, sí, vale") y una
+etiqueta "Hablante N:" por párrafo. Todo eso son tokens de prompt: encarecen las APIs y
+alargan el procesado del prompt (prefill) en Ollama, sin aportar nada al acta.
+
+`compact_transcript` aplica, según el nivel, transformaciones acumulativas:
+
+- 0: ninguna.
+- 1: normaliza espacios y puntuación, quita vacilaciones ("eh", "mmm") y palabras
+  repetidas seguidas ("que que que").
+- 2: además quita fragmentos repetidos (de 2 a 6 palabras, o frases enteras), muletillas
+  entre comas ("bueno,", "o sea,") y los asentimientos que interrumpen a otro hablante.
+- 3: además quita todos los turnos de asentimiento que no responden a una pregunta, une
+  los párrafos seguidos del mismo hablante y abrevia las etiquetas ("H0:" en vez de
+  "Hablante 0:", con una leyenda al principio).
+
+Las listas de palabras dependen del idioma (`LANGUAGES`). `count_tokens` cuenta los tokens
+con el tokenizador del modelo elegido, para informar del ahorro real.
+"""
+import logging
+import os
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from config import OLLAMA_TOKENIZERS, PROMPT_COMPACTION_LANGUAGE, PROMPT_COMPACTION_LEVEL
+from utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVEL = 3
+
+# Longitud máxima (en palabras) de los fragmentos repetidos que se eliminan en el nivel 2.
+MAX_REPEATED_NGRAM = 6
+
+
+@dataclass(frozen=True)
+class CompactionLanguage:
+    """Vocabulario de un idioma para la compactación."""
+    speaker_label: str
+    short_label: str
+    # Sonidos de vacilación: se quitan siempre (nivel 1).
+    hesitations: Tuple[str, ...]
+    # Muletillas: se quitan cuando van entre comas o al principio de una frase (nivel 2).
+    fillers: Tuple[str, ...]
+    # Asentimientos: un turno formado solo por ellos no aporta contenido (niveles 2 y 3).
+    backchannels: Tuple[str, ...]
+    legend: str
+
+
+LANGUAGES: Dict[str, CompactionLanguage] = {
+    "es": CompactionLanguage(
+        speaker_label="Hablante",
+        short_label="H",
+        hesitations=("eh+", "em+", "ehm+", "mm+", "hm+", "uh+m*", "um+", "mhm"),
+        fillers=("bueno", "pues", "o sea", "digamos", "en plan", "a ver", "vamos", "mira", "este"),
+        backchannels=(
+            "sí", "si", "vale", "ok", "okay", "ajá", "aja", "claro", "exacto", "ya", "bien", "vale vale",
+            "perfecto", "de acuerdo", "entiendo", "correcto", "genial", "muy bien", "eso es", "efectivamente",
+        ),
+        legend="(H0, H1... = Hablante 0, Hablante 1...)",
+    ),
+    "en": CompactionLanguage(
+        speaker_label="Speaker",
+        short_label="S",
+        hesitations=("uh+", "um+", "er+m*", "eh+", "mm+", "hm+", "mhm"),
+        fillers=("well", "so", "like", "you know", "i mean", "basically", "actually", "okay so"),
+        backchannels=(
+            "yes", "yeah", "yep", "ok", "okay", "right", "sure", "exactly", "great", "cool", "got it",
+            "i see", "uh huh", "all right", "alright", "good", "perfect", "makes sense", "correct",
+        ),
+        legend="(S0, S1... = Speaker 0, Speaker 1...)",
+    ),
+}
+
+# Etiquetas de hablante reconocidas en la entrada, sea cual sea el idioma de compactación.
+_LABEL_RE = re.compile(r"^(?:Hablante|Speaker|Orador|Locutor)\s+(\S+?):\s*", re.IGNORECASE)
+_SPACES_RE = re.compile(r"[ \t ]+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,.;:!?…)])")
+_REPEATED_PUNCT_RE = re.compile(r"([,;:])(?:\s*[,;:])+")
+_EMPTY_PUNCT_RE = re.compile(r"¿\s*\?|¡\s*!")
+_ORPHAN_COMMA_RE = re.compile(r"(^|[.!?¿¡]\s*)[,;]\s*")
+_DANGLING_COMMA_RE = re.compile(r"[,;]\s*([.!?…]|$)")
+_REPEATED_WORD_RE = re.compile(r"\b(\w+)(?:[,\s]+\1\b)+", re.IGNORECASE)
+_SENTENCE_RE = re.compile(r"[^.!?…]+[.!?…]*\s*")
+_STRIP_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+@lru_cache(maxsize=None)
+def _language_patterns(code: str):
+    language = get_language(code)
+    words = lambda items: "|".join(sorted(items, key=len, reverse=True))
+    hesitation = re.compile(rf"(?:(?<=[\s¿¡])|^)(?:{words(language.hesitations)})\b[,.]?\s*", re.IGNORECASE)
+    filler = re.compile(rf"(^|[,.;:!?¿¡]\s*)(?:{words(map(re.escape, language.fillers))})\s*,\s*", re.IGNORECASE)
+    backchannel = re.compile(rf"\b(?:{words(map(re.escape, language.backchannels))})\b", re.IGNORECASE)
+    return hesitation, filler, backchannel
+
+
+@lru_cache(maxsize=None)
+def _ngram_re(n: int):
+    words = r"\s+".join([r"\w+"] * n)
+    return re.compile(rf"\b({words})(?:[,\s]+\1\b)+", re.IGNORECASE)
+
+
+def get_language(code: str) -> CompactionLanguage:
+    """Devuelve el vocabulario de `code` ("es", "en", "es-ES"...); si no se conoce, el español."""
+    return LANGUAGES.get(code.lower().split("-")[0].split("_")[0], LANGUAGES["es"])
+
+
+def _normalize(text: str, hesitation) -> str:
+    text = _SPACES_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+    text = hesitation.sub("", text)
+    text = _REPEATED_WORD_RE.sub(r"\1", text)
+    return _tidy(text)
+
+
+def _tidy(text: str) -> str:
+    text = _EMPTY_PUNCT_RE.sub("", text)
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+    text = _REPEATED_PUNCT_RE.sub(r"\1", text)
+    text = _ORPHAN_COMMA_RE.sub(r"\1", text)
+    text = _DANGLING_COMMA_RE.sub(lambda m: m.group(1) or ".", text)
+    text = _SPACES_RE.sub(" ", text).strip()
+    return text[:1].upper() + text[1:] if text[:1].islower() and not text.startswith("...") else text
+
+
+def _drop_repetitions(text: str) -> str:
+    for n in range(MAX_REPEATED_NGRAM, 1, -1):
+        text = _ngram_re(n).sub(r"\1", text)
+    sentences = []
+    previous = None
+    for sentence in _SENTENCE_RE.findall(text):
+        key = _STRIP_PUNCT_RE.sub("", sentence).lower().strip()
+        if key and key == previous:
+            continue
+        sentences.append(sentence)
+        previous = key or previous
+    return "".join(sentences)
+
+
+def _is_backchannel(text: str, backchannel) -> bool:
+    return not backchannel.sub("", _STRIP_PUNCT_RE.sub(" ", text)).strip()
+
+
+def _split_paragraphs(text: str) -> List[List[Optional[str]]]:
+    """Divide el texto en párrafos [hablante, texto]; hablante es None si no hay etiqueta."""
+    paragraphs = []
+    for block in re.split(r"\n\s*\n|\n(?=(?:Hablante|Speaker|Orador|Locutor)\s+\S+?:)", text, flags=re.IGNORECASE):
+        block = block.strip()
+        if not block:
+            continue
+        label = _LABEL_RE.match(block)
+        if label:
+            paragraphs.append([label.group(1), block[label.end():]])
+        else:
+            paragraphs.append([None, block])
+    return paragraphs
+
+
+def compact_transcript(text: str, level: int = PROMPT_COMPACTION_LEVEL, language: str = PROMPT_COMPACTION_LANGUAGE) -> str:
+    """Devuelve `text` compactado con el nivel indicado (0-3; ver la documentación del módulo)."""
+    if level <= 0 or not text.strip():
+        return text
+    vocabulary = get_language(language)
+    hesitation, filler, backchannel = _language_patterns(language)
+
+    paragraphs = []
+    for speaker, body in _split_paragraphs(text):
+        body = _normalize(body, hesitation)
+        if level >= 2:
+            body = _tidy(filler.sub(r"\1", _drop_repetitions(body)))
+        if body:
+            paragraphs.append([speaker, body])
+
+    if level >= 2:
+        paragraphs = _drop_backchannels(paragraphs, backchannel, all_turns=level >= 3)
+
+    if level >= 3:
+        merged = []
+        for speaker, body in paragraphs:
+            if merged and speaker is not None and merged[-1][0] == speaker:
+                merged[-1][1] += " " + body
+            else:
+                merged.append([speaker, body])
+        paragraphs = merged
+
+    short = level >= 3 and any(speaker is not None for speaker, _ in paragraphs)
+    lines = [vocabulary.legend] if short else []
+    for speaker, body in paragraphs:
+        if speaker is None:
+            lines.append(body)
+        elif short:
+            lines.append(f"{vocabulary.short_label}{speaker}: {body}")
+        else:
+            lines.append(f"{vocabulary.speaker_label} {speaker}: {body}")
+    # Una línea por turno: la línea en blanco entre párrafos también cuesta un token.
+    return "\n".join(lines) if level >= 3 else "\n\n".join(lines)
+
+
+def _drop_backchannels(paragraphs: List[List[Optional[str]]], backchannel, all_turns: bool) -> List[List[Optional[str]]]:
+    """
+    Quita los turnos que solo contienen asentimientos. Sin `all_turns`, solo los que
+    interrumpen a otro hablante (A: ... / B: sí / A: ...), y los dos turnos de A se unen.
+    Con `all_turns`, todos salvo los que responden a una pregunta.
+    """
+    result: List[List[Optional[str]]] = []
+    i = 0
+    while i < len(paragraphs):
+        speaker, body = paragraphs[i]
+        if speaker is not None and _is_backchannel(body, backchannel) and result:
+            previous = result[-1]
+            following = paragraphs[i + 1] if i + 1 < len(paragraphs) else None
+            interrupts = following is not None and previous[0] == following[0] and previous[0] != speaker
+            answers_question = previous[1].rstrip().endswith("?")
+            if interrupts and not answers_question:
+                previous[1] += " " + following[1]
+                i += 2
+                continue
+            if all_turns and not answers_question:
+                i += 1
+                continue
+        result.append([speaker, body])
+        i += 1
+    return result
+
+
+@dataclass(frozen=True)
+class TokenCount:
+    """Número de tokens de un texto y con qué se contó."""
+    tokens: int
+    tokenizer: str
+    exact: bool
+
+
+def parse_tokenizer_map(spec: str) -> Dict[str, str]:
+    """Convierte "llama3.1=meta-llama/Llama-3.1-8B,mistral=/ruta/tokenizer.json" en un diccionario."""
+    mapping = {}
+    for item in spec.split(","):
+        model, sep, tokenizer = item.strip().partition("=")
+        if sep and model.strip() and tokenizer.strip():
+            mapping[model.strip()] = tokenizer.strip()
+    return mapping
+
+
+@lru_cache(maxsize=None)
+def _tiktoken_encoding(model: str):
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model), True
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base"), False
+
+
+@lru_cache(maxsize=None)
+def _hf_tokenizer(name: str):
+    from tokenizers import Tokenizer
+
+    if os.path.exists(name):
+        return Tokenizer.from_file(name)
+    return Tokenizer.from_pretrained(name)
+
+
+def _ollama_tokenizer_name(model: str) -> Optional[str]:
+    mapping = parse_tokenizer_map(OLLAMA_TOKENIZERS)
+    return mapping.get(model) or mapping.get(model.split(":")[0])
+
+
+@lru_cache(maxsize=None)
+def _approximate_encoding():
+    """Codificación genérica de tiktoken, o None si no se puede cargar (sin paquete, o sin red y sin caché)."""
+    try:
+        return _tiktoken_encoding("")[0]
+    except Exception as e:
+        logger.debug("Codificación genérica de tiktoken no disponible: %s", e)
+        return None
+
+
+def estimated_count(text: str) -> TokenCount:
+    """Aproximación local e inmediata (~4 caracteres por token), sin tokenizador ni red."""
+    return TokenCount(estimate_tokens(text), "~4 caracteres/token", False)
+
+
+def _approximate(text: str) -> TokenCount:
+    encoding = _approximate_encoding()
+    if encoding is None:
+        return estimated_count(text)
+    return TokenCount(len(encoding.encode(text, disallowed_special=())), encoding.name, False)
+
+
+def count_tokens(text: str, provider: str, model: str) -> TokenCount:
+    """
+    Cuenta los tokens de `text` con el tokenizador de `model`:
+    - OpenAI: tiktoken, en local.
+    - Anthropic y Google: el endpoint de recuento de su API (una petición breve).
+    - Ollama: el tokenizador de Hugging Face indicado en OLLAMA_TOKENIZERS para ese modelo.
+    Si no hay tokenizador disponible (paquete no instalado, modelo desconocido, API sin
+    clave o sin red), devuelve una aproximación con `exact=False`.
+    """
+    try:
+        if provider == "OpenAI":
+            encoding, exact = _tiktoken_encoding(model)
+            return TokenCount(len(encoding.encode(text, disallowed_special=())), encoding.name, exact)
+        if provider == "Anthropic":
+            from client_registry import get_anthropic_client
+
+            response = get_anthropic_client().messages.count_tokens(model=model, messages=[{"role": "user", "content": text}])
+            return TokenCount(response.input_tokens, f"API de Anthropic ({model})", True)
+        if provider == "Google":
+            from client_registry import get_google_model
+
+            return TokenCount(get_google_model(model).count_tokens(text).total_tokens, f"API de Google ({model})", True)
+        if provider == "Ollama":
+            name = _ollama_tokenizer_name(model)
+            if name:
+                return TokenCount(len(_hf_tokenizer(name).encode(text, add_special_tokens=False).ids), name, True)
+    except ImportError as e:
+        logger.debug("Tokenizador de %s no disponible: %s", provider, e)
+    except Exception as e:
+        logger.debug("No se pudieron contar los tokens con %s/%s: %s", provider, model, e)
+    return _approximate(text)
+
+
+@dataclass
+class CompactionReport:
+    """Resultado de `compact_for_model`: tamaño antes y después y tiempo empleado."""
+    level: int
+    chars_before: int
+    chars_after: int
+    tokens_before: TokenCount
+    tokens_after: TokenCount
+    seconds: float
+
+    @property
+    def saved_fraction(self) -> float:
+        before = self.tokens_before.tokens
+        return (before - self.tokens_after.tokens) / before if before else 0.0
+
+    def summary(self) -> str:
+        precision = "exacto" if self.tokens_after.exact else "aproximado"
+        return (
+            f"Compactación nivel {self.level}: {self.tokens_before.tokens} -> {self.tokens_after.tokens} tokens "
+            f"(-{self.saved_fraction:.1%}, {self.tokens_after.tokenizer}, {precision}) en {self.seconds:.2f}s"
+        )
+
+
+def compact_for_model(
+    text: str,
+    provider: str,
+    model: str,
+    level: int = PROMPT_COMPACTION_LEVEL,
+    language: str = PROMPT_COMPACTION_LANGUAGE,
+    exact_counts: bool = True,
+) -> Tuple[str, CompactionReport]:
+    """
+    Compacta `text` y cuenta sus tokens antes y después. Con `exact_counts` se usa el
+    tokenizador del modelo (que para Anthropic y Google es una petición a su API por
+    recuento); sin él, la aproximación local de `estimated_count`.
+    """
+    start = time.perf_counter()
+    compacted = compact_transcript(text, level, language)
+    seconds = time.perf_counter() - start
+    counter = (lambda t: count_tokens(t, provider, model)) if exact_counts else estimated_count
+    report = CompactionReport(
+        level=level,
+        chars_before=len(text),
+        chars_after=len(compacted),
+        tokens_before=counter(text),
+        tokens_after=counter(compacted),
+        seconds=seconds,
+    )
+    return compacted, report
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Compacta una transcripción e informa de los tokens ahorrados.")
+    parser.add_argument("transcript", help="Archivo de texto con la transcripción.")
+    parser.add_argument("--level", type=int, default=PROMPT_COMPACTION_LEVEL, choices=range(0, MAX_LEVEL + 1))
+    parser.add_argument("--language", default=PROMPT_COMPACTION_LANGUAGE)
+    parser.add_argument("--provider", default="Ollama", choices=["Ollama", "OpenAI", "Anthropic", "Google"])
+    parser.add_argument("--model", default="", help="Modelo cuyo tokenizador se usa para contar.")
+    args = parser.parse_args()
+
+    with open(args.transcript, 'r', encoding='utf-8') as f:
+        original = f.read()
+    compacted_text, compaction = compact_for_model(original, args.provider, args.model, args.level, args.language)
+    sys.stdout.write(compacted_text + "\n")
+    print(compaction.summary(), file=sys.stderr)
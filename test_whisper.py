@@ -1,16 +1,13 @@
-import whisper
+from transcription_backends import WhisperBackend
 
 try:
-    print("Intentando cargar el modelo 'tiny' de Whisper...")
-    model = whisper.load_model("tiny", device="cpu")
+    print("Intentando cargar el modelo 'tiny' de Whisper (faster-whisper)...")
+    backend = WhisperBackend(model="tiny")
+    model = backend.load()
     print("¡Éxito! El modelo se cargó correctamente.")
-    print(f"La función 'load_model' fue encontrada en el módulo: {whisper.__file__}")
-except AttributeError:
-    print("\n¡ERROR! El atributo 'load_model' no fue encontrado.")
-    print("Esto significa que se está importando un módulo 'whisper' incorrecto.")
-    import sys
-    print("\nPython está buscando módulos en estas rutas (sys.path):")
-    for path in sys.path:
-        print(path)
+    print(f"Tipo de cálculo: {backend.compute_type}, hilos de CPU: {backend.cpu_threads}, lotes de {backend.batch_size}.")
+except RuntimeError as e:
+    # faster-whisper no está instalado.
+    print(f"\n¡ERROR! {e}")
 except Exception as e:
-    print(f"\nOcurrió otro error: {e}")
\ No newline at end of file
+    print(f"\nOcurrió otro error: {e}")
@@ -0,0 +1,323 @@
+"""
+Transcripción con tiempos y hablantes en arrays compactos.
+
+`Transcript` guarda las palabras en un único buffer de texto UTF-8 y, por palabra, su
+posición en el buffer, los tiempos de inicio y fin (ms), la confianza y el hablante, en
+`array`s tipados; además, los límites de turnos de hablante, párrafos y temas. No hay un
+objeto Python por palabra, así que cientos de horas de audio ocupan unas decenas de MB.
+
+El formato binario (`save`/`load`) es la concatenación de esos arrays tras una cabecera;
+`load` proyecta el archivo en memoria con mmap y lo lee sin copiarlo.
+
+Las búsquedas por tiempo (`index_at`, `speaker_at`, `time_range`) son búsquedas binarias,
+O(log n), y `render()` produce el texto con etiquetas "Hablante N:" que se envía al LLM.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"MATRANS1"
+# magic, little-endian (1/0), palabras, bytes de texto, párrafos, turnos, temas, bytes de etiquetas
+_HEADER = struct.Struct("<8sBxxxIIIIII")
+
+NO_SPEAKER = -1
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+class Transcript:
+    """Transcripción compacta. Se construye con `from_words`/`from_deepgram` o con `load`."""
+
+    def __init__(
+        self,
+        text: bytes,
+        offsets: Sequence[int],
+        starts: Sequence[int],
+        ends: Sequence[int],
+        confidences: Sequence[int],
+        speakers: Sequence[int],
+        paragraph_starts: Sequence[int],
+        turn_starts: Sequence[int],
+        topic_starts: Sequence[int],
+        topic_ends: Sequence[int],
+        topic_labels: List[str],
+        _mmap: Optional[mmap.mmap] = None,
+    ):
+        # `offsets` tiene una entrada más que palabras: la palabra i ocupa text[offsets[i]:offsets[i + 1] - 1].
+        self.text = text
+        self.offsets = offsets
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+        self.speakers = speakers
+        self.paragraph_starts = paragraph_starts
+        self.turn_starts = turn_starts
+        self.topic_starts = topic_starts
+        self.topic_ends = topic_ends
+        self.topic_labels = topic_labels
+        self._mmap = _mmap
+        self._turns_by_speaker: Optional[Dict[int, array]] = None
+
+    # --- Construcción ---
+
+    @classmethod
+    def from_words(
+        cls,
+        words: Iterable[dict],
+        paragraph_starts: Iterable[int] = (),
+        topics: Iterable[Tuple[int, int, str]] = (),
+    ) -> "Transcript":
+        """
+        Construye la transcripción a partir de palabras con el formato de Deepgram
+        (`word`/`punctuated_word`, `start`, `end`, `confidence`, `speaker`), ordenadas por tiempo.
+        `topics` son tuplas (primera palabra, última palabra, etiqueta).
+        """
+        text = bytearray()
+        offsets, starts, ends = array("I"), array("I"), array("I")
+        confidences, speakers = array("B"), array("h")
+        turn_starts = array("I")
+        previous_speaker = None
+        for index, word in enumerate(words):
+            if index:
+                text += b" "
+            offsets.append(len(text))
+            text += (word.get("punctuated_word") or word.get("word", "")).encode('utf-8')
+            starts.append(max(0, round(word.get("start", 0.0) * 1000)))
+            ends.append(max(0, round(word.get("end", 0.0) * 1000)))
+            confidences.append(min(255, max(0, round(word.get("confidence", 0.0) * 255))))
+            speaker = word.get("speaker")
+            speaker = NO_SPEAKER if speaker is None else int(speaker)
+            speakers.append(speaker)
+            if speaker != previous_speaker:
+                turn_starts.append(index)
+                previous_speaker = speaker
+        offsets.append(len(text) + 1)
+
+        topic_starts, topic_ends, topic_labels = array("I"), array("I"), []
+        for first, last, label in topics:
+            topic_starts.append(first)
+            topic_ends.append(last)
+            topic_labels.append(label)
+
+        return cls(
+            bytes(text), offsets, starts, ends, confidences, speakers,
+            array("I", sorted(set(paragraph_starts))), turn_starts,
+            topic_starts, topic_ends, topic_labels,
+        )
+
+    @classmethod
+    def from_deepgram(cls, response: dict) -> "Transcript":
+        """Construye la transcripción a partir de la respuesta completa de Deepgram."""
+        results = response.get("results", {})
+        alternative = results.get("channels", [{}])[0].get("alternatives", [{}])[0]
+        words = alternative.get("words", [])
+        word_starts = [w.get("start", 0.0) for w in words]
+
+        paragraph_starts = []
+        for paragraph in (alternative.get("paragraphs") or {}).get("paragraphs", []):
+            paragraph_starts.append(min(bisect_left(word_starts, paragraph.get("start", 0.0) - 1e-3), max(0, len(words) - 1)))
+
+        topics = []
+        for segment in (results.get("topics") or {}).get("segments", []):
+            labels = [t.get("topic", "") for t in segment.get("topics", [])]
+            if labels:
+                topics.append((segment.get("start_word", 0), segment.get("end_word", 0), ", ".join(labels)))
+
+        return cls.from_words(words, paragraph_starts, topics)
+
+    # --- Acceso ---
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def word(self, index: int) -> str:
+        return bytes(self.text[self.offsets[index]:self.offsets[index + 1] - 1]).decode('utf-8')
+
+    def text_between(self, first: int, last: int) -> str:
+        """Texto de las palabras [first, last), con una sola copia del buffer."""
+        if first >= last:
+            return ""
+        return bytes(self.text[self.offsets[first]:self.offsets[last] - 1]).decode('utf-8')
+
+    def start(self, index: int) -> float:
+        return self.starts[index] / 1000
+
+    def end(self, index: int) -> float:
+        return self.ends[index] / 1000
+
+    def confidence(self, index: int) -> float:
+        return self.confidences[index] / 255
+
+    @property
+    def duration(self) -> float:
+        return self.ends[-1] / 1000 if len(self) else 0.0
+
+    # --- Búsquedas O(log n) ---
+
+    def index_at(self, seconds: float) -> int:
+        """Índice de la palabra que se está pronunciando en `seconds` (o la anterior más cercana)."""
+        return max(0, bisect_right(self.starts, round(seconds * 1000)) - 1)
+
+    def time_range(self, start: float, end: float) -> Tuple[int, int]:
+        """Índices [first, last) de las palabras que empiezan entre `start` y `end` segundos."""
+        return bisect_left(self.starts, round(start * 1000)), bisect_left(self.starts, round(end * 1000))
+
+    def turn_at(self, index: int) -> int:
+        """Número del turno de hablante al que pertenece la palabra `index`."""
+        return bisect_right(self.turn_starts, index) - 1
+
+    def turn_range(self, turn: int) -> Tuple[int, int]:
+        """Índices [first, last) de las palabras del turno `turn`."""
+        last = self.turn_starts[turn + 1] if turn + 1 < len(self.turn_starts) else len(self)
+        return self.turn_starts[turn], last
+
+    def speaker_at(self, seconds: float) -> Optional[int]:
+        if not len(self):
+            return None
+        speaker = self.speakers[self.index_at(seconds)]
+        return None if speaker == NO_SPEAKER else speaker
+
+    def turns_of(self, speaker: int) -> Sequence[int]:
+        """Turnos (en orden) en los que habla `speaker`."""
+        if self._turns_by_speaker is None:
+            by_speaker: Dict[int, array] = {}
+            for turn, first in enumerate(self.turn_starts):
+                by_speaker.setdefault(self.speakers[first], array("I")).append(turn)
+            self._turns_by_speaker = by_speaker
+        return self._turns_by_speaker.get(speaker, array("I"))
+
+    def speaker_ids(self) -> List[int]:
+        return sorted(s for s in {self.speakers[first] for first in self.turn_starts} if s != NO_SPEAKER)
+
+    def topics(self) -> Iterator[Tuple[int, int, str]]:
+        return zip(self.topic_starts, self.topic_ends, self.topic_labels)
+
+    # --- Texto para el prompt ---
+
+    def _blocks(self, first: int, last: int) -> Iterator[Tuple[int, int]]:
+        """Divide [first, last) en bloques que no cruzan cambios de hablante ni de párrafo."""
+        bounds = set(self.turn_starts[bisect_right(self.turn_starts, first):bisect_left(self.turn_starts, last)])
+        bounds.update(self.paragraph_starts[bisect_right(self.paragraph_starts, first):bisect_left(self.paragraph_starts, last)])
+        previous = first
+        for bound in sorted(bounds):
+            yield previous, bound
+            previous = bound
+        if previous < last:
+            yield previous, last
+
+    def render(self, start: Optional[float] = None, end: Optional[float] = None, timestamps: bool = False) -> str:
+        """
+        Texto con un párrafo por turno de hablante (y por párrafo de Deepgram), con el formato
+        "Hablante N: ...". `start`/`end` (segundos) limitan el tramo; con `timestamps` cada
+        párrafo empieza con su hora "[hh:mm:ss]".
+        """
+        first = 0 if start is None else self.time_range(start, start)[0]
+        last = len(self) if end is None else self.time_range(end, end)[0]
+        paragraphs = []
+        for block_first, block_last in self._blocks(first, last):
+            text = self.text_between(block_first, block_last)
+            speaker = self.speakers[block_first]
+            if speaker != NO_SPEAKER:
+                text = f"Hablante {speaker}: {text}"
+            if timestamps:
+                seconds = self.starts[block_first] // 1000
+                text = f"[{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}] {text}"
+            paragraphs.append(text)
+        return "\n\n".join(paragraphs)
+
+    # --- Serialización ---
+
+    def save(self, path: str):
+        """Guarda la transcripción en el formato binario que lee `load`."""
+        labels = json.dumps(self.topic_labels, ensure_ascii=False).encode('utf-8')
+        sections = [
+            array("I", self.offsets), array("I", self.starts), array("I", self.ends),
+            array("B", self.confidences), array("h", self.speakers),
+            array("I", self.paragraph_starts), array("I", self.turn_starts),
+            array("I", self.topic_starts), array("I", self.topic_ends),
+        ]
+        little = sys.byteorder == "little"
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(
+                MAGIC, little, len(self), len(self.text), len(self.paragraph_starts),
+                len(self.turn_starts), len(self.topic_starts), len(labels),
+            ))
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            for data in [s.tobytes() for s in sections] + [bytes(self.text), labels]:
+                f.write(data)
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+
+    @classmethod
+    def load(cls, path: str) -> "Transcript":
+        """
+        Abre una transcripción guardada con `save` proyectándola en memoria: los arrays son
+        vistas sobre el archivo y solo se leen del disco las páginas que se consultan.
+        """
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        magic, little, words, text_bytes, paragraphs, turns, topics, label_bytes = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} no es una transcripción guardada por meeting-analyzer.")
+        swap = bool(little) != (sys.byteorder == "little")
+
+        position = _align(_HEADER.size)
+
+        def take(typecode: str, count: int):
+            nonlocal position
+            size = array(typecode).itemsize * count
+            chunk = view[position:position + size]
+            position = _align(position + size)
+            if swap:
+                # Archivo de otra arquitectura: se copia y se invierte el orden de bytes.
+                converted = array(typecode, chunk.tobytes())
+                converted.byteswap()
+                return converted
+            return chunk.cast(typecode)
+
+        offsets = take("I", words + 1)
+        starts = take("I", words)
+        ends = take("I", words)
+        confidences = take("B", words)
+        speakers = take("h", words)
+        paragraph_starts = take("I", paragraphs)
+        turn_starts = take("I", turns)
+        topic_starts = take("I", topics)
+        topic_ends = take("I", topics)
+        text = view[position:position + text_bytes]
+        position = _align(position + text_bytes)
+        topic_labels = json.loads(bytes(view[position:position + label_bytes]).decode('utf-8')) if label_bytes else []
+        view.release()
+
+        return cls(
+            text, offsets, starts, ends, confidences, speakers,
+            paragraph_starts, turn_starts, topic_starts, topic_ends, topic_labels,
+            _mmap=mapped,
+        )
+
+    def close(self):
+        """Libera la proyección en memoria de una transcripción abierta con `load`."""
+        if self._mmap is None:
+            return
+        for name in ("text", "offsets", "starts", "ends", "confidences", "speakers",
+                     "paragraph_starts", "turn_starts", "topic_starts", "topic_ends"):
+            value = getattr(self, name)
+            if isinstance(value, memoryview):
+                value.release()
+            setattr(self, name, array("I"))
+        self.text = b""
+        self._turns_by_speaker = None
+        self._mmap.close()
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
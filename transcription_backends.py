@@ -0,0 +1,253 @@
+"""
+Motores de transcripción intercambiables.
+
+Un motor recibe la ruta de un archivo de audio/video y devuelve la respuesta con la forma
+de la de Deepgram (`results.channels[0].alternatives[0]` con `transcript`, `words` y
+`paragraphs`, y `metadata.duration`), de modo que la caché, `Transcript.from_deepgram` y la
+transcripción por segmentos funcionan igual con cualquiera de ellos:
+
+- `deepgram`: la API de Deepgram (ver `audio_processor.request_transcription`).
+- `whisper`: faster-whisper en la CPU local. El audio no sale del equipo y no se necesita
+  red salvo para descargar el modelo la primera vez. El modelo se carga una vez por proceso
+  y queda residente (`client_registry.get_whisper_model`), opcionalmente cuantizado a int8;
+  la detección de voz (VAD) descarta los silencios y los fragmentos de voz se decodifican
+  por lotes usando todos los núcleos.
+
+Se elige con TRANSCRIPTION_BACKEND (o el parámetro `backend` de `audio_processor`); se
+pueden añadir motores con `register_backend`.
+"""
+import logging
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, Optional, Type
+
+from config import (
+    TRANSCRIPTION_BACKEND,
+    WHISPER_BATCH_SIZE,
+    WHISPER_BEAM_SIZE,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_CPU_THREADS,
+    WHISPER_LANGUAGE,
+    WHISPER_MODEL,
+    WHISPER_MODEL_DIR,
+    WHISPER_VAD,
+)
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Pausa (segundos) entre dos frases de Whisper a partir de la cual empieza un párrafo nuevo.
+PARAGRAPH_PAUSE_SECONDS = 1.5
+
+_PUNCTUATION_RE = re.compile(r"[^\w'-]+")
+
+# `on_progress(hecho, total)`: bytes subidos (Deepgram) o segundos de audio decodificados (Whisper).
+ProgressCallback = Callable[[float, float], None]
+
+
+class TranscriptionCancelled(Exception):
+    """Se activó el evento `cancel` pasado a la transcripción: se ha dejado de subir o de decodificar."""
+
+
+def check_cancelled(cancel: Optional[threading.Event]):
+    if cancel is not None and cancel.is_set():
+        raise TranscriptionCancelled("Transcripción cancelada.")
+
+
+class TranscriptionBackend:
+    """Interfaz de un motor de transcripción."""
+    name = ""
+    label = ""
+    # Si conviene subir solo la pista de audio recodificada (ver `audio_processor.extract_audio_track`).
+    extracts_audio = True
+    # Transcripciones simultáneas que tiene sentido lanzar (None = sin límite).
+    max_concurrency: Optional[int] = None
+
+    def cache_options(self) -> dict:
+        """Opciones que afectan al resultado; forman parte de la clave de la caché."""
+        raise NotImplementedError
+
+    def transcribe(
+        self,
+        file_path: str,
+        cancel: Optional[threading.Event] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> dict:
+        """
+        Transcribe el archivo y devuelve la respuesta con la forma de la de Deepgram. Si se
+        activa `cancel`, se detiene en cuanto puede lanzando TranscriptionCancelled.
+        """
+        raise NotImplementedError
+
+
+class DeepgramBackend(TranscriptionBackend):
+    name = "deepgram"
+    label = "Deepgram"
+
+    def cache_options(self) -> dict:
+        from audio_processor import DEEPGRAM_OPTIONS
+
+        # Las mismas claves que antes de existir los motores: la caché sigue siendo válida.
+        return DEEPGRAM_OPTIONS
+
+    def transcribe(self, file_path: str, cancel=None, on_progress=None) -> dict:
+        from audio_processor import request_transcription
+
+        with open(file_path, 'rb') as f:
+            return request_transcription(f, cancel, on_progress, total_bytes=os.fstat(f.fileno()).st_size)
+
+
+class WhisperBackend(TranscriptionBackend):
+    name = "whisper"
+    label = "Whisper local"
+    # faster-whisper decodifica cualquier formato con PyAV: extraer antes el audio solo añadiría una recodificación.
+    extracts_audio = False
+    # Cada transcripción ya usa todos los núcleos: lanzar varias a la vez solo las alterna.
+    max_concurrency = 1
+
+    def __init__(
+        self,
+        model: str = WHISPER_MODEL,
+        compute_type: str = WHISPER_COMPUTE_TYPE,
+        language: str = WHISPER_LANGUAGE,
+        vad: bool = WHISPER_VAD,
+        batch_size: int = WHISPER_BATCH_SIZE,
+        cpu_threads: int = WHISPER_CPU_THREADS,
+        beam_size: int = WHISPER_BEAM_SIZE,
+        download_root: str = WHISPER_MODEL_DIR,
+    ):
+        self.model = model
+        self.compute_type = compute_type
+        self.language = language
+        self.vad = vad
+        self.batch_size = batch_size
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self.download_root = download_root
+
+    @property
+    def batched(self) -> bool:
+        # La decodificación por lotes agrupa los fragmentos de voz que encuentra el VAD.
+        return self.vad and self.batch_size > 1
+
+    def cache_options(self) -> dict:
+        return {
+            "backend": self.name,
+            "model": self.model,
+            "compute_type": self.compute_type,
+            "language": self.language,
+            "vad": self.vad,
+            "batched": self.batched,
+            "beam_size": self.beam_size,
+        }
+
+    def load(self):
+        """Carga el modelo (si no estaba ya residente) y lo devuelve."""
+        from client_registry import get_whisper_model
+
+        return get_whisper_model(self.model, self.compute_type, self.cpu_threads, self.download_root)
+
+    def transcribe(self, file_path: str, cancel=None, on_progress=None) -> dict:
+        options = dict(
+            language=self.language or None,
+            beam_size=self.beam_size,
+            word_timestamps=True,
+            vad_filter=self.vad,
+        )
+        with span("transcription", provider=self.name, model=self.model) as s:
+            if self.batched:
+                from client_registry import get_whisper_pipeline
+
+                pipeline = get_whisper_pipeline(self.model, self.compute_type, self.cpu_threads, self.download_root)
+                segments, info = pipeline.transcribe(file_path, batch_size=self.batch_size, **options)
+            else:
+                segments, info = self.load().transcribe(file_path, **options)
+            # `segments` es un generador: la decodificación ocurre al recorrerlo.
+            response = whisper_response(_follow(segments, info, cancel, on_progress), info, self.model)
+            s.set(audio_seconds=info.duration, speech_seconds=getattr(info, "duration_after_vad", info.duration))
+        return response
+
+
+def _follow(segments: Iterable, info, cancel: Optional[threading.Event], on_progress: Optional[ProgressCallback]):
+    """Recorre las frases de faster-whisper comprobando `cancel` e informando del avance entre una y otra."""
+    for segment in segments:
+        check_cancelled(cancel)
+        if on_progress is not None and info.duration:
+            on_progress(min(segment.end, info.duration), info.duration)
+        yield segment
+
+
+def whisper_response(segments: Iterable, info, model: str) -> dict:
+    """Convierte las frases de faster-whisper en una respuesta con la forma de la de Deepgram."""
+    words = []
+    paragraphs = []
+    texts = []
+    for segment in segments:
+        text = segment.text.strip()
+        if not text:
+            continue
+        texts.append(text)
+        sentence = {"text": text, "start": segment.start, "end": segment.end}
+        if not paragraphs or segment.start - paragraphs[-1]["end"] >= PARAGRAPH_PAUSE_SECONDS:
+            paragraphs.append({"sentences": [], "start": segment.start, "end": segment.end, "num_words": 0})
+        paragraph = paragraphs[-1]
+        paragraph["sentences"].append(sentence)
+        paragraph["end"] = segment.end
+
+        for word in segment.words or ():
+            punctuated = word.word.strip()
+            if not punctuated:
+                continue
+            words.append({
+                "word": _PUNCTUATION_RE.sub("", punctuated).lower() or punctuated,
+                "punctuated_word": punctuated,
+                "start": word.start,
+                "end": word.end,
+                "confidence": word.probability,
+            })
+            paragraph["num_words"] += 1
+
+    confidence = sum(w["confidence"] for w in words) / len(words) if words else 0.0
+    return {
+        "metadata": {"duration": info.duration, "channels": 1, "models": [f"whisper-{model}"]},
+        "results": {
+            "channels": [{
+                "detected_language": info.language,
+                "language_confidence": info.language_probability,
+                "alternatives": [{
+                    "transcript": " ".join(texts),
+                    "confidence": confidence,
+                    "words": words,
+                    "paragraphs": {"paragraphs": paragraphs},
+                }],
+            }],
+        },
+    }
+
+
+BACKENDS: Dict[str, Type[TranscriptionBackend]] = {
+    DeepgramBackend.name: DeepgramBackend,
+    WhisperBackend.name: WhisperBackend,
+}
+
+_instances: Dict[str, TranscriptionBackend] = {}
+_lock = threading.Lock()
+
+
+def register_backend(backend_class: Type[TranscriptionBackend]):
+    """Añade un motor, que después se puede elegir por su `name`."""
+    BACKENDS[backend_class.name] = backend_class
+
+
+def get_backend(name: Optional[str] = None) -> TranscriptionBackend:
+    """Devuelve el motor `name` (por defecto, TRANSCRIPTION_BACKEND), compartido por el proceso."""
+    name = (name or TRANSCRIPTION_BACKEND).lower()
+    with _lock:
+        backend = _instances.get(name)
+        if backend is None:
+            backend_class = BACKENDS.get(name)
+            if backend_class is None:
+                raise ValueError(f"Motor de transcripción desconocido: '{name}'. Opciones: {', '.join(sorted(BACKENDS))}.")
+            backend = _instances[name] = backend_class()
+        return backend
@@ -0,0 +1,45 @@
+import hashlib
+import json
+import shutil
+import subprocess
+from typing import BinaryIO, Iterator
+
+
+def probe_duration(file_path: str) -> float:
+    """
+    Devuelve la duración en segundos de un archivo de audio/video usando ffprobe.
+    Si ffprobe no está disponible o falla, devuelve 0.0.
+    """
+    if not shutil.which("ffprobe"):
+        return 0.0
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", file_path],
+            capture_output=True, text=True, check=True
+        )
+        return float(json.loads(result.stdout)["format"]["duration"])
+    except (subprocess.CalledProcessError, KeyError, ValueError):
+        return 0.0
+
+
+def iter_file_chunks(file_obj: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """Lee `file_obj` en bloques de `chunk_size` bytes, sin cargarlo entero en memoria."""
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter_file_chunks(f, chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida del número de tokens de un texto (~4 caracteres por token)."""
+    return len(text) // 4 + 1